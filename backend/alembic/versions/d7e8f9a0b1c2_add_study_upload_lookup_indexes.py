@@ -0,0 +1,40 @@
+"""Add composite lookup indexes to study_uploads
+
+Revision ID: d7e8f9a0b1c2
+Revises: c1a2b3c4d5e6
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e8f9a0b1c2"
+down_revision: Union[str, None] = "c1a2b3c4d5e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicate check at init filters on study_hash and a created_at cutoff;
+    # the composite index also covers plain study_hash lookups.
+    op.create_index(
+        "ix_study_uploads_hash_created", "study_uploads", ["study_hash", "created_at"], unique=False
+    )
+    op.drop_index("ix_study_uploads_study_hash", table_name="study_uploads")
+    # Second pass at completion matches on the real DICOM identifiers
+    op.create_index(
+        "ix_study_uploads_identity",
+        "study_uploads",
+        ["study_instance_uid", "patient_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_study_uploads_identity", table_name="study_uploads")
+    op.create_index("ix_study_uploads_study_hash", "study_uploads", ["study_hash"], unique=False)
+    op.drop_index("ix_study_uploads_hash_created", table_name="study_uploads")
@@ -0,0 +1,139 @@
+"""Partition study_uploads by month (PostgreSQL)
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f9a0b1c2d3"
+down_revision: Union[str, None] = "d7e8f9a0b1c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created beyond the current month; the retention job keeps this topped up
+MONTHS_AHEAD = 2
+
+INDEXES = {
+    "ix_study_uploads_upload_id": ["upload_id"],
+    "ix_study_uploads_hash_created": ["study_hash", "created_at"],
+    "ix_study_uploads_identity": ["study_instance_uid", "patient_id", "created_at"],
+}
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_literal(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=UTC).isoformat()
+
+
+def _drop_indexes(table_name: str) -> None:
+    # Index names are schema-wide in Postgres, so free them before recreating
+    for name in INDEXES:
+        op.drop_index(name, table_name=table_name)
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, "study_uploads", columns, unique=False)
+
+
+def upgrade() -> None:
+    # SQLite keeps a single table; retention there deletes whole months instead
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.rename_table("study_uploads", "study_uploads_unpartitioned")
+    op.execute(
+        "ALTER TABLE study_uploads_unpartitioned "
+        "RENAME CONSTRAINT study_uploads_pkey TO study_uploads_unpartitioned_pkey"
+    )
+    _drop_indexes("study_uploads_unpartitioned")
+
+    # The partition key must be part of the primary key
+    op.execute(
+        "CREATE TABLE study_uploads ("
+        "id UUID NOT NULL, "
+        "upload_id VARCHAR(50) NOT NULL, "
+        "study_instance_uid VARCHAR(64) NOT NULL, "
+        "patient_id VARCHAR(64) NOT NULL, "
+        "study_hash VARCHAR(64) NOT NULL, "
+        "user_id UUID, "
+        "created_at TIMESTAMP WITH TIME ZONE NOT NULL, "
+        "CONSTRAINT study_uploads_pkey PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)"
+    )
+    _create_indexes()
+
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(created_at) FROM study_uploads_unpartitioned"))
+        .scalar()
+    )
+    today = datetime.now(UTC).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE study_uploads_{month:%Y_%m} PARTITION OF study_uploads "
+            f"FOR VALUES FROM ('{_month_literal(month)}') "
+            f"TO ('{_month_literal(_add_months(month, 1))}')"
+        )
+        month = _add_months(month, 1)
+    # Rows for months without a partition land here instead of failing the insert;
+    # the retention job moves them out when it creates their month
+    op.execute("CREATE TABLE study_uploads_default PARTITION OF study_uploads DEFAULT")
+
+    op.execute(
+        "INSERT INTO study_uploads "
+        "(id, upload_id, study_instance_uid, patient_id, study_hash, user_id, created_at) "
+        "SELECT id, upload_id, study_instance_uid, patient_id, study_hash, user_id, created_at "
+        "FROM study_uploads_unpartitioned"
+    )
+    op.drop_table("study_uploads_unpartitioned")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.rename_table("study_uploads", "study_uploads_partitioned")
+    op.execute(
+        "ALTER TABLE study_uploads_partitioned "
+        "RENAME CONSTRAINT study_uploads_pkey TO study_uploads_partitioned_pkey"
+    )
+    _drop_indexes("study_uploads_partitioned")
+
+    op.create_table(
+        "study_uploads",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("upload_id", sa.String(length=50), nullable=False),
+        sa.Column("study_instance_uid", sa.String(length=64), nullable=False),
+        sa.Column("patient_id", sa.String(length=64), nullable=False),
+        sa.Column("study_hash", sa.String(length=64), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name="study_uploads_pkey"),
+    )
+    _create_indexes()
+
+    op.execute(
+        "INSERT INTO study_uploads "
+        "(id, upload_id, study_instance_uid, patient_id, study_hash, user_id, created_at) "
+        "SELECT id, upload_id, study_instance_uid, patient_id, study_hash, user_id, created_at "
+        "FROM study_uploads_partitioned"
+    )
+    # Dropping the parent drops its partitions
+    op.drop_table("study_uploads_partitioned")
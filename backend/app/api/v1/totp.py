@@ -1,9 +1,11 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.dependencies import get_current_user
 from app.auth.totp import totp_service
-from app.db.database import get_db
+from app.auth.user_cache import user_cache
+from app.db.database import get_async_db
 from app.db.models import User
 from pydantic import BaseModel
 
@@ -40,7 +42,7 @@ async def setup_totp(
 async def enable_totp(
     payload: TOTPVerifyRequest,
     current_user: dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict[str, bool]:
     """
     Verify the code and enable 2FA for the user.
@@ -54,28 +56,34 @@ async def enable_totp(
         )
     
     # Update user
-    user = db.query(User).filter(User.username == current_user["sub"]).first()
+    user = await user_cache.get(db, current_user["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    user.totp_secret = payload.secret
-    user.totp_enabled = True
-    db.commit()
+    await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(totp_secret=payload.secret, totp_enabled=True)
+    )
+    await db.commit()
+    user_cache.invalidate(user.username)
     
     return {"success": True, "enabled": True}
 
 @router.post("/disable")
 async def disable_totp(
     current_user: dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict[str, bool]:
     """Disable 2FA for the user."""
-    user = db.query(User).filter(User.username == current_user["sub"]).first()
+    user = await user_cache.get(db, current_user["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    user.totp_secret = None
-    user.totp_enabled = False
-    db.commit()
+    await db.execute(
+        update(User).where(User.id == user.id).values(totp_secret=None, totp_enabled=False)
+    )
+    await db.commit()
+    user_cache.invalidate(user.username)
     
     return {"success": True, "enabled": False}
@@ -3,7 +3,7 @@ from typing import Any
 from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 
-from app.auth.utils import verify_token
+from app.auth.token_cache import authenticate_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
@@ -22,7 +22,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    payload = verify_token(final_token)
+    payload = authenticate_token(final_token)
     if not payload or payload.get("type") != "access":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,9 +32,9 @@ async def get_current_user(
     return payload
 
 
-async def get_upload_token(token: str = Depends(oauth2_scheme)) -> dict[str, Any]:
+async def get_upload_token(token: str | None = Depends(oauth2_scheme)) -> dict[str, Any]:
     """Validate upload-scoped token"""
-    payload = verify_token(token)
+    payload = authenticate_token(token) if token else None
     if not payload or payload.get("type") != "upload":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
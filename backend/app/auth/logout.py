@@ -3,31 +3,34 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from app.auth.token_cache import REVOKED_TOKEN_PREFIX, revocation_list, revoke_token, token_hash
 from app.cache.service import cache_service
 from app.db.database import get_db
 from app.models.user import TokenRevokeRequest
 
 router = APIRouter()
 
-# Token revocation prefix
-REVOKED_TOKEN_PREFIX = "revoked_token:"
-
 
 @router.post("/logout")
 async def logout(payload: TokenRevokeRequest, db: Session = Depends(get_db)) -> dict[str, str]:
     """
     Logout user and revoke their access token using Redis.
     """
-    # Store token in Redis with a 24-hour expiry
-    # (matching max possible token life)
-    await cache_service.set(f"{REVOKED_TOKEN_PREFIX}{payload.token}", "1", expire=86400)
+    # Revoked until the token's own expiry; other workers pick it up on their next sync
+    await revoke_token(payload.token)
 
     return {"message": "Successfully logged out"}
 
 
 async def is_token_revoked(token: str) -> bool:
     """
-    Check if a token has been revoked in Redis.
+    Check if a token has been revoked.
+
+    Consults the local revocation list first and falls back to Redis for
+    revocations made since the last sync.
     """
-    result = await cache_service.get(f"{REVOKED_TOKEN_PREFIX}{token}")
+    key = token_hash(token)
+    if revocation_list.is_revoked(key):
+        return True
+    result = await cache_service.get(f"{REVOKED_TOKEN_PREFIX}{key}")
     return result is not None
@@ -0,0 +1,117 @@
+"""Bounded worker pool for bcrypt hashing so logins never block the event loop."""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TypeVar
+
+from app.auth.utils import hash_password, verify_password
+from app.config import get_settings
+from app.exceptions import PasswordHasherBusyError
+
+try:
+    from prometheus_client import Gauge
+except ImportError:
+    Gauge = None  # type: ignore[misc, assignment]
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so a few worker threads keep
+    request handling responsive during a login burst. At most
+    ``max_pending`` operations may be queued or running; beyond that
+    callers get PasswordHasherBusyError instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Operations waiting for a free worker."""
+        return self._pending - self._running
+
+    @property
+    def in_flight(self) -> int:
+        """Operations queued or running."""
+        return self._pending
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of pool metrics."""
+        return {
+            "workers": self.workers,
+            "queued": self.queue_depth,
+            "running": self._running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def _submit(self, func: Callable[..., T], *args: object) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusyError(f"{self._pending} password hash operations pending")
+            self._pending += 1
+
+        def run() -> T:
+            with self._lock:
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def release(future: Future[T]) -> None:
+            # Runs on completion and on cancellation before a worker picked it up
+            with self._lock:
+                self._pending -= 1
+                if not future.cancelled():
+                    self.completed += 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost factor."""
+        return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against a bcrypt hash."""
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+
+if Gauge is not None:
+    Gauge(
+        "relaypacs_password_hash_queue_depth", "Password hash operations waiting for a worker"
+    ).set_function(lambda: password_hasher.queue_depth)
+    Gauge(
+        "relaypacs_password_hash_running", "Password hash operations currently running"
+    ).set_function(lambda: password_hasher._running)
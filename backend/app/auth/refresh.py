@@ -3,6 +3,7 @@
 from fastapi import APIRouter, HTTPException, status
 from jose import JWTError, jwt
 
+from app.auth.token_cache import revocation_list, token_hash
 from app.auth.utils import ALGORITHM, SECRET_KEY, create_access_token, create_refresh_token
 from app.models.user import TokenPair, TokenRefreshRequest
 
@@ -20,6 +21,12 @@ async def refresh_token(payload: TokenRefreshRequest) -> TokenPair:
     Returns:
         New access and refresh tokens
     """
+    if revocation_list.is_revoked(token_hash(payload.refresh_token)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+
     try:
         # Verify refresh token
         payload_data = jwt.decode(payload.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -1,13 +1,17 @@
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
+from app.auth.password_hasher import password_hasher
 from app.auth.totp import totp_service
-from app.auth.utils import create_access_token, create_refresh_token, hash_password, verify_password
-from app.db.database import get_db
+from app.auth.user_cache import user_cache
+from app.auth.utils import create_access_token, create_refresh_token, password_needs_rehash
+from app.db.database import get_async_db
 from app.db.models import User as UserModel
+from app.exceptions import PasswordHasherBusyError
 from app.limiter import limiter
 from app.models.user import TokenPair, UserCreate, UserLogin, UserResponse
 from app.upload.service import upload_manager
@@ -15,10 +19,19 @@ from app.upload.service import upload_manager
 router = APIRouter()
 
 
+def _hasher_busy() -> HTTPException:
+    """Response for requests shed because the password hash pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/login", response_model=TokenPair)
 @limiter.limit("5/minute")  # Prevent brute-force attacks
 async def login(
-    request: Request, credentials: UserLogin, db: Session = Depends(get_db)
+    request: Request, credentials: UserLogin, db: AsyncSession = Depends(get_async_db)
 ) -> TokenPair:
     """
     Authenticate user and issue access tokens.
@@ -27,9 +40,16 @@ async def login(
     password = credentials.password
 
     # Try database
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = await user_cache.get(db, username)
 
-    if user and verify_password(password, user.hashed_password):
+    try:
+        password_ok = user is not None and await password_hasher.verify(
+            password, user.hashed_password
+        )
+    except PasswordHasherBusyError:
+        raise _hasher_busy() from None
+
+    if user and password_ok:
         # Database user - verify against hashed password
         if not user.is_active:
             raise HTTPException(
@@ -52,6 +72,20 @@ async def login(
                         detail="Invalid TOTP code",
                     )
 
+        # Upgrade hashes made with an older cost factor while we have the password
+        if password_needs_rehash(user.hashed_password):
+            try:
+                new_hash = await password_hasher.hash(password)
+                await db.execute(
+                    update(UserModel)
+                    .where(UserModel.username == username)
+                    .values(hashed_password=new_hash)
+                )
+                await db.commit()
+                user_cache.invalidate(username)
+            except PasswordHasherBusyError:
+                pass  # Retried on the next login
+
         access_token = create_access_token(data={"sub": username})
         refresh_token = create_refresh_token(data={"sub": username})
         return TokenPair(access_token=access_token, refresh_token=refresh_token)
@@ -67,13 +101,13 @@ async def login(
 @router.post("/register", response_model=TokenPair, status_code=status.HTTP_201_CREATED)
 @limiter.limit("3/hour")  # Prevent account spamming
 async def register(
-    request: Request, user_data: UserCreate, db: Session = Depends(get_db)
+    request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_async_db)
 ) -> TokenPair:
     """
     Register a new user account with hashed password.
     """
     # Check if username already exists
-    existing_user = db.query(UserModel).filter(UserModel.username == user_data.username).first()
+    existing_user = await user_cache.get(db, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -81,7 +115,8 @@ async def register(
         )
 
     # Check if email already exists
-    existing_email = db.query(UserModel).filter(UserModel.email == user_data.email).first()
+    result = await db.execute(select(UserModel.id).where(UserModel.email == user_data.email))
+    existing_email = result.first()
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,7 +124,10 @@ async def register(
         )
 
     # Create new user with hashed password
-    hashed_pw = hash_password(user_data.password)
+    try:
+        hashed_pw = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy() from None
     new_user = UserModel(
         username=user_data.username,
         email=user_data.email,
@@ -99,8 +137,8 @@ async def register(
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    user_cache.invalidate(user_data.username)
 
     # Issue tokens for immediate login
     access_token = create_access_token(data={"sub": new_user.username})
@@ -111,13 +149,13 @@ async def register(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: dict[str, str] = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> UserResponse:
     """
     Get current authenticated user's information.
     """
     username = current_user.get("sub")
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = await user_cache.get(db, username) if username else None
 
     if not user:
         raise HTTPException(
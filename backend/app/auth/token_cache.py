@@ -0,0 +1,205 @@
+"""In-process fast path for token verification and revocation checks."""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.auth.utils import verify_token
+from app.cache.service import cache_service
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Token revocation prefix; keys are revoked_token:<sha256 of token>
+REVOKED_TOKEN_PREFIX = "revoked_token:"
+
+# Fallback revocation lifetime for tokens without a readable exp claim
+MAX_REVOCATION_SECONDS = 86400
+
+
+def token_hash(token: str) -> str:
+    """Stable key for a token, so raw tokens are never used as cache or Redis keys."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token payloads.
+
+    Entries are keyed by token hash and expire at the token's own ``exp``
+    claim, so a hit is exactly as valid as re-verifying the signature would be.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # token hash -> (payload, exp timestamp), least to most recently used
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return a copy of the cached payload, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return dict(payload)
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        """Cache a verified payload until its exp claim. Tokens without exp are not cached."""
+        exp = payload.get("exp")
+        if not isinstance(exp, int | float):
+            return
+
+        with self._lock:
+            self._entries[key] = (dict(payload), float(exp))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        """Drop a token from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationList:
+    """
+    Local mirror of the Redis ``revoked_token:`` keyspace.
+
+    Requests check revocation against an in-memory set of token hashes. A
+    background task re-syncs the set from Redis, so logouts handled by other
+    workers take effect within ``sync_interval`` seconds without adding a
+    Redis round trip to every request.
+    """
+
+    def __init__(self, sync_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self.running = False
+        self._task: asyncio.Task[None] | None = None
+        self._revoked: set[str] = set()
+        # Revocations made by this process: token hash -> expiry timestamp.
+        # Kept across syncs so they hold even when Redis is unavailable.
+        self._local: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, key: str) -> bool:
+        """Check a token hash against the local revocation set."""
+        return key in self._revoked
+
+    def add(self, key: str, expires_at: float) -> None:
+        """Record a revocation made by this process."""
+        self._local[key] = expires_at
+        self._revoked.add(key)
+
+    async def sync(self) -> None:
+        """Replace the local set with the revoked tokens currently in Redis."""
+        try:
+            keys = await cache_service.scan_keys(REVOKED_TOKEN_PREFIX)
+        except Exception as e:
+            logger.warning(f"Revocation sync failed, keeping previous list: {e}")
+            return
+        if keys is None:
+            # No Redis to ask: an empty answer would re-admit tokens other workers revoked
+            return
+
+        now = time.time()
+        self._local = {key: exp for key, exp in self._local.items() if exp > now}
+        revoked = {key.removeprefix(REVOKED_TOKEN_PREFIX) for key in keys}
+        self._revoked = revoked | self._local.keys()
+
+    async def start(self) -> None:
+        """Load the revocation list and start the background sync task."""
+        if self.running:
+            return
+
+        self.running = True
+        await self.sync()
+        self._task = asyncio.create_task(self._sync_loop())
+        logger.info(f"Token revocation sync started ({len(self._revoked)} revoked tokens)")
+
+    async def stop(self) -> None:
+        """Stop the background sync task."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Token revocation sync stopped")
+
+    async def _sync_loop(self) -> None:
+        while self.running:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+
+def authenticate_token(token: str) -> dict[str, Any] | None:
+    """
+    Return the verified payload for a token.
+
+    Returns None if the token is invalid, expired or revoked. Signature
+    verification only runs on a cache miss.
+    """
+    key = token_hash(token)
+    if revocation_list.is_revoked(key):
+        return None
+
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = verify_token(token)
+        if payload is None:
+            return None
+        token_cache.put(key, payload)
+
+    return payload
+
+
+async def revoke_token(token: str) -> None:
+    """
+    Revoke a token locally and in Redis.
+
+    The Redis entry lives until the token would have expired anyway, so the
+    revocation keyspace stays bounded by the number of live tokens.
+    """
+    key = token_hash(token)
+    payload = verify_token(token)
+    exp = payload.get("exp") if payload else None
+    if isinstance(exp, int | float):
+        ttl = max(int(exp - time.time()), 1)
+    else:
+        ttl = MAX_REVOCATION_SECONDS
+
+    revocation_list.add(key, time.time() + ttl)
+    token_cache.discard(key)
+    await cache_service.set(f"{REVOKED_TOKEN_PREFIX}{key}", "1", expire=ttl)
+
+
+# Singleton instances
+token_cache = VerifiedTokenCache(settings.token_cache_max_size)
+revocation_list = RevocationList(settings.revocation_sync_interval_seconds)
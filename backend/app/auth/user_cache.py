@@ -0,0 +1,87 @@
+"""Cached user lookups for the auth endpoints."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.models import User as UserModel
+from app.models.user import UserRecord
+
+settings = get_settings()
+
+
+class UserCache:
+    """
+    Username -> UserRecord cache in front of the users table.
+
+    A bounded in-process LRU with a short TTL. Records hold the password
+    hash and TOTP secret, so they are never shared through Redis. Writers
+    call ``invalidate`` after committing; other workers see the change once
+    their entry expires, so the TTL bounds how long e.g. a disabled account
+    stays cached. Missing users are not cached.
+    """
+
+    def __init__(self, ttl: int, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # username -> (record, expiry timestamp), least to most recently used
+        self._entries: OrderedDict[str, tuple[UserRecord, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_local(self, username: str) -> UserRecord | None:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            record, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return record
+
+    def _put_local(self, record: UserRecord) -> None:
+        with self._lock:
+            self._entries[record.username] = (record, time.monotonic() + self.ttl)
+            self._entries.move_to_end(record.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def get(self, db: AsyncSession, username: str) -> UserRecord | None:
+        """Return the user record, loading it from the database on a miss."""
+        record = self._get_local(username)
+        if record is not None:
+            return record
+
+        result = await db.execute(select(UserModel).where(UserModel.username == username))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+
+        record = UserRecord.model_validate(user)
+        self._put_local(record)
+        return record
+
+    def invalidate(self, username: str) -> None:
+        """Drop a user after their row changed."""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        """Drop all locally cached users."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Singleton instance
+user_cache = UserCache(
+    ttl=settings.user_cache_ttl_seconds,
+    max_size=settings.user_cache_max_size,
+)
@@ -14,18 +14,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 15  # Shorter for security (was 24h)
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int | None = None) -> str:
     """
     Hash a password using bcrypt.
 
     Args:
         password: Plain text password
+        rounds: bcrypt cost factor (defaults to settings.bcrypt_rounds)
 
     Returns:
         Hashed password string
     """
     password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return cast(str, hashed.decode("utf-8"))
 
@@ -46,6 +47,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return cast(bool, bcrypt.checkpw(password_bytes, hashed_bytes))
 
 
+def password_needs_rehash(hashed_password: str, rounds: int | None = None) -> bool:
+    """
+    Check whether a bcrypt hash was made with a different cost factor.
+
+    Args:
+        hashed_password: Hashed password from database
+        rounds: Expected cost factor (defaults to settings.bcrypt_rounds)
+
+    Returns:
+        True if the hash should be regenerated
+    """
+    try:
+        cost = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != (rounds or settings.bcrypt_rounds)
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """
     Create a JWT access token.
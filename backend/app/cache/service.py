@@ -1,80 +1,379 @@
 """Redis cache service."""
 
 import json
+import threading
+import time
+from collections import OrderedDict
 from typing import Any
 
 import redis.asyncio as redis  # type: ignore[import-untyped]
 
 from app.config import get_settings
 
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:
+    Counter = None  # type: ignore[misc, assignment]
+    Histogram = None  # type: ignore[misc, assignment]
+
+# Keys deleted per UNLINK when clearing a prefix
+UNLINK_BATCH_SIZE = 500
+
+# Lookup result -> CacheMetrics counter
+_LOOKUP_FIELDS = {"l1_hit": "l1_hits", "hit": "hits", "miss": "misses"}
+
+# Registered once per process; every CacheMetrics reports into the same series
+_LOOKUPS = None
+_REDIS_LATENCY = None
+if Counter is not None and Histogram is not None:
+    _LOOKUPS = Counter(
+        "relaypacs_cache_lookups_total",
+        "Cache lookups by key prefix and result",
+        ["prefix", "result"],
+    )
+    _REDIS_LATENCY = Histogram(
+        "relaypacs_cache_redis_seconds",
+        "Redis round trip time by key prefix and operation",
+        ["prefix", "operation"],
+    )
+
+
+def key_prefix(key: str) -> str:
+    """Metrics label for a key: everything up to and including the first ':'."""
+    head, sep, _ = key.partition(":")
+    return f"{head}{sep}" if sep else "(none)"
+
+
+class CacheMetrics:
+    """
+    Per key prefix hit/miss counts and Redis latency.
+
+    Always kept in-process (see ``stats``); also exported to Prometheus when
+    prometheus_client is installed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # prefix -> {"l1_hits", "hits", "misses", "calls", "latency_total"}
+        self._prefixes: dict[str, dict[str, float]] = {}
+
+    def _entry(self, prefix: str) -> dict[str, float]:
+        entry = self._prefixes.get(prefix)
+        if entry is None:
+            entry = self._prefixes[prefix] = dict.fromkeys(
+                ("l1_hits", "hits", "misses", "calls", "latency_total"), 0.0
+            )
+        return entry
+
+    def observe_lookup(self, key: str, result: str) -> None:
+        """Record one lookup; result is "l1_hit", "hit" or "miss"."""
+        prefix = key_prefix(key)
+        with self._lock:
+            self._entry(prefix)[_LOOKUP_FIELDS[result]] += 1
+        if _LOOKUPS is not None:
+            _LOOKUPS.labels(prefix=prefix, result=result).inc()
+
+    def observe_latency(self, key: str, operation: str, seconds: float) -> None:
+        """Record one Redis round trip made on behalf of key's prefix."""
+        prefix = key_prefix(key)
+        with self._lock:
+            entry = self._entry(prefix)
+            entry["calls"] += 1
+            entry["latency_total"] += seconds
+        if _REDIS_LATENCY is not None:
+            _REDIS_LATENCY.labels(prefix=prefix, operation=operation).observe(seconds)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Snapshot of per-prefix metrics."""
+        with self._lock:
+            return {
+                prefix: {
+                    "l1_hits": entry["l1_hits"],
+                    "hits": entry["hits"],
+                    "misses": entry["misses"],
+                    "redis_calls": entry["calls"],
+                    "redis_avg_ms": (
+                        entry["latency_total"] / entry["calls"] * 1000 if entry["calls"] else 0.0
+                    ),
+                }
+                for prefix, entry in self._prefixes.items()
+            }
+
+
+class LocalCache:
+    """
+    Small in-process LRU with per-entry TTL, in front of Redis for hot keys.
+
+    Values are stored in their encoded (Redis) form, so every read returns a
+    fresh object. Entries are only invalidated locally, so other workers can
+    serve a value for up to ``ttl`` seconds after it changed; keep the TTL short.
+    """
+
+    def __init__(self, ttl: float, max_size: int, prefixes: list[str]) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.prefixes = tuple(prefixes)
+        self._lock = threading.Lock()
+        # key -> (value, expiry timestamp), least to most recently used
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def handles(self, key: str) -> bool:
+        """True when key is eligible for the local tier."""
+        return self.ttl > 0 and key.startswith(self.prefixes)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _encode(value: Any) -> Any:
+    return json.dumps(value) if isinstance(value, dict | list) else value
+
+
+def _decode(value: Any) -> Any | None:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
 
 class CacheService:
+    """
+    Redis cache with a bounded connection pool and an optional local tier.
+
+    All calls share one BlockingConnectionPool of ``redis_max_connections``;
+    when it is exhausted callers wait up to ``redis_pool_timeout_seconds``
+    for a connection instead of opening more. Keys matching
+    ``cache_l1_prefixes`` are also kept in a short-lived in-process LRU.
+    When no Redis URL is configured every lookup is a miss.
+    """
+
     def __init__(self) -> None:
         self.settings = get_settings()
         self.redis_url = self.settings.redis_url
         self._redis: redis.Redis | None = None
+        self._pool: redis.BlockingConnectionPool | None = None
+        self.local = LocalCache(
+            ttl=self.settings.cache_l1_ttl_seconds,
+            max_size=self.settings.cache_l1_max_size,
+            prefixes=self.settings.cache_l1_prefixes,
+        )
+        self.metrics = CacheMetrics()
 
     async def connect(self) -> None:
         """Connect to Redis."""
         if not self._redis and self.redis_url:
-            self._redis = redis.from_url(self.redis_url, encoding="utf-8", decode_responses=True)
+            self._pool = redis.BlockingConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.settings.redis_max_connections,
+                timeout=self.settings.redis_pool_timeout_seconds,
+                encoding="utf-8",
+                decode_responses=True,
+            )
+            self._redis = redis.Redis(connection_pool=self._pool)
 
     async def close(self) -> None:
         """Close Redis connection."""
         if self._redis:
-            await self._redis.close()
+            await self._redis.aclose()
             self._redis = None
+        if self._pool:
+            await self._pool.disconnect()
+            self._pool = None
+        self.local.clear()
 
-    async def get(self, key: str) -> Any | None:
-        """Get value from cache."""
+    async def _client(self) -> redis.Redis | None:
         if not self._redis:
             await self.connect()
+        return self._redis
 
-        if not self._redis:
+    async def get(self, key: str) -> Any | None:
+        """Get value from cache."""
+        if self.local.handles(key):
+            value = _decode(self.local.get(key))
+            if value is not None:
+                self.metrics.observe_lookup(key, "l1_hit")
+                return value
+
+        client = await self._client()
+        if not client:
             return None
 
-        value = await self._redis.get(key)
-        if value:
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
-        return None
+        start = time.perf_counter()
+        raw = await client.get(key)
+        self.metrics.observe_latency(key, "get", time.perf_counter() - start)
+        value = _decode(raw)
+        self.metrics.observe_lookup(key, "miss" if value is None else "hit")
+
+        if value is not None and self.local.handles(key):
+            self.local.put(key, raw)
+        return value
+
+    async def mget(self, keys: list[str]) -> dict[str, Any]:
+        """Get several values in one round trip. Missing keys are left out."""
+        found: dict[str, Any] = {}
+        remote: list[str] = []
+        for key in keys:
+            value = _decode(self.local.get(key)) if self.local.handles(key) else None
+            if value is not None:
+                self.metrics.observe_lookup(key, "l1_hit")
+                found[key] = value
+            else:
+                remote.append(key)
+
+        client = await self._client()
+        if not client or not remote:
+            return found
+
+        start = time.perf_counter()
+        values = await client.mget(remote)
+        elapsed = time.perf_counter() - start
+        for key, raw in zip(remote, values, strict=True):
+            self.metrics.observe_latency(key, "mget", elapsed / len(remote))
+            value = _decode(raw)
+            self.metrics.observe_lookup(key, "miss" if value is None else "hit")
+            if value is not None:
+                found[key] = value
+                if self.local.handles(key):
+                    self.local.put(key, raw)
+        return found
 
     async def set(self, key: str, value: Any, expire: int = 3600) -> None:
         """Set value in cache."""
-        if not self._redis:
-            await self.connect()
+        client = await self._client()
+        if not client:
+            return
 
-        if not self._redis:
+        encoded = _encode(value)
+        start = time.perf_counter()
+        await client.set(key, encoded, ex=expire)
+        self.metrics.observe_latency(key, "set", time.perf_counter() - start)
+
+        if self.local.handles(key):
+            self.local.put(key, encoded, ttl=expire)
+
+    async def mset(self, items: dict[str, Any], expire: int = 3600) -> None:
+        """Set several values with the same expiry in one pipelined round trip."""
+        client = await self._client()
+        if not client or not items:
             return
 
-        if isinstance(value, dict | list):
-            value = json.dumps(value)
+        encoded = {key: _encode(value) for key, value in items.items()}
+        pipe = client.pipeline(transaction=False)
+        for key, value in encoded.items():
+            pipe.set(key, value, ex=expire)
+        start = time.perf_counter()
+        await pipe.execute()
+        elapsed = time.perf_counter() - start
 
-        await self._redis.set(key, value, ex=expire)
+        for key, value in encoded.items():
+            self.metrics.observe_latency(key, "mset", elapsed / len(items))
+            if self.local.handles(key):
+                self.local.put(key, value, ttl=expire)
 
     async def delete(self, key: str) -> None:
         """Delete value from cache."""
-        if not self._redis:
-            await self.connect()
+        self.local.discard(key)
+        client = await self._client()
+        if not client:
+            return
 
-        if not self._redis:
+        await client.delete(key)
+
+    async def set_bits(self, key: str, offsets: list[int], expire: int) -> None:
+        """Set bits in a Redis bitmap in one round trip, refreshing its expiry."""
+        client = await self._client()
+        if not client:
             return
 
-        await self._redis.delete(key)
+        pipe = client.pipeline(transaction=False)
+        for offset in offsets:
+            pipe.setbit(key, offset, 1)
+        pipe.expire(key, expire)
+        await pipe.execute()
 
-    async def clear_prefix(self, prefix: str) -> None:
-        """Clear all keys with prefix."""
-        if not self._redis:
-            await self.connect()
+    async def get_bits(self, key_offsets: dict[str, list[int]]) -> dict[str, list[int]] | None:
+        """Read bits from several Redis bitmaps in one round trip. None if Redis is unavailable."""
+        client = await self._client()
+        if not client:
+            return None
 
-        if not self._redis:
-            return
+        pipe = client.pipeline(transaction=False)
+        for key, offsets in key_offsets.items():
+            for offset in offsets:
+                pipe.getbit(key, offset)
+        values = iter(await pipe.execute())
+        return {key: [next(values) for _ in offsets] for key, offsets in key_offsets.items()}
+
+    async def scan_keys(self, prefix: str) -> list[str] | None:
+        """
+        List all keys with prefix using incremental SCAN.
+
+        Returns None when Redis is not configured or unreachable, so callers can
+        tell "no keys" apart from "don't know".
+        """
+        client = await self._client()
+        if not client:
+            return None
+
+        return [key async for key in client.scan_iter(match=f"{prefix}*", count=500)]
+
+    async def clear_prefix(self, prefix: str) -> int:
+        """
+        Clear all keys with prefix. Returns the number of keys removed.
+
+        Walks the keyspace with SCAN and frees keys with UNLINK in batches,
+        so Redis is never blocked for the whole keyspace.
+        """
+        self.local.discard_prefix(prefix)
+        client = await self._client()
+        if not client:
+            return 0
 
-        keys = await self._redis.keys(f"{prefix}*")
-        if keys:
-            await self._redis.delete(*keys)
+        removed = 0
+        batch: list[str] = []
+        async for key in client.scan_iter(match=f"{prefix}*", count=UNLINK_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= UNLINK_BATCH_SIZE:
+                removed += await client.unlink(*batch)
+                batch = []
+        if batch:
+            removed += await client.unlink(*batch)
+        return removed
 
 
 # Global cache instance
@@ -3,6 +3,7 @@ Configuration management for RelayPACS backend.
 """
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,6 +21,17 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
     upload_token_expire_minutes: int = 30
+    token_cache_max_size: int = 10000  # Verified token payloads kept in memory
+    revocation_sync_interval_seconds: float = 5.0  # Pull revoked tokens from Redis
+
+    # Password hashing
+    bcrypt_rounds: int = 12  # Cost factor; existing hashes are upgraded on login
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64  # Logins beyond this are rejected with 503
+
+    # User record cache for auth endpoints
+    user_cache_ttl_seconds: int = 30  # Bounds staleness across workers
+    user_cache_max_size: int = 10000
 
     # DICOM Identity (Client Node AET)
     ae_title: str = "RELAYPACS"
@@ -28,6 +40,8 @@ class Settings(BaseSettings):
     database_url: str = (
         "sqlite:///./relaypacs.db"  # Default to SQLite, override with postgres://... in production
     )
+    web_concurrency: int = 1  # Server worker processes (WEB_CONCURRENCY)
+    db_max_connections: int = 30  # Connection budget shared by all workers
 
     # API
     api_host: str = "0.0.0.0"
@@ -47,6 +61,27 @@ class Settings(BaseSettings):
     s3_secret_key: str = "minioadmin"
     s3_bucket: str = "relay-pacs-uploads"
     s3_region: str = "us-east-1"
+    s3_delete_concurrency: int = 4  # DeleteObjects requests in flight per cleanup
+    # With use_s3: stage chunks and merged files on local disk (spool_path) and drain
+    # merged files to S3 in the background instead of writing every chunk to S3
+    s3_local_spool: bool = False
+    spool_path: str = "temp_uploads"
+    spool_drain_workers: int = 4
+    spool_high_watermark: float = 0.90  # Disk usage at which drained files are evicted
+    spool_low_watermark: float = 0.80  # Chunk writes are refused until usage drops below
+
+    # Local storage (and the S3 spool): "chunks" keeps one .part file per chunk,
+    # "preallocated" writes chunks in place into one preallocated file per DICOM file
+    local_storage_mode: Literal["chunks", "preallocated"] = "chunks"
+    disk_write_workers: int = 8
+    disk_write_max_pending: int = 256  # Chunk writes beyond this are rejected with 503
+    # "none": leave it to the OS, "chunk": each chunk before it is acknowledged,
+    # "file": only merged files
+    disk_fsync_policy: Literal["none", "chunk", "file"] = "none"
+    # New uploads are refused (503) if used plus reserved space would exceed this
+    disk_admission_max_usage: float = 0.90
+    disk_admission_retry_after: int = 30  # Seconds
+    disk_admission_db_path: str = "data/capacity.db"  # Reservations shared by all workers
 
     # PACS - Orthanc
     orthanc_url: str = "http://localhost:8042"
@@ -62,16 +97,62 @@ class Settings(BaseSettings):
     active_pacs: str = "dcm4chee"  # 'orthanc', 'dcm4chee', or 'both' (future)
     pacs_poll_interval_seconds: int = 10
 
+    # Duplicate study detection
+    duplicate_window_days: int = 30
+    duplicate_bloom_daily_capacity: int = 100000  # Expected uploads per day
+    duplicate_bloom_error_rate: float = 0.01
+    # Also match study hashes recorded before metadata was normalized; safe to turn
+    # off once duplicate_window_days have passed since upgrading
+    duplicate_match_legacy_hash: bool = True
+
+    # study_uploads retention (never shorter than duplicate_window_days)
+    study_upload_retention_days: int = 90
+    study_upload_archive_dir: str = "data/archive/study_uploads"
+    study_upload_partitions_ahead: int = 2  # Monthly partitions created in advance (Postgres)
+
+    # Upload statistics
+    stats_db_path: str = "data/stats.db"
+    stats_flush_interval_seconds: float = 5.0  # Max delay before buffered events are written
+    stats_flush_max_events: int = 500
+    stats_cache_ttl_seconds: int = 5  # Dashboard polls within this share one rollup read
+
     # Upload limits
     max_file_size_mb: int = 2048
     chunk_size_mb: int = 1
+    upload_batch_max_chunks: int = 256  # Records per POST /upload/{id}/chunks
+    upload_assembly_workers: int = 4  # Files assembled concurrently in the background
+    # Used when the client states no preference. SHA-256 is computed anyway as the
+    # chunk's content address, so it costs no extra pass (scripts/benchmark_checksum.py)
+    upload_checksum_algorithm: str = "sha256"
+    upload_verify_on_merge: bool = False  # Re-read and re-hash every chunk when merging
+    # Expired sessions are reaped in the background, a batch at a time
+    upload_reaper_interval_seconds: float = 30.0
+    upload_reaper_batch_size: int = 50
+
+    # Content-addressed chunk store and PACS forwarding ledger
+    dedup_db_path: str = "data/dedup.db"
+    dedup_blob_grace_hours: float = 24.0  # Keep unreferenced blobs for resends of the same data
+    forward_dedup_window_days: int = (
+        30  # Skip re-forwarding instances a PACS accepted this recently
+    )
 
     # Caching (Redis)
     redis_url: str | None = "redis://localhost:6379"
+    redis_max_connections: int = 50  # Per worker process
+    redis_pool_timeout_seconds: float = 5.0  # Wait for a free pooled connection
+    cache_l1_prefixes: list[str] = ["stats:"]  # Keys also cached in-process
+    cache_l1_ttl_seconds: float = 5.0  # Bounds staleness across workers; 0 disables
+    cache_l1_max_size: int = 1024
 
     # Reports & Notifications
     reports_db_path: str = "data/reports.db"
 
+    # Rendered PDF report cache
+    pdf_cache_dir: str = "data/pdf_cache"
+    pdf_cache_max_mb: int = 256
+    pdf_render_workers: int = 2
+    pdf_prerender_max_pending: int = 100
+
     # Error Monitoring (Sentry)
     sentry_dsn: str | None = None  # Set to enable Sentry
     sentry_environment: str = "development"
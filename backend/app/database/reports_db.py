@@ -6,7 +6,13 @@ from pathlib import Path
 from typing import Any, cast
 from uuid import UUID
 
-from app.models.report import Notification, NotificationType, Report, ReportStatus
+from app.models.report import (
+    Notification,
+    NotificationType,
+    Report,
+    ReportStatus,
+    ReportStatusUpdate,
+)
 
 
 class ReportsDatabase:
@@ -179,6 +185,42 @@ class ReportsDatabase:
 
         return [self._row_to_report(row) for row in rows]
 
+    def get_reports_by_status(self, statuses: list[ReportStatus]) -> list[Report]:
+        """Get all reports in any of the given statuses, in a single query."""
+        if not statuses:
+            return []
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        placeholders = ", ".join("?" for _ in statuses)
+        cursor.execute(
+            f"SELECT * FROM reports WHERE status IN ({placeholders}) ORDER BY created_at",
+            tuple(status.value for status in statuses),
+        )
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [self._row_to_report(row) for row in rows]
+
+    def get_reports_by_ids(self, report_ids: list[UUID]) -> list[Report]:
+        """Get many reports by ID, querying in batches below SQLite's variable limit."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        rows: list[sqlite3.Row] = []
+        batch_size = 500
+        for start in range(0, len(report_ids), batch_size):
+            batch = [str(report_id) for report_id in report_ids[start : start + batch_size]]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(f"SELECT * FROM reports WHERE id IN ({placeholders})", batch)
+            rows.extend(cursor.fetchall())
+
+        conn.close()
+
+        return [self._row_to_report(row) for row in rows]
+
     def update_report_status(  # noqa: PLR0913
         self,
         report_id: UUID,
@@ -215,6 +257,65 @@ class ReportsDatabase:
 
         return self.get_report_by_id(report_id)
 
+    def bulk_update_report_status(
+        self,
+        updates: list[ReportStatusUpdate],
+        notifications: list[Notification] | None = None,
+    ) -> int:
+        """
+        Apply many report status updates and insert their notifications at once.
+
+        All rows are written with executemany on one connection and committed
+        in a single transaction, so a burst of status changes costs one commit
+        instead of one per report. Optional fields left as None keep their
+        current value, matching update_report_status. Returns rows updated.
+        """
+        if not updates and not notifications:
+            return 0
+
+        updated_at = datetime.utcnow().isoformat()
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                UPDATE reports SET
+                    status = ?,
+                    updated_at = ?,
+                    report_url = COALESCE(?, report_url),
+                    radiologist_name = COALESCE(?, radiologist_name),
+                    report_text = COALESCE(?, report_text)
+                WHERE id = ?
+            """,
+                [
+                    (
+                        update.status.value,
+                        updated_at,
+                        update.report_url,
+                        update.radiologist_name,
+                        update.report_text,
+                        str(update.report_id),
+                    )
+                    for update in updates
+                ],
+            )
+            count = cursor.rowcount
+
+            if notifications:
+                cursor.executemany(
+                    self._INSERT_NOTIFICATION_SQL,
+                    [self._notification_to_row(n) for n in notifications],
+                )
+
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return count
+
     def _row_to_report(self, row: sqlite3.Row) -> Report:
         """Convert database row to Report model."""
         return Report(
@@ -232,35 +333,55 @@ class ReportsDatabase:
 
     # Notification methods
 
-    def create_notification(self, notification: Notification) -> Notification:
-        """Create a new notification."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
+    _INSERT_NOTIFICATION_SQL = """
             INSERT INTO notifications
             (id, user_id, notification_type, title, message,
              related_upload_id, related_report_id, is_read, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                str(notification.id),
-                notification.user_id,
-                notification.notification_type.value,
-                notification.title,
-                notification.message,
-                str(notification.related_upload_id) if notification.related_upload_id else None,
-                str(notification.related_report_id) if notification.related_report_id else None,
-                1 if notification.is_read else 0,
-                notification.created_at.isoformat(),
-            ),
+        """
+
+    def _notification_to_row(self, notification: Notification) -> tuple[Any, ...]:
+        """Convert Notification model to insert parameters."""
+        return (
+            str(notification.id),
+            notification.user_id,
+            notification.notification_type.value,
+            notification.title,
+            notification.message,
+            str(notification.related_upload_id) if notification.related_upload_id else None,
+            str(notification.related_report_id) if notification.related_report_id else None,
+            1 if notification.is_read else 0,
+            notification.created_at.isoformat(),
         )
 
+    def create_notification(self, notification: Notification) -> Notification:
+        """Create a new notification."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(self._INSERT_NOTIFICATION_SQL, self._notification_to_row(notification))
+
         conn.commit()
         conn.close()
         return notification
 
+    def create_notifications(self, notifications: list[Notification]) -> list[Notification]:
+        """Create many notifications in a single transaction."""
+        if not notifications:
+            return notifications
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany(
+            self._INSERT_NOTIFICATION_SQL,
+            [self._notification_to_row(n) for n in notifications],
+        )
+
+        conn.commit()
+        conn.close()
+        return notifications
+
     def get_user_notifications(
         self, user_id: str, limit: int = 50, offset: int = 0, unread_only: bool = False
     ) -> list[Notification]:
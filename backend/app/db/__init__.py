@@ -1,5 +1,5 @@
 """Database package for RelayPACS."""
 
-from app.db.database import SessionLocal, engine, get_db
+from app.db.database import SessionLocal, engine, get_async_db, get_db
 
-__all__ = ["get_db", "engine", "SessionLocal"]
+__all__ = ["get_db", "get_async_db", "engine", "SessionLocal"]
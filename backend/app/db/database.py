@@ -1,12 +1,21 @@
 """Database connection and session management."""
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from functools import lru_cache
+from typing import cast
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import get_settings
+from app.db.metrics import TimedAsyncAdaptedQueuePool, instrument_engine
 
 settings = get_settings()
 
@@ -47,3 +56,73 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL to the matching async driver (aiosqlite / asyncpg)."""
+    scheme, _, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def pool_limits(max_connections: int, workers: int) -> tuple[int, int]:
+    """
+    Split the connection budget evenly across worker processes.
+
+    Returns (pool_size, max_overflow) for one worker's pool; two thirds of
+    its share are kept open and the rest is overflow.
+    """
+    per_worker = max(max_connections // max(workers, 1), 2)
+    pool_size = max(per_worker * 2 // 3, 1)
+    return pool_size, per_worker - pool_size
+
+
+@lru_cache
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Return the async session factory, creating the async engine on first use.
+
+    Created lazily so the async driver is only imported by processes that
+    use it, and so it picks up the configured database URL at that point.
+    """
+    current = get_settings()
+    url = async_database_url(current.database_url)
+    if url.startswith("sqlite"):
+        async_engine = create_async_engine(url, echo=False)
+    else:
+        pool_size, max_overflow = pool_limits(current.db_max_connections, current.web_concurrency)
+        async_engine = create_async_engine(
+            url,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=30,
+            pool_recycle=1800,
+            echo=False,
+        )
+    instrument_engine(async_engine.sync_engine)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the async engine behind get_async_session_factory."""
+    return cast(AsyncEngine, get_async_session_factory().kw["bind"])
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session.
+    Yields a session and ensures it's closed after use.
+    """
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """Close all pooled async connections."""
+    if get_async_session_factory.cache_info().currsize:
+        await get_async_engine().dispose()
+        get_async_session_factory.cache_clear()
@@ -0,0 +1,121 @@
+"""Connection pool and query latency metrics for the async database engine."""
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+try:
+    from prometheus_client import Gauge, Histogram
+except ImportError:
+    Gauge = None  # type: ignore[misc, assignment]
+    Histogram = None  # type: ignore[misc, assignment]
+
+
+class DatabaseMetrics:
+    """
+    Running totals for pool checkout wait, active connections and query latency.
+
+    Always kept in-process (see ``stats``); also exported to Prometheus when
+    prometheus_client is installed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.active_connections = 0
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.queries = 0
+        self.query_time_total = 0.0
+
+        self._checkout_histogram = None
+        self._query_histogram = None
+        if Gauge is not None and Histogram is not None:
+            self._checkout_histogram = Histogram(
+                "relaypacs_db_pool_checkout_seconds",
+                "Time spent waiting for a pooled database connection",
+            )
+            self._query_histogram = Histogram(
+                "relaypacs_db_query_seconds", "Database statement execution time"
+            )
+            Gauge(
+                "relaypacs_db_connections_active", "Database connections checked out of the pool"
+            ).set_function(lambda: self.active_connections)
+
+    def observe_checkout_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+        if self._checkout_histogram is not None:
+            self._checkout_histogram.observe(seconds)
+
+    def observe_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_time_total += seconds
+        if self._query_histogram is not None:
+            self._query_histogram.observe(seconds)
+
+    def connection_checked_out(self) -> None:
+        with self._lock:
+            self.active_connections += 1
+
+    def connection_checked_in(self) -> None:
+        with self._lock:
+            self.active_connections -= 1
+
+    def stats(self) -> dict[str, float]:
+        """Snapshot of pool and query metrics."""
+        with self._lock:
+            return {
+                "active_connections": self.active_connections,
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": (
+                    self.checkout_wait_total / self.checkouts * 1000 if self.checkouts else 0.0
+                ),
+                "checkout_wait_max_ms": self.checkout_wait_max * 1000,
+                "queries": self.queries,
+                "query_avg_ms": (
+                    self.query_time_total / self.queries * 1000 if self.queries else 0.0
+                ),
+            }
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_metrics.observe_checkout_wait(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach connection and query latency listeners to a (sync or async-backing) engine."""
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(*_: Any) -> None:
+        db_metrics.connection_checked_out()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(*_: Any) -> None:
+        db_metrics.connection_checked_in()
+
+    @event.listens_for(engine, "before_cursor_execute", named=True)
+    def _before_execute(**kw: Any) -> None:
+        kw["context"]._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute", named=True)
+    def _after_execute(**kw: Any) -> None:
+        db_metrics.observe_query(time.perf_counter() - kw["context"]._query_start)
+
+
+# Singleton instance
+db_metrics = DatabaseMetrics()
@@ -3,7 +3,7 @@
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.database import Base
@@ -47,6 +47,9 @@ class StudyUpload(Base):
     
     Stores a hash of key study identifiers to quickly check if a study
     has been uploaded previously within a retention window.
+
+    On PostgreSQL the table is range-partitioned by month on created_at
+    (primary key (id, created_at)); see app/db/partitions.py for retention.
     """
     
     __tablename__ = "study_uploads"
@@ -58,12 +61,19 @@ class StudyUpload(Base):
     study_instance_uid = Column(String(64), nullable=False)
     patient_id = Column(String(64), nullable=False)
     
-    # Hash for fast lookup: SHA256(StudyInstanceUID + PatientID)
-    study_hash = Column(String(64), nullable=False, index=True)
+    # Hash of normalized patient name, study date and modality (known at init)
+    study_hash = Column(String(64), nullable=False)
     
     # Audit info
     user_id = Column(UUID(as_uuid=True), nullable=True)  # Who uploaded it?
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
     
+    __table_args__ = (
+        # Init-time duplicate check: study_hash within a created_at window
+        Index("ix_study_uploads_hash_created", "study_hash", "created_at"),
+        # Completion-time check on the real DICOM identifiers
+        Index("ix_study_uploads_identity", "study_instance_uid", "patient_id", "created_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<StudyUpload(hash='{self.study_hash}', upload_id='{self.upload_id}')>"
@@ -0,0 +1,241 @@
+"""Monthly partitioning and retention for the study_uploads table."""
+
+import gzip
+import json
+import logging
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, Engine, func, select, text
+
+from app.db.models import StudyUpload
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "study_uploads"
+
+# Catches rows for months without a partition (e.g. a clock far ahead, or the
+# retention job not running), so inserts never fail for want of a partition
+DEFAULT_PARTITION = f"{TABLE_NAME}_default"
+
+# Rows archived per fetch when streaming a month out to disk
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def month_start(value: date | datetime) -> date:
+    """First day of the month containing value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Shift a month start by count months."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_datetime(month: date) -> datetime:
+    """Midnight UTC at the start of month."""
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding the given month, e.g. study_uploads_2024_06."""
+    return f"{TABLE_NAME}_{month:%Y_%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """True when study_uploads is a Postgres partitioned table."""
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name"), {"name": TABLE_NAME}
+    ).scalar()
+    return relkind == "p"
+
+
+def _partition_names(conn: Connection) -> list[str]:
+    return list(
+        conn.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :name"
+            ),
+            {"name": TABLE_NAME},
+        ).scalars()
+    )
+
+
+def _parse_months(names: list[str]) -> list[date]:
+    months = []
+    for name in names:
+        if name == DEFAULT_PARTITION:
+            continue
+        try:
+            months.append(datetime.strptime(name.removeprefix(f"{TABLE_NAME}_"), "%Y_%m").date())
+        except ValueError:
+            logger.warning(f"Ignoring unexpected study_uploads partition: {name}")
+    return sorted(months)
+
+
+def list_partitions(conn: Connection) -> list[date]:
+    """Months that currently have a partition, oldest first."""
+    return _parse_months(_partition_names(conn))
+
+
+def months_in_default(conn: Connection, before: date) -> list[date]:
+    """Months before the given one that have rows in the DEFAULT partition, oldest first."""
+    rows = conn.execute(
+        text(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION} WHERE created_at < :before"
+        ),
+        {"before": month_datetime(before)},
+    ).scalars()
+    return sorted(month_start(month) for month in rows)
+
+
+def ensure_partitions(conn: Connection, today: date, months_ahead: int) -> list[str]:
+    """
+    Create the DEFAULT partition and monthly partitions from the current month
+    through months_ahead. Returns new names.
+
+    Rows that landed in the DEFAULT partition for a month are moved into that
+    month's partition as it is created (Postgres refuses to attach a range the
+    DEFAULT partition still holds rows for).
+    """
+    names = _partition_names(conn)
+    existing = set(_parse_months(names))
+    created = []
+    if DEFAULT_PARTITION not in names:
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE_NAME} DEFAULT"
+            )
+        )
+        created.append(DEFAULT_PARTITION)
+
+    for offset in range(months_ahead + 1):
+        month = add_months(month_start(today), offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        start, end = month_datetime(month), month_datetime(add_months(month, 1))
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE_NAME} INCLUDING DEFAULTS)"))
+        conn.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"start": start, "end": end},
+        )
+        conn.execute(
+            text(
+                f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def _row_to_json(row: Any) -> str:
+    return json.dumps(
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row._mapping.items()
+        },
+        default=str,
+    )
+
+
+def archive_month(conn: Connection, month: date, archive_dir: Path) -> tuple[Path, int]:
+    """
+    Write one month of study_uploads to a gzipped JSON Lines file.
+
+    The file is written under a temporary name and renamed once complete, so
+    a crash mid-export never leaves a truncated archive behind.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{partition_name(month)}.jsonl.gz"
+    partial = path.with_name(f"{path.name}.partial")
+
+    start, end = month_datetime(month), month_datetime(add_months(month, 1))
+    result = conn.execution_options(yield_per=ARCHIVE_BATCH_SIZE).execute(
+        select(StudyUpload.__table__)
+        .where(StudyUpload.created_at >= start, StudyUpload.created_at < end)
+        .order_by(StudyUpload.created_at)
+    )
+
+    count = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as f:
+        for row in result:
+            f.write(_row_to_json(row) + "\n")
+            count += 1
+    partial.replace(path)
+    return path, count
+
+
+def prune_study_uploads(
+    engine: Engine,
+    retention_days: int,
+    archive_dir: Path,
+    months_ahead: int = 2,
+    now: datetime | None = None,
+) -> int:
+    """
+    Archive and remove study_uploads months that are past retention.
+
+    Only whole months older than the retention cutoff are removed, so a row
+    is kept for between retention_days and one month longer. On a Postgres
+    partitioned table the month's partition is dropped (and its rows in the
+    DEFAULT partition deleted) and upcoming partitions are created; otherwise
+    (SQLite, or Postgres before the partitioning migration) the month's rows
+    are deleted.
+
+    Returns the number of rows archived.
+    """
+    now = now or datetime.now(UTC)
+    cutoff_month = month_start(now - timedelta(days=retention_days))
+    archived = 0
+
+    with engine.begin() as conn:
+        partitioned = is_partitioned(conn)
+        if partitioned:
+            created = ensure_partitions(conn, now.date(), months_ahead)
+            if created:
+                logger.info(f"Created study_uploads partitions: {', '.join(created)}")
+            partitions = [month for month in list_partitions(conn) if month < cutoff_month]
+            expired = sorted(set(partitions) | set(months_in_default(conn, cutoff_month)))
+        else:
+            oldest = conn.execute(
+                select(func.min(StudyUpload.created_at)).where(
+                    StudyUpload.created_at < month_datetime(cutoff_month)
+                )
+            ).scalar()
+            partitions, expired = [], []
+            month = month_start(oldest) if oldest else cutoff_month
+            while month < cutoff_month:
+                expired.append(month)
+                month = add_months(month, 1)
+
+    for month in expired:
+        # One transaction per month: a failure leaves later months for the next run
+        with engine.begin() as conn:
+            path, count = archive_month(conn, month, archive_dir)
+            if month in partitions:
+                conn.execute(text(f"DROP TABLE {partition_name(month)}"))
+            # Also clears the month's rows from the DEFAULT partition
+            conn.execute(
+                StudyUpload.__table__.delete().where(
+                    StudyUpload.created_at >= month_datetime(month),
+                    StudyUpload.created_at < month_datetime(add_months(month, 1)),
+                )
+            )
+        archived += count
+        logger.info(f"Archived {count} study_uploads rows for {month:%Y-%m} to {path}")
+
+    return archived
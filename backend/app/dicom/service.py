@@ -38,6 +38,32 @@ class DICOMService:
             # Avoid logging the full path if it contains PHI
             raise ValueError(f"Failed to parse DICOM: {str(e)[:100]}") from e
 
+    def extract_study_identifiers(self, file_path: Path | str) -> tuple[str, str]:
+        """
+        Read (StudyInstanceUID, PatientID) from a DICOM file.
+
+        Missing tags come back as empty strings.
+        """
+        try:
+            ds = pydicom.dcmread(
+                str(file_path),
+                stop_before_pixels=True,
+                specific_tags=["StudyInstanceUID", "PatientID"],
+            )
+            return str(getattr(ds, "StudyInstanceUID", "")), str(getattr(ds, "PatientID", ""))
+        except Exception as e:
+            raise ValueError(f"Failed to parse DICOM: {str(e)[:100]}") from e
+
+    def extract_sop_instance_uid(self, file_path: Path | str) -> str:
+        """Read SOPInstanceUID from a DICOM file; empty string when missing."""
+        try:
+            ds = pydicom.dcmread(
+                str(file_path), stop_before_pixels=True, specific_tags=["SOPInstanceUID"]
+            )
+            return str(getattr(ds, "SOPInstanceUID", ""))
+        except Exception as e:
+            raise ValueError(f"Failed to parse DICOM: {str(e)[:100]}") from e
+
 
 # Singleton instance
 dicom_service = DICOMService()
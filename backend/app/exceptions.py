@@ -46,3 +46,39 @@ class ValidationError(RelayPACSError):
     """Raised when data validation fails."""
 
     pass
+
+
+class PasswordHasherBusyError(RelayPACSError):
+    """Raised when too many password hash operations are already queued."""
+
+    pass
+
+
+class PayloadTooLargeError(ChunkUploadError):
+    """Raised when a (decoded) upload body exceeds the configured size limit."""
+
+    pass
+
+
+class ChecksumMismatchError(ChunkUploadError):
+    """Raised when chunk data does not match the checksum sent or recorded for it."""
+
+    pass
+
+
+class DiskWriterBusyError(StorageError):
+    """Raised when too many local storage writes are already queued."""
+
+    pass
+
+
+class InsufficientStorageError(StorageError):
+    """Raised when a new upload would not fit on the storage disk."""
+
+    pass
+
+
+class SpoolFullError(DiskWriterBusyError):
+    """Raised when the local spool disk is full until drained files can be evicted."""
+
+    pass
@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -7,25 +10,34 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.auth.logout import router as logout_router
+from app.auth.password_hasher import password_hasher
 from app.auth.refresh import router as refresh_router
 from app.auth.router import router as auth_router
+from app.auth.token_cache import revocation_list
+from app.cache import cache_service
 from app.config import get_settings
+from app.db.database import dispose_async_engine
 from app.limiter import limiter
 from app.middleware.security import SecurityHeadersMiddleware
 from app.notifications.router import router as notifications_router
+from app.reports.pacs_sync import pacs_sync_service
+from app.reports.pdf_cache import pdf_cache
 from app.reports.router import router as reports_router
+from app.storage.disk_writer import disk_writer
+from app.storage.service import storage_service
+from app.tasks.cleanup import cleanup_orphaned_uploads, upload_reaper
+from app.tasks.retention import prune_study_upload_history
+from app.upload.assembly import file_assembler
+from app.upload.duplicates import duplicate_detector
 from app.upload.router import router as upload_router
-
-settings = get_settings()
-
-from contextlib import asynccontextmanager
+from app.upload.service import stats_manager
 
 try:
     from apscheduler.schedulers.asyncio import AsyncIOScheduler
 except ImportError:
     AsyncIOScheduler = None
 
-from app.tasks.cleanup import cleanup_orphaned_uploads
+settings = get_settings()
 
 # Initialize scheduler
 scheduler = None
@@ -33,56 +45,95 @@ if AsyncIOScheduler:
     scheduler = AsyncIOScheduler()
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup:
-    # 1. Initialize Sentry
-    if settings.sentry_dsn:
-        try:
-            import sentry_sdk
-            from sentry_sdk.integrations.fastapi import FastApiIntegration
-            from sentry_sdk.integrations.starlette import StarletteIntegration
-
-            sentry_sdk.init(
-                dsn=settings.sentry_dsn,
-                environment=settings.sentry_environment,
-                traces_sample_rate=settings.sentry_traces_sample_rate,
-                integrations=[
-                    StarletteIntegration(transaction_style="endpoint"),
-                    FastApiIntegration(transaction_style="endpoint"),
-                ],
-                send_default_pii=False,
-            )
-            print(f"✓ Sentry initialized for {settings.sentry_environment} environment")
-        except ImportError:
-            print("! Sentry configured but package not installed")
-
-    # 2. Start scheduler
+def init_sentry() -> None:
+    if not settings.sentry_dsn:
+        return
+    try:
+        # Optional dependency, only imported when configured
+        import sentry_sdk  # noqa: PLC0415
+        from sentry_sdk.integrations.fastapi import FastApiIntegration  # noqa: PLC0415
+        from sentry_sdk.integrations.starlette import StarletteIntegration  # noqa: PLC0415
+
+        sentry_sdk.init(
+            dsn=settings.sentry_dsn,
+            environment=settings.sentry_environment,
+            traces_sample_rate=settings.sentry_traces_sample_rate,
+            integrations=[
+                StarletteIntegration(transaction_style="endpoint"),
+                FastApiIntegration(transaction_style="endpoint"),
+            ],
+            send_default_pii=False,
+        )
+        print(f"✓ Sentry initialized for {settings.sentry_environment} environment")
+    except ImportError:
+        print("! Sentry configured but package not installed")
+
+
+async def start_services() -> None:
+    # 1. Start scheduler
     if scheduler:
         scheduler.add_job(cleanup_orphaned_uploads, "cron", hour=2, minute=0)  # Run at 2 AM
+        scheduler.add_job(prune_study_upload_history, "cron", hour=3, minute=0)  # Run at 3 AM
         scheduler.start()
-        print("✓ Scheduler started with cleanup task")
+        print("✓ Scheduler started with cleanup and retention tasks")
     else:
         print("! APScheduler not installed, cleanup task disabled")
 
-    # 3. Initialize reports database and start PACS sync
-    from app.reports.pacs_sync import pacs_sync_service
-
+    # 2. Initialize reports database and start PACS sync
     await pacs_sync_service.start()
     print("✓ PACS Report Sync Service started")
 
-    yield
+    # 3. Load revoked tokens and keep them in sync with Redis
+    await revocation_list.start()
+
+    # 4. Load recent study hashes for duplicate detection (in the background)
+    duplicate_detector.start()
+
+    # 5. Start periodic upload stats flush
+    await stats_manager.start()
 
-    # Shutdown:
-    # 1. Stop scheduler
+    # 6. Start reaping expired upload sessions
+    await upload_reaper.start()
+
+
+async def stop_services() -> None:
+    """Stop work that produces I/O first, then what it writes through, Redis last."""
+    # 1. Stop scheduled jobs and background producers
     if scheduler:
         scheduler.shutdown()
-
-    # 2. Stop PACS sync
+    await upload_reaper.stop()
     await pacs_sync_service.stop()
+    await revocation_list.stop()
+    await duplicate_detector.stop()
+
+    # 2. Cancel background file assembly (redone on completion)
+    await file_assembler.stop()
+
+    # 3. Cancel pending spool drains (files stay on local disk)
+    await storage_service.close()
+
+    # 4. Finish queued chunk writes, then stop the other worker pools
+    disk_writer.shutdown()
+    pdf_cache.shutdown()
+    password_hasher.shutdown()
+
+    # 5. Write buffered upload stats
+    await stats_manager.stop()
+
+    # 6. Close async database connections, then the Redis connection pool
+    await dispose_async_engine()
+    await cache_service.close()
     print("✓ Services stopped")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    init_sentry()
+    await start_services()
+    yield
+    await stop_services()
+
+
 app = FastAPI(
     title="RelayPACS API",
     description="Mobile-first DICOM ingestion node for teleradiology",
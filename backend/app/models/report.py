@@ -37,6 +37,16 @@ class Report(BaseModel):
         from_attributes = True
 
 
+class ReportStatusUpdate(BaseModel):
+    """A status change for a single report, applied as part of a bulk update."""
+
+    report_id: UUID
+    status: ReportStatus
+    report_url: Optional[str] = None
+    radiologist_name: Optional[str] = None
+    report_text: Optional[str] = None
+
+
 class NotificationType(str, Enum):
     """Type of notification."""
 
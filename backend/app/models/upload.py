@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class StudyMetadata(BaseModel):
@@ -17,6 +17,15 @@ class StudyMetadata(BaseModel):
     study_description: str | None = None
 
 
+class FileManifest(BaseModel):
+    """Expected shape of one file, so it can be assembled as soon as its last chunk lands"""
+
+    file_id: str = Field(..., min_length=1, max_length=128)
+    size_bytes: int | None = Field(None, gt=0)
+    total_chunks: int = Field(..., gt=0)
+    sha256: str | None = Field(None, pattern=r"^[0-9a-f]{64}$")  # Of the whole file
+
+
 class UploadInitRequest(BaseModel):
     """Request payload for initializing an upload session"""
 
@@ -27,6 +36,24 @@ class UploadInitRequest(BaseModel):
     )
     clinical_history: str | None = None
     force_upload: bool = False  # Override duplicate detection
+    files: list[FileManifest] = Field(
+        default_factory=list, description="Optional per-file manifest (any subset of the files)"
+    )
+    checksum_algorithms: list[str] = Field(
+        default_factory=list,
+        max_length=16,
+        description="Chunk checksum algorithms the client can compute, preferred first",
+    )
+
+    @model_validator(mode="after")
+    def validate_manifest(self) -> "UploadInitRequest":
+        """Manifest entries must be unique and no more than total_files."""
+        file_ids = [entry.file_id for entry in self.files]
+        if len(set(file_ids)) != len(file_ids):
+            raise ValueError("Duplicate file_id in files manifest")
+        if len(file_ids) > self.total_files:
+            raise ValueError("files manifest lists more files than total_files")
+        return self
 
     @field_validator("total_size_bytes")
     @classmethod
@@ -61,6 +88,9 @@ class UploadInitResponse(BaseModel):
     chunk_size: int
     expires_at: datetime
     warning: str | None = None  # For duplicate detection warnings
+    supported_encodings: list[str] = []  # Content-Encodings accepted on chunk uploads
+    checksum_algorithm: str | None = None  # Used for every chunk of this upload
+    supported_checksums: list[str] = []
 
 
 class ChunkUploadResponse(BaseModel):
@@ -71,6 +101,49 @@ class ChunkUploadResponse(BaseModel):
     chunk_index: int
     received_bytes: int
     status: str = "received"
+    checksum: str | None = None  # Of the decoded bytes, in the upload's checksum algorithm
+
+
+class ChunkBatchRecord(BaseModel):
+    """Header of one record in a batch chunk upload"""
+
+    file_id: str = Field(..., min_length=1, max_length=128)
+    chunk_index: int = Field(..., ge=0)
+    size: int = Field(..., gt=0)
+    md5: str | None = Field(None, pattern=r"^[0-9a-fA-F]{32}$")
+    checksum: str | None = Field(None, pattern=r"^[0-9a-fA-F]{8,128}$")  # Upload's algorithm
+    total_chunks: int | None = Field(None, gt=0)  # Chunks in this file, if not in the manifest
+
+
+class ChunkBatchResponse(BaseModel):
+    """Response after a batch chunk upload; one entry per record, in request order"""
+
+    upload_id: UUID
+    received_bytes: int
+    chunks: list[ChunkUploadResponse]
+
+
+class ChunkDigest(BaseModel):
+    """A chunk identified by the SHA-256 of its (decoded) bytes"""
+
+    file_id: str = Field(..., min_length=1, max_length=128)
+    chunk_index: int = Field(..., ge=0)
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$")
+
+
+class ChunkPreflightRequest(BaseModel):
+    """Chunks a client is about to send, to find out which the server already holds"""
+
+    chunks: list[ChunkDigest] = Field(..., max_length=10000)
+
+
+class ChunkPreflightResponse(BaseModel):
+    """Pre-flight result: attached chunks are registered already, missing ones must be sent"""
+
+    upload_id: UUID
+    attached: list[ChunkDigest]
+    missing: list[ChunkDigest]
+    attached_bytes: int
 
 
 class UploadStatusResponse(BaseModel):
@@ -84,6 +157,9 @@ class UploadStatusResponse(BaseModel):
     chunks_received: int
     chunks_total: int
     pacs_status: str
+    wire_bytes: int = 0  # Chunk bytes as sent, before Content-Encoding is removed
+    compression_ratio: float | None = None  # Decoded / wire bytes; None before any chunk
+    deduplicated_bytes: int = 0  # Chunk bytes served from already stored blobs
     files: dict[str, dict[str, Any]] = Field(
         default_factory=dict, description="Map of file_id to status details"
     )
@@ -97,3 +173,4 @@ class UploadCompleteResponse(BaseModel):
     warnings: list[str] = []
     processed_files: int
     failed_files: int
+    duplicate_of_upload_id: str | None = None  # Earlier upload of the same study
@@ -75,6 +75,24 @@ class UserResponse(UserBase):
         from_attributes = True  # Enable ORM mode for SQLAlchemy models
 
 
+class UserRecord(BaseModel):
+    """Internal snapshot of a user row, including credentials. Never returned by the API."""
+
+    id: UUID
+    username: str
+    email: str
+    hashed_password: str
+    full_name: str | None = None
+    role: str
+    is_active: bool
+    totp_secret: str | None = None
+    totp_enabled: bool = False
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class TokenPair(BaseModel):
     """Access and refresh token pair."""
 
@@ -6,18 +6,22 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.auth.dependencies import get_current_user
 from app.database.reports_db import reports_db
 from app.models.report import NotificationListResponse
-from app.notifications.service import notification_service
+from app.notifications.service import EncodedJSONResponse, notification_service
 
 router = APIRouter()
 
 
-@router.get("/", response_model=NotificationListResponse)
+@router.get(
+    "/",
+    response_class=EncodedJSONResponse,
+    responses={200: {"model": NotificationListResponse}},
+)
 async def list_notifications(
     limit: int = 50,
     offset: int = 0,
     unread_only: bool = False,
     user: dict[str, Any] = Depends(get_current_user),
-) -> NotificationListResponse:
+) -> EncodedJSONResponse:
     """
     List notifications for the authenticated user.
 
@@ -35,9 +39,15 @@ async def list_notifications(
     unread_count = reports_db.get_unread_count(user_id)
     total = len(notifications)
 
-    return NotificationListResponse(
-        notifications=notifications, unread_count=unread_count, total=total
-    )
+    # Encode in a single pass with the same encoder used for SSE events instead
+    # of letting FastAPI re-validate and re-serialize every notification. The
+    # documented schema comes from ``responses``; nothing validates against it.
+    body = {
+        "notifications": [notification.model_dump() for notification in notifications],
+        "unread_count": unread_count,
+        "total": total,
+    }
+    return EncodedJSONResponse(body)
 
 
 @router.patch("/{notification_id}/read")
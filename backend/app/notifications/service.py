@@ -3,22 +3,76 @@
 import asyncio
 import json
 from collections.abc import AsyncGenerator
+from datetime import datetime
 from typing import Any
 from uuid import UUID
 
+from fastapi.responses import JSONResponse
+from sse_starlette.event import ServerSentEvent
 from sse_starlette.sse import EventSourceResponse
 
 from app.database.reports_db import reports_db
 from app.models.report import Notification, NotificationType
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _json_default(value: Any) -> str:
+    """Fallback encoder for types the stdlib json module does not handle."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_json(data: Any) -> bytes:
+    """Serialize data to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return bytes(orjson.dumps(data))
+    return json.dumps(data, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+class EncodedJSONResponse(JSONResponse):
+    """JSON response rendered with ``encode_json``, without FastAPI's model validation."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def encode_notification_event(notification: Notification) -> bytes:
+    """
+    Encode a notification as a complete SSE ``notification`` frame.
+
+    The frame is built once per notification and the same bytes are handed to
+    every subscriber queue, so fan-out cost does not grow with JSON encoding.
+    """
+    event_data = {
+        "id": str(notification.id),
+        "type": notification.notification_type.value,
+        "title": notification.title,
+        "message": notification.message,
+        "related_upload_id": (
+            str(notification.related_upload_id) if notification.related_upload_id else None
+        ),
+        "related_report_id": (
+            str(notification.related_report_id) if notification.related_report_id else None
+        ),
+        "created_at": notification.created_at.isoformat(),
+    }
+    payload = encode_json(event_data).decode("utf-8")
+    return ServerSentEvent(payload, event="notification").encode()
+
 
 class NotificationService:
     """Service for managing notifications and Server-Sent Events connections."""
 
     def __init__(self) -> None:
         """Initialize notification service."""
-        # Map user_id to asyncio.Queue for SSE connections
-        self._connections: dict[str, list[asyncio.Queue[dict[str, Any]]]] = {}
+        # Map user_id to asyncio.Queue for SSE connections. Queues carry
+        # pre-encoded SSE frames shared by every connection of the user.
+        self._connections: dict[str, list[asyncio.Queue[bytes]]] = {}
 
     async def create_and_broadcast(  # noqa: PLR0913
         self,
@@ -47,23 +101,29 @@ class NotificationService:
 
         return notification
 
+    async def create_and_broadcast_many(
+        self, notifications: list[Notification]
+    ) -> list[Notification]:
+        """Persist many notifications in one transaction, then broadcast them."""
+        reports_db.create_notifications(notifications)
+        await self.broadcast_many(notifications)
+        return notifications
+
+    async def broadcast_many(self, notifications: list[Notification]) -> None:
+        """
+        Broadcast already-persisted notifications to their users' SSE connections.
+
+        Used for bursts (e.g. many reports turning READY in one PACS sync cycle)
+        where the notifications were written together with other rows.
+        """
+        for notification in notifications:
+            await self._broadcast_to_user(notification.user_id, notification)
+
     async def _broadcast_to_user(self, user_id: str, notification: Notification) -> None:
         """Broadcast notification to all SSE connections for a user."""
         if user_id in self._connections:
-            # Create notification event data
-            event_data = {
-                "id": str(notification.id),
-                "type": notification.notification_type.value,
-                "title": notification.title,
-                "message": notification.message,
-                "related_upload_id": (
-                    str(notification.related_upload_id) if notification.related_upload_id else None
-                ),
-                "related_report_id": (
-                    str(notification.related_report_id) if notification.related_report_id else None
-                ),
-                "created_at": notification.created_at.isoformat(),
-            }
+            # Serialize once; every connection receives the same bytes
+            event_data = encode_notification_event(notification)
 
             # Send to all active connections
             queues_to_remove = []
@@ -80,14 +140,14 @@ class NotificationService:
 
     async def subscribe_sse(self, user_id: str) -> EventSourceResponse:
         """Subscribe to SSE notifications for a user."""
-        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
 
         # Add queue to user's connections
         if user_id not in self._connections:
             self._connections[user_id] = []
         self._connections[user_id].append(queue)
 
-        async def event_generator() -> AsyncGenerator[dict[str, Any], None]:
+        async def event_generator() -> AsyncGenerator[dict[str, Any] | bytes, None]:
             """Generate SSE events for this connection."""
             try:
                 # Send initial connection success event
@@ -107,12 +167,10 @@ class NotificationService:
                     # Wait for notification or heartbeat
                     try:
                         # Wait up to 30 seconds for a notification
-                        notification_data = await asyncio.wait_for(queue.get(), timeout=30.0)
+                        notification_frame = await asyncio.wait_for(queue.get(), timeout=30.0)
 
-                        yield {
-                            "event": "notification",
-                            "data": json.dumps(notification_data),
-                        }
+                        # Already a complete SSE frame, written to the wire as-is
+                        yield notification_frame
 
                     except asyncio.TimeoutError:
                         # Send heartbeat to keep connection alive
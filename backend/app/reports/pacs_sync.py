@@ -7,8 +7,15 @@ from uuid import UUID
 
 from app.config import get_settings
 from app.database.reports_db import reports_db
-from app.models.report import NotificationType, ReportStatus
+from app.models.report import (
+    Notification,
+    NotificationType,
+    Report,
+    ReportStatus,
+    ReportStatusUpdate,
+)
 from app.notifications.service import notification_service
+from app.reports.pdf_cache import pdf_cache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -64,44 +71,105 @@ class PACSReportSyncService:
         """Sync all reports that are not yet ready by checking active PACS."""
         # Import here to avoid circular imports if any
         from app.pacs.service import pacs_service
-        
-        for status in [ReportStatus.ASSIGNED, ReportStatus.PENDING]:
-            conn = reports_db._get_connection()
-            cursor = conn.cursor()
-            # Select ID and Study Instance UID
-            cursor.execute("SELECT id, study_instance_uid FROM reports WHERE status = ?", (status.value,))
-            rows = cursor.fetchall()
-            conn.close()
-
-            for row in rows:
-                report_id = row["id"]
-                study_uid = row["study_instance_uid"]
-                
-                # Check real PACS for report existence (SR/DOC/KO/PR)
-                has_report = pacs_service.check_for_report(study_uid)
-                
-                if has_report:
-                    # Report found in PACS -> Mark as READY
-                    logger.info(f"Report found in PACS for study {study_uid}, marking as READY")
-                    
-                    # In a real scenario, we would retrieve the report content here.
-                    # For now, we update the status and point to the download endpoint which generates a PDF.
-                    # We can update the text to indicate it's from PACS.
-                    pacs_data = {
-                        "radiologist_name": "External Radiologist (PACS)",
-                        "report_text": "Report retrieved from PACS. Full content available in PDF download.",
-                        "report_url": f"/api/reports/{report_id}/download",
-                    }
-                    
-                    await self.update_report_status(report_id, ReportStatus.READY, pacs_data)
-                else:
-                    # No report yet, stay in current status
-                    # Uncomment below to keep simulation for testing if needed, but for now we want REAL checks
-                    # logger.debug(f"No report found yet for {study_uid}")
-                    pass
+
+        pending = reports_db.get_reports_by_status([ReportStatus.ASSIGNED, ReportStatus.PENDING])
+
+        ready_reports: list[Report] = []
+        for report in pending:
+            # Check real PACS for report existence (SR/DOC/KO/PR)
+            if pacs_service.check_for_report(report.study_instance_uid):
+                logger.info(
+                    f"Report found in PACS for study {report.study_instance_uid}, marking as READY"
+                )
+                ready_reports.append(report)
+
+        if ready_reports:
+            # Write the whole cycle's status changes and notifications at once
+            await self.mark_reports_ready(ready_reports)
 
         logger.debug("PACS sync check completed")
 
+    async def mark_reports_ready(self, reports: list[Report]) -> int:
+        """
+        Mark reports found in PACS as READY and notify their owners in bulk.
+
+        Report updates and notification inserts share one SQLite transaction,
+        and the resulting notifications are broadcast afterwards, so a cycle
+        that finds thousands of reports costs one commit rather than several
+        per report. Returns the number of reports updated.
+        """
+        updates: list[ReportStatusUpdate] = []
+        notifications: list[Notification] = []
+
+        for report in reports:
+            if report.status == ReportStatus.READY:
+                continue
+
+            # In a real scenario, we would retrieve the report content here.
+            # For now, point to the download endpoint which generates a PDF.
+            updates.append(
+                ReportStatusUpdate(
+                    report_id=report.id,
+                    status=ReportStatus.READY,
+                    radiologist_name="External Radiologist (PACS)",
+                    report_text=(
+                        "Report retrieved from PACS. Full content available in PDF download."
+                    ),
+                    report_url=f"/api/reports/{report.id}/download",
+                )
+            )
+
+            notification_fields = self._notification_fields(report, ReportStatus.READY)
+            if notification_fields:
+                notification_type, title, message = notification_fields
+                notifications.append(
+                    Notification(
+                        user_id=report.user_id,
+                        notification_type=notification_type,
+                        title=title,
+                        message=message,
+                        related_upload_id=report.upload_id,
+                        related_report_id=report.id,
+                    )
+                )
+
+        if not updates:
+            return 0
+
+        try:
+            count = reports_db.bulk_update_report_status(updates, notifications)
+        except Exception as e:
+            logger.error(f"Failed to bulk update report statuses: {e}", exc_info=True)
+            return 0
+
+        logger.info(f"Marked {count} reports as READY")
+        await notification_service.broadcast_many(notifications)
+
+        # Pre-render PDFs for the reports that just became READY
+        for updated in reports_db.get_reports_by_ids([u.report_id for u in updates]):
+            pdf_cache.schedule_prerender(updated)
+
+        return count
+
+    def _notification_fields(
+        self, report: Report, new_status: ReportStatus
+    ) -> tuple[NotificationType, str, str] | None:
+        """Return (type, title, message) for a status change, or None if not notified."""
+        short_uid = report.study_instance_uid[:20]
+        if new_status == ReportStatus.READY:
+            return (
+                NotificationType.REPORT_READY,
+                "Report Ready",
+                f"Your radiology report for study {short_uid}... is now available",
+            )
+        if new_status == ReportStatus.ADDITIONAL_DATA_REQUIRED:
+            return (
+                NotificationType.ADDITIONAL_DATA_REQUIRED,
+                "Additional Data Required",
+                f"Additional information needed for study {short_uid}...",
+            )
+        return None
+
     async def sync_report_by_study_uid(self, study_uid: str) -> dict[str, Any] | None:
         """
         Query PACS for report status by Study Instance UID.
@@ -141,7 +209,7 @@ class PACSReportSyncService:
                 return
 
             # Update report
-            reports_db.update_report_status(
+            updated = reports_db.update_report_status(
                 UUID(report_id),
                 new_status,
                 report_url=report_data.get("report_url") if report_data else None,
@@ -151,22 +219,14 @@ class PACSReportSyncService:
 
             logger.info(f"Updated report {report_id} status from {report.status} to {new_status}")
 
+            # Render the PDF now so the first download after REPORT_READY is a cache hit
+            if new_status == ReportStatus.READY and updated:
+                pdf_cache.schedule_prerender(updated)
+
             # Send notification based on new status
-            notification_type = None
-            title = ""
-            message = ""
-
-            short_uid = report.study_instance_uid[:20]
-            if new_status == ReportStatus.READY:
-                notification_type = NotificationType.REPORT_READY
-                title = "Report Ready"
-                message = f"Your radiology report for study {short_uid}... is now available"
-            elif new_status == ReportStatus.ADDITIONAL_DATA_REQUIRED:
-                notification_type = NotificationType.ADDITIONAL_DATA_REQUIRED
-                title = "Additional Data Required"
-                message = f"Additional information needed for study {short_uid}..."
-
-            if notification_type:
+            notification_fields = self._notification_fields(report, new_status)
+            if notification_fields:
+                notification_type, title, message = notification_fields
                 await notification_service.create_and_broadcast(
                     user_id=report.user_id,
                     notification_type=notification_type,
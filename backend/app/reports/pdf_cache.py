@@ -0,0 +1,246 @@
+"""Disk cache for rendered PDF reports with size-bounded LRU eviction."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import get_settings
+from app.models.report import Report
+from app.reports.pdf_service import pdf_generator
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Temp files older than this were left by a worker that died mid-write
+STALE_TMP_SECONDS = 3600
+
+
+def report_version(report: Report) -> str:
+    """
+    Content version of a report's PDF.
+
+    Derived from the report id and updated_at, so it changes whenever the
+    report row changes and can be computed without rendering. Used both as
+    the cache key and as the HTTP ETag.
+    """
+    key = f"{report.id}:{report.updated_at.isoformat()}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def render_report_pdf(report: Report) -> bytes:
+    """Render a report to PDF bytes. Module-level so it can run in a worker process."""
+    return pdf_generator.generate_report_pdf(report)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header value against a quoted ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+class PDFReportCache:
+    """
+    Rendered PDF cache stored on local disk.
+
+    Files are named ``<report_id>.<version>.pdf``; storing a new version of a
+    report drops the previous one. The directory is the index, so every
+    worker process sharing it evicts against the same total: after each
+    write the directory is scanned and the least recently used files (by
+    mtime, which a hit refreshes) are removed until it is under
+    ``max_bytes``. Cache misses are rendered in a bounded worker process pool
+    so ReportLab never runs on the event loop and does not contend for the
+    GIL with request handling. The directory and the pool are created on
+    first use.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | str,
+        max_bytes: int,
+        workers: int = 2,
+        max_pending: int = 100,
+        executor: Executor | None = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        # Serializes this process's evictions with opening files (see open_pdf)
+        self._lock = threading.Lock()
+        self._executor = executor
+        self._inflight: dict[str, asyncio.Future[Path]] = {}
+        # Background pre-render tasks; bounded by max_pending
+        self.max_pending = max_pending
+        self._prerender_tasks: set[asyncio.Task[Path]] = set()
+
+    @staticmethod
+    def _filename(report: Report) -> str:
+        return f"{report.id}.{report_version(report)}.pdf"
+
+    def _scan(self) -> list[os.DirEntry[str]]:
+        """Cached PDFs on disk, least recently used first. Drops abandoned temp files."""
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return []
+        now = time.time()
+        pdfs = []
+        for entry in entries:
+            try:
+                if entry.name.endswith(".pdf"):
+                    entry.stat()  # Cached on the entry for sorting and sizing
+                    pdfs.append(entry)
+                elif (
+                    entry.name.endswith(".tmp") and now - entry.stat().st_mtime > STALE_TMP_SECONDS
+                ):
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                continue  # Removed by another worker meanwhile
+        return sorted(pdfs, key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+
+    @property
+    def total_bytes(self) -> int:
+        """Current size of all cached PDFs, written by any worker process."""
+        return sum(entry.stat().st_size for entry in self._scan())
+
+    def get(self, report: Report) -> Path | None:
+        """Return the cached PDF for this report version, if present."""
+        path = self.cache_dir / self._filename(report)
+        try:
+            # Mark as recently used for every process evicting from the directory
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, report: Report, pdf_bytes: bytes) -> Path:
+        """Store rendered PDF bytes for this report version and evict as needed."""
+        filename = self._filename(report)
+        path = self.cache_dir / filename
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write atomically so readers (in any worker process) never see a partial file
+        tmp_path = path.with_name(f"{filename}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            for previous in self.cache_dir.glob(f"{report.id}.*.pdf"):
+                if previous.name != filename:
+                    previous.unlink(missing_ok=True)
+            self._evict(keep=filename)
+
+        return path
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used files until under max_bytes. Caller holds the lock."""
+        entries = self._scan()
+        total = sum(entry.stat().st_size for entry in entries)
+        # Never the file just written, even if it alone exceeds the bound
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            logger.debug(f"Evicting cached PDF {entry.name}")
+            Path(entry.path).unlink(missing_ok=True)
+            total -= entry.stat().st_size
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def _render_and_store(self, report: Report) -> Path:
+        """Render a report in the worker pool and write it to the cache."""
+        loop = asyncio.get_running_loop()
+        pdf_bytes = await loop.run_in_executor(self._get_executor(), render_report_pdf, report)
+        return self.put(report, pdf_bytes)
+
+    async def get_or_render(self, report: Report) -> Path:
+        """
+        Return the cached PDF path for a report, rendering it on a miss.
+
+        Concurrent misses for the same report version share one render.
+        """
+        path = self.get(report)
+        if path:
+            return path
+
+        filename = self._filename(report)
+        future = self._inflight.get(filename)
+        if future is None:
+            future = asyncio.ensure_future(self._render_and_store(report))
+            self._inflight[filename] = future
+            future.add_done_callback(lambda _: self._inflight.pop(filename, None))
+
+        return await asyncio.shield(future)
+
+    async def open_pdf(self, report: Report) -> BinaryIO:
+        """
+        Open the cached PDF for a report, rendering it on a miss.
+
+        The file is opened under the cache lock, so an eviction in this process
+        can't remove it between lookup and open; once open, its bytes stay
+        readable even if it is unlinked. A file another worker pruned in the
+        meantime is rendered again.
+        """
+        for _ in range(2):
+            path = await self.get_or_render(report)
+            with self._lock:
+                try:
+                    return open(path, "rb")
+                except FileNotFoundError:
+                    continue
+        raise FileNotFoundError(f"Cached PDF for report {report.id} keeps disappearing")
+
+    def schedule_prerender(self, report: Report) -> bool:
+        """
+        Render a report's PDF in the background so the first download is a hit.
+
+        Returns False without scheduling if the report is already cached or too
+        many pre-renders are pending; the download path then renders lazily.
+        """
+        if self.get(report) is not None:
+            return False
+
+        if len(self._prerender_tasks) >= self.max_pending:
+            logger.debug(f"PDF pre-render queue full, deferring report {report.id}")
+            return False
+
+        task = asyncio.ensure_future(self.get_or_render(report))
+        self._prerender_tasks.add(task)
+        task.add_done_callback(self._prerender_done)
+        return True
+
+    def _prerender_done(self, task: asyncio.Task[Path]) -> None:
+        self._prerender_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"PDF pre-render failed: {task.exception()}")
+
+    def shutdown(self) -> None:
+        """Stop the render worker pool and cancel pending pre-renders."""
+        for task in list(self._prerender_tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+pdf_cache = PDFReportCache(
+    settings.pdf_cache_dir,
+    max_bytes=settings.pdf_cache_max_mb * 1024 * 1024,
+    workers=settings.pdf_render_workers,
+    max_pending=settings.pdf_prerender_max_pending,
+)
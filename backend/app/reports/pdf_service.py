@@ -1,6 +1,7 @@
 """PDF Report Generation Service using ReportLab."""
 
 import io
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -10,21 +11,75 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.pdfbase.pdfdoc import PDFStream, PDFZCompress
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 from app.database.reports_db import reports_db
 from app.models.report import Report
 
 
+class BinaryStreamCanvas(Canvas):
+    """
+    Canvas writing page streams Flate-compressed without the ASCII85 wrapping.
+
+    PDFs are served as binary downloads, so skipping ASCII85 saves a
+    pure-Python encode pass per page. ReportLab only offers this as the
+    process-wide ``rl_config.useA85``; setting the filters on this canvas's
+    own pages leaves other documents in the process untouched.
+    """
+
+    def showPage(self) -> None:  # noqa: N802 - ReportLab API
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.compression:
+            page.Contents = PDFStream(content=page.stream, filters=[PDFZCompress])
+
+
 class PDFReportGenerator:
-    """Service for generating PDF radiology reports."""
+    """
+    Service for generating PDF radiology reports.
 
-    def generate_report_pdf(self, report: Report) -> bytes:
+    Styles are built once and shared by every render. Flowables keep layout
+    state while a document is built, so each render creates its own.
+    """
+
+    def __init__(self) -> None:
+        """Build styles shared by every report."""
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=24,
+            textColor=colors.HexColor("#1e40af"),
+            spaceAfter=30,
+        )
+        self.heading_style = ParagraphStyle(
+            "CustomHeading", parent=styles["Heading2"], fontSize=14, spaceAfter=12
+        )
+        self.normal_style = styles["Normal"]
+        self.footer_style = ParagraphStyle(
+            "Footer", parent=styles["Normal"], fontSize=8, textColor=colors.grey
+        )
+        self.metadata_table_style = TableStyle(
+            [
+                ("FONT", (0, 0), (0, -1), "Helvetica-Bold", 10),
+                ("FONT", (1, 0), (1, -1), "Helvetica", 10),
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#374151")),
+                ("TEXTCOLOR", (1, 0), (1, -1), colors.HexColor("#1f2937")),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+            ]
+        )
+
+    def generate_report_pdf(self, report: Report, generated_at: datetime | None = None) -> bytes:
         """
         Generate a PDF report from Report model.
 
         Args:
             report: Report model to convert to PDF
+            generated_at: Timestamp for the footer (defaults to now)
 
         Returns:
             PDF file content as bytes
@@ -32,24 +87,10 @@ class PDFReportGenerator:
         # Create PDF in memory
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
-        story = []
-
-        # Get styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            textColor=colors.HexColor("#1e40af"),
-            spaceAfter=30,
-        )
-        heading_style = ParagraphStyle(
-            "CustomHeading", parent=styles["Heading2"], fontSize=14, spaceAfter=12
-        )
-        normal_style = styles["Normal"]
+        story: list[Flowable] = []
 
         # Title
-        story.append(Paragraph("RAD IOLOGY REPORT", title_style))
+        story.append(Paragraph("RAD IOLOGY REPORT", self.title_style))
         story.append(Spacer(1, 0.2 * inch))
 
         # Report metadata table
@@ -65,59 +106,40 @@ class PDFReportGenerator:
             metadata.append(["Radiologist:", report.radiologist_name])
 
         metadata_table = Table(metadata, colWidths=[2 * inch, 4 * inch])
-        metadata_table.setStyle(
-            TableStyle(
-                [
-                    ("FONT", (0, 0), (0, -1), "Helvetica-Bold", 10),
-                    ("FONT", (1, 0), (1, -1), "Helvetica", 10),
-                    ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#374151")),
-                    ("TEXTCOLOR", (1, 0), (1, -1), colors.HexColor("#1f2937")),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                ]
-            )
-        )
+        metadata_table.setStyle(self.metadata_table_style)
 
         story.append(metadata_table)
         story.append(Spacer(1, 0.3 * inch))
 
         # Report findings
-        story.append(Paragraph("FINDINGS", heading_style))
+        story.append(Paragraph("FINDINGS", self.heading_style))
 
         if report.report_text:
             # Split report text into paragraphs
             paragraphs = report.report_text.split("\n\n")
             for para in paragraphs:
                 if para.strip():
-                    story.append(Paragraph(para.strip(), normal_style))
+                    story.append(Paragraph(para.strip(), self.normal_style))
                     story.append(Spacer(1, 0.1 * inch))
         else:
             story.append(
                 Paragraph(
                     "<i>Report findings not yet available. Status: " + report.status.value + "</i>",
-                    normal_style,
+                    self.normal_style,
                 )
             )
 
         story.append(Spacer(1, 0.3 * inch))
 
         # Footer
-        footer_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-        footer_style = ParagraphStyle(
-            "Footer", parent=styles["Normal"], fontSize=8, textColor=colors.grey
-        )
+        generated_at = generated_at or datetime.now()
+        footer_text = f"Generated on {generated_at.strftime('%B %d, %Y at %I:%M %p')}"
         story.append(Spacer(1, 0.5 * inch))
-        story.append(Paragraph(footer_text, footer_style))
-        story.append(
-            Paragraph(
-                "RelayPACS - Secure DICOM Ingestion System",
-                footer_style,
-            )
-        )
+        story.append(Paragraph(footer_text, self.footer_style))
+        story.append(Paragraph("RelayPACS - Secure DICOM Ingestion System", self.footer_style))
 
         # Build PDF
-        doc.build(story)
+        doc.build(story, canvasmaker=BinaryStreamCanvas)
 
         # Get PDF bytes
         pdf_bytes = buffer.getvalue()
@@ -125,6 +147,21 @@ class PDFReportGenerator:
 
         return pdf_bytes
 
+    def generate_report_pdfs(self, reports: Iterable[Report]) -> list[bytes]:
+        """
+        Render many reports into separate PDFs in one call, e.g. for archive exports.
+
+        All PDFs share one generation timestamp and the prebuilt styles.
+
+        Args:
+            reports: Reports to render
+
+        Returns:
+            PDF file contents, in the same order as reports
+        """
+        generated_at = datetime.now()
+        return [self.generate_report_pdf(report, generated_at) for report in reports]
+
     def save_report_pdf(self, report_id: UUID, output_path: Optional[Path] = None) -> Path:
         """
         Generate and save PDF report to file.
@@ -156,6 +193,39 @@ class PDFReportGenerator:
 
         return output_path
 
+    def save_report_pdfs(
+        self, report_ids: list[UUID], output_dir: Path | None = None
+    ) -> list[Path]:
+        """
+        Generate and save PDFs for many reports in one call.
+
+        Args:
+            report_ids: Report IDs to generate PDFs for
+            output_dir: Optional directory to save into. Defaults to data/reports
+
+        Returns:
+            Paths to saved PDF files, named <report_id>.pdf
+
+        Raises:
+            ValueError: If any report is not found
+        """
+        reports = reports_db.get_reports_by_ids(report_ids)
+        missing = set(report_ids) - {report.id for report in reports}
+        if missing:
+            raise ValueError(f"Reports not found: {', '.join(str(m) for m in sorted(missing))}")
+
+        output_dir = output_dir or Path("data/reports")
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        paths = []
+        for report, pdf_bytes in zip(reports, self.generate_report_pdfs(reports), strict=True):
+            output_path = output_dir / f"{report.id}.pdf"
+            with open(output_path, "wb") as f:
+                f.write(pdf_bytes)
+            paths.append(output_path)
+
+        return paths
+
 
 # Singleton instance
 pdf_generator = PDFReportGenerator()
@@ -1,16 +1,23 @@
 """API router for report management endpoints."""
 
-from typing import Any, Optional
+import os
+from collections.abc import Iterator
+from typing import Any, BinaryIO, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
 from app.auth.dependencies import get_current_user
 from app.database.reports_db import reports_db
 from app.models.report import Report, ReportListResponse, ReportStatus
+from app.reports.pdf_cache import etag_matches, pdf_cache, report_version
 
 router = APIRouter()
 
+# Read size when streaming a cached PDF
+PDF_STREAM_BLOCK_BYTES = 64 * 1024
+
 
 @router.get("/", response_model=ReportListResponse)
 async def list_reports(
@@ -90,12 +97,15 @@ async def get_report_by_upload(
 @router.get("/{report_id}/download")
 async def download_report(
     report_id: UUID,
+    request: Request,
     user: dict[str, Any] = Depends(get_current_user),
 ):
     """
     Download report as PDF.
 
-    Returns PDF file with appropriate headers for download.
+    Returns PDF file with appropriate headers for download. Rendered PDFs are
+    cached per report version; the version is sent as an ETag so clients can
+    revalidate with If-None-Match and receive 304 Not Modified.
     """
     report = reports_db.get_report_by_id(report_id)
 
@@ -113,22 +123,31 @@ async def download_report(
             detail=f"Report PDF not yet available. Status: {report.status.value}",
         )
 
-    # Generate PDF using PDF service
-    try:
-        from app.reports.pdf_service import pdf_generator
+    etag = f'"{report_version(report)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-        pdf_bytes = pdf_generator.generate_report_pdf(report)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="report_{report_id}.pdf"'},
-        )
+    # Serve from the PDF cache, rendering off the event loop on a miss. The file is
+    # opened up front so a concurrent eviction can't pull it from under the response.
+    try:
+        pdf_file = await pdf_cache.open_pdf(report)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate PDF: {e!s}",
-        )
+        ) from e
+
+    headers["Content-Length"] = str(os.fstat(pdf_file.fileno()).st_size)
+    headers["Content-Disposition"] = f'attachment; filename="report_{report_id}.pdf"'
+    return StreamingResponse(_read_file(pdf_file), media_type="application/pdf", headers=headers)
+
+
+def _read_file(pdf_file: BinaryIO) -> Iterator[bytes]:
+    with pdf_file:
+        while block := pdf_file.read(PDF_STREAM_BLOCK_BYTES):
+            yield block
 
 
 @router.post("/{report_id}/sync", response_model=Report)
@@ -0,0 +1,198 @@
+"""
+Disk admission control for new uploads.
+
+Each upload session reserves the local disk space it will need once all of
+its bytes have arrived (chunks kept on disk plus merged copies, see
+``BaseStorageService.disk_bytes``). A new session is admitted only if the
+disk's used bytes, the space still reserved by sessions in flight and its
+own reservation stay under ``max_usage`` of the disk; otherwise init is
+refused with InsufficientStorageError (503 + Retry-After). Reservations
+shrink as bytes land on disk, since statvfs counts those from then on.
+
+Reservations live in a SQLite table, so every worker process on the host
+admits uploads against the same total; the check and the insert run in one
+write transaction. Bytes written are tallied in memory per chunk and
+written to the table at most every ``CONSUME_FLUSH_SECONDS`` (and before
+each admission check), off the event loop.
+"""
+
+import asyncio
+import shutil
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from app.exceptions import InsufficientStorageError
+
+try:
+    from prometheus_client import Gauge
+except ImportError:
+    Gauge = None  # type: ignore[misc, assignment]
+
+# Longest a worker holds consumed bytes before writing them to the shared table
+CONSUME_FLUSH_SECONDS = 1.0
+
+# Registered once per process; bound to the singleton by export_metrics
+_GAUGES = None
+if Gauge is not None:
+    _GAUGES = {
+        name: Gauge(f"relaypacs_storage_{name}_bytes", description)
+        for name, description in [
+            ("reserved", "Disk space reserved by uploads in flight"),
+            ("used", "Used space on the storage disk"),
+            ("free", "Free space on the storage disk"),
+        ]
+    }
+
+
+def disk_usage(path: Path) -> Any:
+    """shutil.disk_usage of path, or of its nearest existing parent."""
+    for candidate in (path, *path.absolute().parents):
+        if candidate.exists():
+            return shutil.disk_usage(candidate)
+    return shutil.disk_usage(".")
+
+
+class DiskCapacity:
+    """Tracks per-upload disk reservations against the disk holding path."""
+
+    def __init__(
+        self, path: Path, max_usage: float, db_path: Path | str = "data/capacity.db"
+    ) -> None:
+        self.path = path
+        self.max_usage = max_usage
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.rejected = 0  # By this process
+        # Bytes written per upload since the last flush, guarded by _lock
+        self._consumed: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front: reads in the transaction
+        # see every other worker's committed reservations and nothing changes
+        # them until this one commits
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS disk_reservations (
+                    upload_id TEXT PRIMARY KEY,
+                    bytes INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+
+    @staticmethod
+    def _sum(conn: sqlite3.Connection) -> int:
+        return int(
+            conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM disk_reservations").fetchone()[0]
+        )
+
+    def _flush(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            consumed, self._consumed = self._consumed, {}
+            self._flushed_at = time.monotonic()
+        conn.executemany(
+            "UPDATE disk_reservations SET bytes = MAX(0, bytes - ?) WHERE upload_id = ?",
+            [(nbytes, upload_id) for upload_id, nbytes in consumed.items()],
+        )
+
+    def flush(self) -> None:
+        """Write the bytes consumed since the last flush to the shared table."""
+        with self._connect() as conn:
+            self._flush(conn)
+
+    @property
+    def reserved_bytes(self) -> int:
+        with self._connect() as conn:
+            self._flush(conn)
+            return self._sum(conn)
+
+    def reserve(self, upload_id: str, nbytes: int) -> None:
+        """
+        Reserve nbytes for an upload.
+
+        Raises:
+            InsufficientStorageError: If the disk would go over max_usage
+        """
+        with self._transaction() as conn:
+            self._flush(conn)
+            usage = disk_usage(self.path)
+            reserved = self._sum(conn)
+            if usage.used + reserved + nbytes > usage.total * self.max_usage:
+                self.rejected += 1
+                raise InsufficientStorageError(
+                    f"Upload needs {nbytes} bytes; {usage.free} free, "
+                    f"{reserved} reserved by uploads in flight"
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO disk_reservations (upload_id, bytes) VALUES (?, ?)",
+                (upload_id, nbytes),
+            )
+
+    async def consume(self, upload_id: str, nbytes: int) -> None:
+        """Shrink an upload's reservation by bytes it has now written to disk."""
+        with self._lock:
+            self._consumed[upload_id] = self._consumed.get(upload_id, 0) + nbytes
+            due = time.monotonic() - self._flushed_at >= CONSUME_FLUSH_SECONDS
+        if due:
+            await asyncio.to_thread(self.flush)
+
+    def release(self, upload_id: str) -> None:
+        """Drop an upload's reservation once it completes or is cleaned up."""
+        with self._lock:
+            self._consumed.pop(upload_id, None)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM disk_reservations WHERE upload_id = ?", (upload_id,))
+
+    def upload_ids(self) -> list[str]:
+        """Uploads holding a reservation, in any process."""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT upload_id FROM disk_reservations")]
+
+    def stats(self) -> dict[str, int]:
+        usage = disk_usage(self.path)
+        with self._connect() as conn:
+            self._flush(conn)
+            sessions, reserved = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM disk_reservations"
+            ).fetchone()
+        return {
+            "sessions": sessions,
+            "reserved": reserved,
+            "used": usage.used,
+            "free": usage.free,
+            "total": usage.total,
+            "rejected": self.rejected,
+        }
+
+    def export_metrics(self) -> None:
+        """Report this instance's reserved/used/free bytes as Prometheus gauges."""
+        if _GAUGES is None:
+            return
+        _GAUGES["reserved"].set_function(lambda: self.reserved_bytes)
+        _GAUGES["used"].set_function(lambda: disk_usage(self.path).used)
+        _GAUGES["free"].set_function(lambda: disk_usage(self.path).free)
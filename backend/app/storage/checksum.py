@@ -0,0 +1,106 @@
+"""
+Chunk integrity checksums.
+
+Each upload session uses one algorithm, negotiated at init from what the
+client can compute and what is installed here. Every chunk is hashed once
+as it is received and the hex digest is kept on the session; merging
+trusts it (the write itself is size-verified) and only re-reads and
+re-hashes the chunks when ``upload_verify_on_merge`` is set.
+"""
+
+import hashlib
+import zlib
+from collections.abc import Callable
+from typing import Any, Protocol
+
+from app.config import get_settings
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None  # type: ignore[assignment]
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None  # type: ignore[assignment]
+
+settings = get_settings()
+
+
+class Hasher(Protocol):
+    def update(self, data: bytes, /) -> Any: ...
+
+    def hexdigest(self) -> str: ...
+
+
+class _CRC32:
+    """hashlib-style wrapper around zlib.crc32 (one of the checksums S3 accepts)."""
+
+    def __init__(self) -> None:
+        self._value = 0
+
+    def update(self, data: bytes, /) -> None:
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self) -> str:
+        return f"{self._value:08x}"
+
+
+def _available() -> dict[str, Callable[[], Hasher]]:
+    """Installed algorithms, fastest first (see scripts/benchmark_checksum.py)."""
+    algorithms: dict[str, Callable[[], Hasher]] = {}
+    if xxhash is not None:
+        algorithms["xxh128"] = xxhash.xxh3_128
+        algorithms["xxh3"] = xxhash.xxh3_64
+    if blake3 is not None:
+        algorithms["blake3"] = blake3.blake3
+    algorithms["crc32"] = _CRC32
+    algorithms["md5"] = hashlib.md5
+    algorithms["sha256"] = hashlib.sha256
+    return algorithms
+
+
+_ALGORITHMS = _available()
+
+
+def supported_checksums() -> list[str]:
+    """Checksum algorithms accepted for chunk integrity, preferred first."""
+    return list(_ALGORITHMS)
+
+
+def default_checksum() -> str:
+    """The configured algorithm, or the fastest installed one if it isn't available."""
+    configured = settings.upload_checksum_algorithm
+    return configured if configured in _ALGORITHMS else next(iter(_ALGORITHMS))
+
+
+def negotiate_checksum(client_algorithms: list[str]) -> str | None:
+    """
+    Pick a session's algorithm: the client's first supported choice, or the
+    default when the client states no preference. None means there is no
+    algorithm in common.
+    """
+    if not client_algorithms:
+        return default_checksum()
+    return next((name for name in client_algorithms if name in _ALGORITHMS), None)
+
+
+def new_hasher(algorithm: str) -> Hasher:
+    """
+    Start an incremental hash.
+
+    Raises:
+        ValueError: If the algorithm is not supported
+    """
+    try:
+        return _ALGORITHMS[algorithm]()
+    except KeyError:
+        raise ValueError(f"Unsupported checksum algorithm: {algorithm}") from None
+
+
+def chunk_checksum(algorithm: str, data: bytes) -> str:
+    """Hex digest of data."""
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
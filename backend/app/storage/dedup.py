@@ -0,0 +1,241 @@
+"""
+Content-addressed chunk index and forwarded-instance ledger.
+
+Chunk data is stored once per SHA-256 digest ("blob") and linked into every
+upload that contains it. ``blob_refs`` records which upload chunk points at
+which blob. When the last upload referencing a blob is cleaned up the blob is
+kept for a grace period (``dedup_blob_grace_hours``), so a study re-sent soon
+after it completed is still deduplicated; it is deleted once the grace runs
+out without a new reference. The pre-flight digest check only matches blobs
+one of the user's uploads still references. ``forwarded_instances`` remembers
+which (SOPInstanceUID, file digest) pairs each PACS has already accepted, so
+re-sent studies are not forwarded twice.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Digests per IN (...) query, below SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+class DedupIndex:
+    """SQLite-backed blob reference counts and PACS forwarding ledger."""
+
+    def __init__(
+        self,
+        db_path: Path | str = "data/dedup.db",
+        forward_window_days: int = 30,
+        blob_grace_hours: float = 24.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.forward_window_days = forward_window_days
+        self.blob_grace_hours = blob_grace_hours
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    checksum_algorithm TEXT NOT NULL,
+                    checksum TEXT NOT NULL,
+                    refs INTEGER NOT NULL,
+                    released_at TEXT
+                ) WITHOUT ROWID
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(blobs)")}
+            if "released_at" not in columns:
+                conn.execute("ALTER TABLE blobs ADD COLUMN released_at TEXT")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blob_refs (
+                    upload_id TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (upload_id, file_id, chunk_index)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_blob_refs_user_digest ON blob_refs (user_id, digest)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS forwarded_instances (
+                    pacs TEXT NOT NULL,
+                    sop_instance_uid TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    forwarded_at TEXT NOT NULL,
+                    PRIMARY KEY (pacs, sop_instance_uid, digest)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def lookup(self, digest: str) -> tuple[int, str, str] | None:
+        """
+        (size, checksum algorithm, checksum) of a stored blob, or None if it is not stored.
+
+        The checksum is the one recorded when the blob was first received.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, checksum_algorithm, checksum FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+        return (row[0], row[1], row[2]) if row else None
+
+    def lookup_for_user(
+        self, user_id: str, digests: Iterable[str]
+    ) -> dict[str, tuple[int, str, str]]:
+        """
+        Blobs among digests that one of user_id's uploads currently references,
+        as digest -> (size, checksum algorithm, checksum).
+
+        Scoped to the user so the pre-flight check can't be used to probe
+        whether some other site's data is on the server.
+        """
+        found: dict[str, tuple[int, str, str]] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._connect() as conn:
+            for start in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[start : start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"""
+                    SELECT DISTINCT b.digest, b.size, b.checksum_algorithm, b.checksum
+                    FROM blob_refs r JOIN blobs b ON b.digest = r.digest
+                    WHERE r.user_id = ? AND r.digest IN ({placeholders})
+                    """,
+                    [user_id, *batch],
+                ).fetchall()
+                found.update({row[0]: (row[1], row[2], row[3]) for row in rows})
+        return found
+
+    def add_ref(  # noqa: PLR0913
+        self,
+        upload_id: str,
+        file_id: str,
+        chunk_index: int,
+        user_id: str,
+        digest: str,
+        size: int,
+        checksum_algorithm: str,
+        checksum: str,
+    ) -> None:
+        """Point an upload chunk at a blob, creating the blob entry if needed."""
+        with self._lock, self._connect() as conn:
+            previous = conn.execute(
+                "SELECT digest FROM blob_refs "
+                "WHERE upload_id = ? AND file_id = ? AND chunk_index = ?",
+                (upload_id, file_id, chunk_index),
+            ).fetchone()
+            if previous and previous[0] == digest:
+                return
+            if previous:
+                conn.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ?", (previous[0],))
+
+            conn.execute(
+                "INSERT OR REPLACE INTO blob_refs "
+                "(upload_id, file_id, chunk_index, user_id, digest) VALUES (?, ?, ?, ?, ?)",
+                (upload_id, file_id, chunk_index, user_id, digest),
+            )
+            conn.execute(
+                "INSERT INTO blobs (digest, size, checksum_algorithm, checksum, refs) "
+                "VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (digest) DO UPDATE SET refs = refs + 1, released_at = NULL",
+                (digest, size, checksum_algorithm, checksum),
+            )
+
+    def release_upload(self, upload_id: str) -> list[str]:
+        """
+        Drop every reference held by an upload.
+
+        Blobs left without references start their grace period. Returns the
+        digests whose grace has run out (see expire_blobs).
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE blobs SET refs = refs - (
+                    SELECT COUNT(*) FROM blob_refs r
+                    WHERE r.upload_id = ? AND r.digest = blobs.digest
+                )
+                WHERE digest IN (SELECT digest FROM blob_refs WHERE upload_id = ?)
+                """,
+                (upload_id, upload_id),
+            )
+            conn.execute("DELETE FROM blob_refs WHERE upload_id = ?", (upload_id,))
+            conn.execute(
+                "UPDATE blobs SET released_at = ? WHERE refs <= 0 AND released_at IS NULL",
+                (datetime.now(UTC).isoformat(),),
+            )
+        return self.expire_blobs()
+
+    def expire_blobs(self) -> list[str]:
+        """
+        Forget blobs unreferenced for longer than the grace period.
+
+        Returns their digests; the caller deletes the stored data.
+        """
+        cutoff = (datetime.now(UTC) - timedelta(hours=self.blob_grace_hours)).isoformat()
+        with self._lock, self._connect() as conn:
+            expired = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT digest FROM blobs WHERE refs <= 0 AND released_at <= ?", (cutoff,)
+                )
+            ]
+            conn.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in expired])
+        return expired
+
+    def already_forwarded(
+        self, pacs: str, instances: Iterable[tuple[str, str]]
+    ) -> set[tuple[str, str]]:
+        """(SOPInstanceUID, digest) pairs forwarded to pacs within the forward window."""
+        cutoff = (datetime.now(UTC) - timedelta(days=self.forward_window_days)).isoformat()
+        with self._connect() as conn:
+            return {
+                (uid, digest)
+                for uid, digest in instances
+                if conn.execute(
+                    "SELECT 1 FROM forwarded_instances WHERE pacs = ? AND sop_instance_uid = ? "
+                    "AND digest = ? AND forwarded_at >= ?",
+                    (pacs, uid, digest, cutoff),
+                ).fetchone()
+            }
+
+    def mark_forwarded(self, pacs: str, instances: Iterable[tuple[str, str]]) -> None:
+        """Record instances accepted by pacs and forget entries older than the window."""
+        now = datetime.now(UTC)
+        cutoff = (now - timedelta(days=self.forward_window_days)).isoformat()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO forwarded_instances "
+                "(pacs, sop_instance_uid, digest, forwarded_at) VALUES (?, ?, ?, ?)",
+                [(pacs, uid, digest, now.isoformat()) for uid, digest in instances],
+            )
+            conn.execute("DELETE FROM forwarded_instances WHERE forwarded_at < ?", (cutoff,))
+
+
+# Singleton instance
+dedup_index = DedupIndex(
+    settings.dedup_db_path, settings.forward_dedup_window_days, settings.dedup_blob_grace_hours
+)
@@ -0,0 +1,176 @@
+"""
+Bounded worker pool for local chunk and file writes.
+
+Blocking open/write/fsync calls run on dedicated threads (file I/O releases
+the GIL), so a slow disk delays the writes that hit it instead of the whole
+event loop. At most ``max_pending`` chunk writes may be queued or running;
+beyond that they fail fast with DiskWriterBusyError, which the upload API
+turns into 503 + Retry-After so clients back off and resend.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, TypeVar
+
+from app.config import get_settings
+from app.exceptions import DiskWriterBusyError
+
+try:
+    from prometheus_client import Gauge, Histogram
+except ImportError:
+    Gauge = None  # type: ignore[misc, assignment]
+    Histogram = None  # type: ignore[misc, assignment]
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Module level because tests build extra DiskWriters and prometheus_client refuses
+# a duplicate name; the series are labelled by device, whichever writer wrote
+_WRITE_LATENCY = None
+if Histogram is not None:
+    _WRITE_LATENCY = Histogram(
+        "relaypacs_disk_write_seconds", "Local storage write time by device", ["device"]
+    )
+
+
+def device_of(path: Path) -> str:
+    """'major:minor' of the device holding path (or its nearest existing parent)."""
+    for candidate in (path, *path.parents):
+        try:
+            st_dev = os.stat(candidate).st_dev
+        except FileNotFoundError:
+            continue
+        return f"{os.major(st_dev)}:{os.minor(st_dev)}"
+    return "unknown"
+
+
+class DiskWriter:
+    """
+    Runs blocking storage writes on a thread pool and applies the fsync policy.
+
+    fsync_policy is "none" (leave it to the OS), "chunk" (every chunk is on
+    disk before it is acknowledged) or "file" (only merged files are synced).
+    Write time is tracked per device, in-process (see ``stats``) and in
+    Prometheus when prometheus_client is installed.
+    """
+
+    def __init__(self, workers: int, max_pending: int, fsync_policy: str = "none") -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.fsync_policy = fsync_policy
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disk-write")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        # device -> {"writes", "seconds_total", "seconds_max"}
+        self._devices: dict[str, dict[str, float]] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        """Writes waiting for a free worker."""
+        return self._pending - self._running
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of pool and per-device write metrics."""
+        with self._lock:
+            devices = {device: dict(entry) for device, entry in self._devices.items()}
+        return {
+            "workers": self.workers,
+            "queued": self.queue_depth,
+            "running": self._running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "devices": devices,
+        }
+
+    def _observe(self, device: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._devices.setdefault(
+                device, {"writes": 0, "seconds_total": 0.0, "seconds_max": 0.0}
+            )
+            entry["writes"] += 1
+            entry["seconds_total"] += seconds
+            entry["seconds_max"] = max(entry["seconds_max"], seconds)
+        if _WRITE_LATENCY is not None:
+            _WRITE_LATENCY.labels(device=device).observe(seconds)
+
+    async def run(self, func: Callable[..., T], path: Path, *args: Any, shed: bool = True) -> T:
+        """
+        Run func(path, *args) on the pool, timed against path's device.
+
+        With shed=False the write is queued even when max_pending is reached;
+        merges use it since their upload was already accepted.
+
+        Raises:
+            DiskWriterBusyError: If shed and max_pending writes are pending
+        """
+        with self._lock:
+            if shed and self._pending >= self.max_pending:
+                self.rejected += 1
+                raise DiskWriterBusyError(f"{self._pending} disk writes pending")
+            self._pending += 1
+
+        def timed() -> T:
+            with self._lock:
+                self._running += 1
+            start = time.perf_counter()
+            try:
+                return func(path, *args)
+            finally:
+                self._observe(device_of(path), time.perf_counter() - start)
+                with self._lock:
+                    self._running -= 1
+
+        def release(future: Future[T]) -> None:
+            # Runs on completion and on cancellation before a worker picked it up
+            with self._lock:
+                self._pending -= 1
+                if not future.cancelled():
+                    self.completed += 1
+
+        future = self._executor.submit(timed)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def chunk_written(self, f: IO[bytes] | int) -> None:
+        """Call after writing a chunk (on the worker): fsyncs under the "chunk" policy."""
+        if self.fsync_policy == "chunk":
+            _fsync(f)
+
+    def file_written(self, f: IO[bytes] | int) -> None:
+        """Call after finishing a merged file (on the worker): fsyncs unless policy is "none"."""
+        if self.fsync_policy != "none":
+            _fsync(f)
+
+    def shutdown(self) -> None:
+        """Finish queued writes and stop the pool."""
+        self._executor.shutdown(wait=True)
+
+
+def _fsync(f: IO[bytes] | int) -> None:
+    if isinstance(f, int):
+        os.fsync(f)
+    else:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Singleton instance
+disk_writer = DiskWriter(
+    workers=settings.disk_write_workers,
+    max_pending=settings.disk_write_max_pending,
+    fsync_policy=settings.disk_fsync_policy,
+)
+
+if Gauge is not None:
+    Gauge(
+        "relaypacs_disk_write_queue_depth", "Local storage writes waiting for a worker"
+    ).set_function(lambda: disk_writer.queue_depth)
@@ -1,17 +1,63 @@
-import hashlib
+import asyncio
+import logging
+import os
 import shutil
+import struct
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any
 
 import boto3
 from botocore.exceptions import ClientError
 
 from app.config import get_settings
-from app.exceptions import ChunkUploadError
+from app.exceptions import (
+    ChecksumMismatchError,
+    ChunkUploadError,
+    PayloadTooLargeError,
+    SpoolFullError,
+)
+from app.storage.capacity import DiskCapacity
+from app.storage.checksum import chunk_checksum, new_hasher
+from app.storage.dedup import dedup_index
+from app.storage.disk_writer import disk_writer
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Read size when copying chunks into a merged file
+MERGE_BUFFER_BYTES = 1024 * 1024
+# Most keys a single S3 DeleteObjects request accepts
+S3_DELETE_BATCH = 1000
+
+
+def _check_chunk(chunk_index: int, expected: str, actual: str) -> None:
+    if actual != expected:
+        raise ChecksumMismatchError(
+            f"Chunk {chunk_index} checksum mismatch! "
+            f"Expected: {expected}, Got: {actual}. "
+            f"File may be corrupted."
+        )
 
 
 class BaseStorageService:
+    # Whether chunk data goes through the shared blob store (and cross-upload dedup)
+    content_addressed = True
+    # Whether chunks are kept on this host's disk, and how many merged copies are
+    # written there until the upload is cleaned up (see disk_bytes)
+    chunks_on_disk = True
+    merge_copies = 1
+
+    @property
+    def disk_path(self) -> Path:
+        """Directory on the disk that holds this backend's local files."""
+        return Path(".")
+
+    def disk_bytes(self, size_bytes: int) -> int:
+        """Local disk space an upload of size_bytes takes until it is cleaned up."""
+        return size_bytes * (int(self.chunks_on_disk) + self.merge_copies)
+
     async def save_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, chunk_data: bytes
     ) -> str:
@@ -23,6 +69,7 @@ class BaseStorageService:
         file_id: str,
         total_chunks: int,
         checksums: dict[int, str] | None = None,
+        checksum_algorithm: str = "md5",
     ) -> Path | str:
         """
         Merge chunks into final file.
@@ -31,19 +78,35 @@ class BaseStorageService:
             upload_id: Upload session ID
             file_id: File identifier
             total_chunks: Total number of chunks
-            checksums: Optional dict mapping chunk_index to expected MD5 checksum
+            checksums: Optional dict mapping chunk_index to the checksum recorded at
+                ingest; chunks listed here are re-hashed while merging
+            checksum_algorithm: Algorithm the checksums were computed with
 
         Raises:
-            ChunkUploadError: If checksum validation fails
+            ChecksumMismatchError: If checksum validation fails
         """
         raise NotImplementedError()
 
     async def cleanup_upload(self, upload_id: str) -> None:
         raise NotImplementedError()
 
+    async def list_uploads(self) -> set[str]:
+        """IDs of uploads that have data in storage (to find data no session owns)."""
+        return set()
+
     async def chunk_exists(self, upload_id: str, file_id: str, chunk_index: int) -> bool:
         raise NotImplementedError()
 
+    async def discard_chunk(self, upload_id: str, file_id: str, chunk_index: int) -> None:
+        """Forget a chunk that failed verification so it is written again."""
+        raise NotImplementedError()
+
+    async def reserve_file(
+        self, upload_id: str, file_id: str, total_chunks: int, size_bytes: int | None = None
+    ) -> None:
+        """Hint a file's final size before its chunks arrive. Optional."""
+        return None
+
     async def verify_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, expected_size: int
     ) -> bool:
@@ -55,26 +118,122 @@ class BaseStorageService:
         """
         raise NotImplementedError()
 
+    async def blob_exists(self, digest: str) -> bool:
+        raise NotImplementedError()
+
+    async def save_blob(self, digest: str, data: bytes) -> None:
+        """Store chunk data once under its SHA-256 digest."""
+        raise NotImplementedError()
+
+    async def link_blob(self, digest: str, upload_id: str, file_id: str, chunk_index: int) -> None:
+        """Make a stored blob available as a chunk of an upload without copying it in again."""
+        raise NotImplementedError()
+
+    async def delete_blob(self, digest: str) -> None:
+        raise NotImplementedError()
+
+    async def local_copy(self, upload_id: str, file_id: str, path: Path | str) -> Path | str:
+        """Return a local path holding a merged file, fetching it back if it left this host."""
+        return path
+
+    async def close(self) -> None:
+        """Stop background work on shutdown."""
+        return None
+
+    async def release_blobs(self, upload_id: str) -> int:
+        """
+        Drop an upload's blob references and delete blobs unreferenced past their grace period.
+
+        Returns the number of blobs deleted.
+        """
+        return await self._delete_blobs(
+            await asyncio.to_thread(dedup_index.release_upload, upload_id)
+        )
+
+    async def expire_blobs(self) -> int:
+        """Delete blobs unreferenced past their grace period. Returns how many were deleted."""
+        return await self._delete_blobs(await asyncio.to_thread(dedup_index.expire_blobs))
+
+    async def _delete_blobs(self, digests: list[str]) -> int:
+        for digest in digests:
+            await self.delete_blob(digest)
+        return len(digests)
+
 
 class LocalStorageService(BaseStorageService):
     def __init__(self) -> None:
         self.base_path = Path("temp_uploads")
         self.base_path.mkdir(exist_ok=True)
 
+    @property
+    def disk_path(self) -> Path:
+        return self.base_path
+
     async def save_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, chunk_data: bytes
     ) -> str:
         file_dir = self.base_path / str(upload_id) / str(file_id)
         file_dir.mkdir(parents=True, exist_ok=True)
         chunk_path = file_dir / f"{chunk_index}.part"
-        with open(chunk_path, "wb") as f:
-            f.write(chunk_data)
+        await disk_writer.run(self._write_chunk_file, chunk_path, chunk_data)
         return str(chunk_path)
 
+    @staticmethod
+    def _write_chunk_file(path: Path, data: bytes) -> None:
+        # Never write through a hard link into a shared blob
+        path.unlink(missing_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+            disk_writer.chunk_written(f)
+
     async def chunk_exists(self, upload_id: str, file_id: str, chunk_index: int) -> bool:
         chunk_path = self.base_path / str(upload_id) / str(file_id) / f"{chunk_index}.part"
         return chunk_path.exists()
 
+    async def discard_chunk(self, upload_id: str, file_id: str, chunk_index: int) -> None:
+        chunk_path = self.base_path / str(upload_id) / str(file_id) / f"{chunk_index}.part"
+        chunk_path.unlink(missing_ok=True)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.base_path / "blobs" / digest[:2] / digest
+
+    async def blob_exists(self, digest: str) -> bool:
+        return self._blob_path(digest).exists()
+
+    async def save_blob(self, digest: str, data: bytes) -> None:
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            return
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        await disk_writer.run(self._write_blob_file, blob_path, data)
+
+    @staticmethod
+    def _write_blob_file(path: Path, data: bytes) -> None:
+        # Write aside and rename so a blob is never visible half-written
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            disk_writer.chunk_written(f)
+        os.replace(temp_path, path)
+
+    async def link_blob(self, digest: str, upload_id: str, file_id: str, chunk_index: int) -> None:
+        file_dir = self.base_path / str(upload_id) / str(file_id)
+        file_dir.mkdir(parents=True, exist_ok=True)
+        chunk_path = file_dir / f"{chunk_index}.part"
+        await disk_writer.run(self._link_blob_file, chunk_path, self._blob_path(digest))
+
+    @staticmethod
+    def _link_blob_file(path: Path, blob_path: Path) -> None:
+        path.unlink(missing_ok=True)
+        try:
+            # A hard link shares the blob's bytes; removing the upload only drops the link
+            os.link(blob_path, path)
+        except OSError:
+            shutil.copyfile(blob_path, path)
+
+    async def delete_blob(self, digest: str) -> None:
+        self._blob_path(digest).unlink(missing_ok=True)
+
     async def verify_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, expected_size: int
     ) -> bool:
@@ -97,44 +256,226 @@ class LocalStorageService(BaseStorageService):
         file_id: str,
         total_chunks: int,
         checksums: dict[int, str] | None = None,
+        checksum_algorithm: str = "md5",
     ) -> Path:
         """Merge chunks with optional checksum validation."""
-        file_dir = self.base_path / str(upload_id) / str(file_id)
-        final_path = file_dir / "final_file"
+        final_path = self.base_path / str(upload_id) / str(file_id) / "final_file"
+        await disk_writer.run(
+            self._merge_chunk_files,
+            final_path,
+            total_chunks,
+            checksums,
+            checksum_algorithm,
+            shed=False,
+        )
+        return final_path
 
+    @staticmethod
+    def _merge_chunk_files(
+        final_path: Path,
+        total_chunks: int,
+        checksums: dict[int, str] | None,
+        checksum_algorithm: str,
+    ) -> None:
+        file_dir = final_path.parent
         with open(final_path, "wb") as outfile:
             for i in range(total_chunks):
                 chunk_path = file_dir / f"{i}.part"
                 if not chunk_path.exists():
-                    raise FileNotFoundError(f"Missing chunk {i} for file {file_id}")
+                    raise FileNotFoundError(f"Missing chunk {i} for file {file_dir.name}")
 
-                # Read chunk data
                 with open(chunk_path, "rb") as infile:
-                    chunk_data = infile.read()
-
-                # Validate checksum if provided
-                if checksums and i in checksums:
-                    actual_checksum = hashlib.md5(chunk_data).hexdigest()
-                    expected_checksum = checksums[i]
-                    if actual_checksum != expected_checksum:
-                        raise ChunkUploadError(
-                            f"Chunk {i} checksum mismatch! "
-                            f"Expected: {expected_checksum}, Got: {actual_checksum}. "
-                            f"File may be corrupted."
-                        )
-
-                # Write chunk to final file
-                outfile.write(chunk_data)
-
-        return final_path
+                    expected = checksums.get(i) if checksums else None
+                    if expected is None:
+                        shutil.copyfileobj(infile, outfile, MERGE_BUFFER_BYTES)
+                        continue
+
+                    # Hash while copying so the chunk is read only once
+                    hasher = new_hasher(checksum_algorithm)
+                    while block := infile.read(MERGE_BUFFER_BYTES):
+                        hasher.update(block)
+                        outfile.write(block)
+                    _check_chunk(i, expected, hasher.hexdigest())
+            disk_writer.file_written(outfile)
 
     async def cleanup_upload(self, upload_id: str) -> None:
         upload_dir = self.base_path / str(upload_id)
         if upload_dir.exists():
             shutil.rmtree(upload_dir)
+        await self.release_blobs(str(upload_id))
+
+    async def list_uploads(self) -> set[str]:
+        return {
+            path.name for path in self.base_path.iterdir() if path.is_dir() and path.name != "blobs"
+        }
+
+
+class PreallocatedStorageService(LocalStorageService):
+    """
+    Local storage that writes chunks straight into the final file.
+
+    Every chunk but a file's last is exactly chunk_size bytes, so chunk N is
+    written with pwrite at offset N * chunk_size. The file is preallocated
+    once its size is declared (see reserve_file). A sidecar index holds each
+    chunk's length (4 bytes per chunk, 0 while missing), so merging only
+    checks the index and trims the file, and there are no per-chunk files
+    to create or delete. Chunks skip the blob store in this mode: storing a
+    blob as well would write every byte twice.
+    """
+
+    content_addressed = False
+    merge_copies = 0  # Merging trims the file in place
+    INDEX_ENTRY = struct.Struct(">I")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunk_size = settings.chunk_size_mb * 1024 * 1024
+
+    def _file_paths(self, upload_id: str, file_id: str) -> tuple[Path, Path]:
+        file_dir = self.base_path / str(upload_id) / str(file_id)
+        return file_dir / "final_file", file_dir / "chunks.idx"
+
+    @staticmethod
+    def _pwrite(path: Path, data: bytes, offset: int) -> None:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view, offset = view[written:], offset + written
+            disk_writer.chunk_written(fd)
+        finally:
+            os.close(fd)
+
+    def _chunk_length(self, upload_id: str, file_id: str, chunk_index: int) -> int:
+        _, index_path = self._file_paths(upload_id, file_id)
+        try:
+            with open(index_path, "rb") as f:
+                f.seek(chunk_index * self.INDEX_ENTRY.size)
+                entry = f.read(self.INDEX_ENTRY.size)
+        except FileNotFoundError:
+            return 0
+        return self.INDEX_ENTRY.unpack(entry)[0] if len(entry) == self.INDEX_ENTRY.size else 0
+
+    def _set_chunk_length(self, upload_id: str, file_id: str, chunk_index: int, size: int) -> None:
+        _, index_path = self._file_paths(upload_id, file_id)
+        # One aligned entry per chunk: concurrent writers never share a byte
+        self._pwrite(index_path, self.INDEX_ENTRY.pack(size), chunk_index * self.INDEX_ENTRY.size)
+
+    async def reserve_file(
+        self, upload_id: str, file_id: str, total_chunks: int, size_bytes: int | None = None
+    ) -> None:
+        final_path, _ = self._file_paths(upload_id, file_id)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        await disk_writer.run(
+            self._allocate, final_path, size_bytes or total_chunks * self.chunk_size
+        )
+
+    @staticmethod
+    def _allocate(path: Path, size: int) -> None:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            pass  # No fallocate here: the file grows as chunks are written
+        finally:
+            os.close(fd)
+
+    async def save_chunk(
+        self, upload_id: str, file_id: str, chunk_index: int, chunk_data: bytes
+    ) -> str:
+        if len(chunk_data) > self.chunk_size:
+            raise PayloadTooLargeError(
+                f"Chunk {chunk_index} is {len(chunk_data)} bytes; chunk size is {self.chunk_size}"
+            )
+        final_path, _ = self._file_paths(upload_id, file_id)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        await disk_writer.run(self._write_in_place, final_path, upload_id, chunk_index, chunk_data)
+        return str(final_path)
+
+    def _write_in_place(
+        self, final_path: Path, upload_id: str, chunk_index: int, data: bytes
+    ) -> None:
+        self._pwrite(final_path, data, chunk_index * self.chunk_size)
+        # Only recorded once its data is written
+        self._set_chunk_length(upload_id, final_path.parent.name, chunk_index, len(data))
+
+    async def chunk_exists(self, upload_id: str, file_id: str, chunk_index: int) -> bool:
+        return self._chunk_length(upload_id, file_id, chunk_index) > 0
+
+    async def discard_chunk(self, upload_id: str, file_id: str, chunk_index: int) -> None:
+        if await self.chunk_exists(upload_id, file_id, chunk_index):
+            self._set_chunk_length(upload_id, file_id, chunk_index, 0)
+
+    async def verify_chunk(
+        self, upload_id: str, file_id: str, chunk_index: int, expected_size: int
+    ) -> bool:
+        final_path, _ = self._file_paths(upload_id, file_id)
+        return (
+            self._chunk_length(upload_id, file_id, chunk_index) == expected_size
+            and final_path.exists()
+            and final_path.stat().st_size >= chunk_index * self.chunk_size + expected_size
+        )
+
+    async def merge_chunks(
+        self,
+        upload_id: str,
+        file_id: str,
+        total_chunks: int,
+        checksums: dict[int, str] | None = None,
+        checksum_algorithm: str = "md5",
+    ) -> Path:
+        """Check every chunk was written, trim preallocated space and optionally re-hash."""
+        final_path, _ = self._file_paths(upload_id, file_id)
+        await disk_writer.run(
+            self._finish_file, final_path, total_chunks, checksums, checksum_algorithm, shed=False
+        )
+        return final_path
+
+    def _finish_file(
+        self,
+        final_path: Path,
+        total_chunks: int,
+        checksums: dict[int, str] | None,
+        checksum_algorithm: str,
+    ) -> None:
+        file_id = final_path.parent.name
+        with open(final_path.with_name("chunks.idx"), "rb") as f:
+            lengths = [entry[0] for entry in self.INDEX_ENTRY.iter_unpack(f.read())]
+        lengths += [0] * (total_chunks - len(lengths))
+
+        for i, length in enumerate(lengths[:total_chunks]):
+            if not length:
+                raise FileNotFoundError(f"Missing chunk {i} for file {file_id}")
+            if i < total_chunks - 1 and length != self.chunk_size:
+                raise ChunkUploadError(
+                    f"Chunk {i} is {length} bytes; only the last chunk may be shorter "
+                    f"than {self.chunk_size}"
+                )
+
+        with open(final_path, "r+b") as f:
+            f.truncate((total_chunks - 1) * self.chunk_size + lengths[total_chunks - 1])
+            for i, expected in sorted((checksums or {}).items()):
+                if i >= total_chunks:
+                    continue
+                f.seek(i * self.chunk_size)
+                hasher = new_hasher(checksum_algorithm)
+                remaining = lengths[i]
+                while remaining:
+                    block = f.read(min(remaining, MERGE_BUFFER_BYTES))
+                    hasher.update(block)
+                    remaining -= len(block)
+                _check_chunk(i, expected, hasher.hexdigest())
+            disk_writer.file_written(f)
 
 
 class S3StorageService(BaseStorageService):
+    # Chunks live in S3; only merged files are written locally, under temp_merge/.
+    # Chunks are put under their upload's key directly: a blob object plus a
+    # server-side copy would cost three requests and two stored copies per chunk.
+    content_addressed = False
+    chunks_on_disk = False
+
     def __init__(self) -> None:
         self.s3 = boto3.client(
             "s3",
@@ -145,20 +486,50 @@ class S3StorageService(BaseStorageService):
         )
         self.bucket = settings.s3_bucket
 
+    @property
+    def disk_path(self) -> Path:
+        return Path("temp_merge")
+
+    def _head(self, key: str) -> dict[str, Any] | None:
+        try:
+            return self.s3.head_object(Bucket=self.bucket, Key=key)  # type: ignore[no-any-return]
+        except ClientError:
+            return None
+
     async def save_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, chunk_data: bytes
     ) -> str:
         key = f"{upload_id}/{file_id}/chunks/{chunk_index}.part"
-        self.s3.put_object(Bucket=self.bucket, Key=key, Body=chunk_data)
+        await asyncio.to_thread(self.s3.put_object, Bucket=self.bucket, Key=key, Body=chunk_data)
         return f"s3://{self.bucket}/{key}"
 
     async def chunk_exists(self, upload_id: str, file_id: str, chunk_index: int) -> bool:
         key = f"{upload_id}/{file_id}/chunks/{chunk_index}.part"
-        try:
-            self.s3.head_object(Bucket=self.bucket, Key=key)
-            return True
-        except ClientError:
-            return False
+        return await asyncio.to_thread(self._head, key) is not None
+
+    async def discard_chunk(self, upload_id: str, file_id: str, chunk_index: int) -> None:
+        key = f"{upload_id}/{file_id}/chunks/{chunk_index}.part"
+        await asyncio.to_thread(self.s3.delete_object, Bucket=self.bucket, Key=key)
+
+    async def blob_exists(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._head, f"blobs/{digest}") is not None
+
+    async def save_blob(self, digest: str, data: bytes) -> None:
+        await asyncio.to_thread(
+            self.s3.put_object, Bucket=self.bucket, Key=f"blobs/{digest}", Body=data
+        )
+
+    async def link_blob(self, digest: str, upload_id: str, file_id: str, chunk_index: int) -> None:
+        # Server-side copy: the bytes are not sent to S3 again
+        await asyncio.to_thread(
+            self.s3.copy_object,
+            Bucket=self.bucket,
+            Key=f"{upload_id}/{file_id}/chunks/{chunk_index}.part",
+            CopySource={"Bucket": self.bucket, "Key": f"blobs/{digest}"},
+        )
+
+    async def delete_blob(self, digest: str) -> None:
+        await asyncio.to_thread(self.s3.delete_object, Bucket=self.bucket, Key=f"blobs/{digest}")
 
     async def verify_chunk(
         self, upload_id: str, file_id: str, chunk_index: int, expected_size: int
@@ -169,12 +540,8 @@ class S3StorageService(BaseStorageService):
         Uses HEAD request to check object metadata without downloading.
         """
         key = f"{upload_id}/{file_id}/chunks/{chunk_index}.part"
-        try:
-            response = self.s3.head_object(Bucket=self.bucket, Key=key)
-            actual_size = response["ContentLength"]
-            return bool(actual_size == expected_size)
-        except ClientError:
-            return False
+        response = await asyncio.to_thread(self._head, key)
+        return response is not None and bool(response["ContentLength"] == expected_size)
 
     async def merge_chunks(
         self,
@@ -182,6 +549,7 @@ class S3StorageService(BaseStorageService):
         file_id: str,
         total_chunks: int,
         checksums: dict[int, str] | None = None,
+        checksum_algorithm: str = "md5",
     ) -> str:
         # For simplicity in MVP, we might download chunks and merge locally,
         # or use S3 multipart upload with UploadPartCopy.
@@ -191,35 +559,308 @@ class S3StorageService(BaseStorageService):
         temp_dir = Path(f"temp_merge/{upload_id}/{file_id}")
         temp_dir.mkdir(parents=True, exist_ok=True)
         final_path = temp_dir / "final_file"
+        await asyncio.to_thread(
+            self._merge_chunk_objects,
+            upload_id,
+            file_id,
+            final_path,
+            total_chunks,
+            checksums,
+            checksum_algorithm,
+        )
+        return str(final_path)  # Return local path for validation
 
+    def _merge_chunk_objects(  # noqa: PLR0913
+        self,
+        upload_id: str,
+        file_id: str,
+        final_path: Path,
+        total_chunks: int,
+        checksums: dict[int, str] | None,
+        checksum_algorithm: str,
+    ) -> None:
         with open(final_path, "wb") as outfile:
             for i in range(total_chunks):
                 key = f"{upload_id}/{file_id}/chunks/{i}.part"
                 response = self.s3.get_object(Bucket=self.bucket, Key=key)
-                outfile.write(response["Body"].read())
+                chunk_data = response["Body"].read()
+                if checksums and i in checksums:
+                    _check_chunk(i, checksums[i], chunk_checksum(checksum_algorithm, chunk_data))
+                outfile.write(chunk_data)
 
         # Upload final file back to S3
         final_key = f"{upload_id}/{file_id}/final.dcm"
         self.s3.upload_file(str(final_path), self.bucket, final_key)
 
-        return str(final_path)  # Return local path for validation
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete every object under prefix and return how many there were.
+
+        Keys are listed a page at a time; each page (at most S3_DELETE_BATCH
+        keys) is deleted in one request while the next page is listed, with
+        up to s3_delete_concurrency deletes in flight.
+        """
+        slots = asyncio.Semaphore(settings.s3_delete_concurrency)
+
+        async def delete_batch(keys: list[dict[str, str]]) -> None:
+            async with slots:
+                response = await asyncio.to_thread(
+                    self.s3.delete_objects,
+                    Bucket=self.bucket,
+                    Delete={"Objects": keys, "Quiet": True},
+                )
+            for error in (response or {}).get("Errors", []):
+                logger.warning(f"Could not delete s3://{self.bucket}/{error.get('Key')}: {error}")
+
+        pages = iter(
+            self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix)
+        )
+        deletes = []
+        deleted = 0
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            for start in range(0, len(keys), S3_DELETE_BATCH):
+                batch = keys[start : start + S3_DELETE_BATCH]
+                deletes.append(asyncio.create_task(delete_batch(batch)))
+                deleted += len(batch)
+        await asyncio.gather(*deletes)
+        return deleted
+
+    async def list_uploads(self) -> set[str]:
+        pages = self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Delimiter="/")
+        prefixes = await asyncio.to_thread(
+            lambda: [p["Prefix"] for page in pages for p in page.get("CommonPrefixes", [])]
+        )
+        return {prefix.rstrip("/") for prefix in prefixes} - {"blobs"}
 
     async def cleanup_upload(self, upload_id: str) -> None:
-        # Delete objects with prefix
-        objects_to_delete = self.s3.list_objects(Bucket=self.bucket, Prefix=f"{upload_id}/")
-        if "Contents" in objects_to_delete:
-            delete_keys = [{"Key": obj["Key"]} for obj in objects_to_delete["Contents"]]
-            self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": delete_keys})
+        await self.delete_prefix(f"{upload_id}/")
 
         # Also cleanup local temp merge if it exists
         temp_dir = Path(f"temp_merge/{upload_id}")
         if temp_dir.exists():
             shutil.rmtree(temp_dir)
 
+        await self.release_blobs(str(upload_id))
+
+
+class TieredStorageService(BaseStorageService):
+    """
+    S3 storage with a local spool in front of it.
+
+    Chunks are written to a local backend (chosen by local_storage_mode), so
+    uploads never wait on S3. Each merged file is copied to S3 in the
+    background, at most spool_drain_workers at a time, and stays in the
+    spool as a read cache. When disk usage reaches spool_high_watermark,
+    drained files are evicted oldest first; if that can't bring usage under
+    the watermark, chunk writes fail with SpoolFullError until usage drops
+    below spool_low_watermark. Evicted files are fetched back by local_copy.
+    """
+
+    def __init__(
+        self, local: LocalStorageService | None = None, remote: S3StorageService | None = None
+    ) -> None:
+        if local is None:
+            if settings.local_storage_mode == "preallocated":
+                local = PreallocatedStorageService()
+            else:
+                local = LocalStorageService()
+            local.base_path = Path(settings.spool_path)
+            local.base_path.mkdir(parents=True, exist_ok=True)
+        self.local = local
+        self.remote = remote or S3StorageService()
+        self.content_addressed = local.content_addressed
+        self.chunks_on_disk = local.chunks_on_disk
+        self.merge_copies = local.merge_copies
+        self.high_watermark = settings.spool_high_watermark
+        self.low_watermark = settings.spool_low_watermark
+        self._drain_slots = asyncio.Semaphore(settings.spool_drain_workers)
+        self._drains: dict[tuple[str, str], asyncio.Task[None]] = {}
+        # Files already in S3, oldest first: the only ones eviction may delete
+        self._drained: OrderedDict[tuple[str, str], Path] = OrderedDict()
+        self._cancelled: set[str] = set()  # Uploads being cleaned up
+        self._reading: set[str] = set()  # Uploads whose files are being read
+        self._full = False
+        self.drained_count = 0
+        self.evicted_count = 0
+
+    @property
+    def disk_path(self) -> Path:
+        return self.local.base_path
+
+    def disk_usage(self) -> float:
+        """Fraction of the spool disk in use."""
+        usage = shutil.disk_usage(self.local.base_path)
+        return usage.used / usage.total
+
+    def stats(self) -> dict[str, float | int | bool]:
+        return {
+            "disk_usage": self.disk_usage(),
+            "full": self._full,
+            "draining": len(self._drains),
+            "drained": self.drained_count,
+            "evicted": self.evicted_count,
+        }
+
+    async def _evict(self, target: float) -> float:
+        """Delete drained files from the spool, oldest first, until usage is under target."""
+        usage = self.disk_usage()
+        while usage >= target and self._drained:
+            _, file_dir = self._drained.popitem(last=False)
+            await asyncio.to_thread(shutil.rmtree, file_dir, True)
+            self.evicted_count += 1
+            usage = self.disk_usage()
+        return usage
+
+    async def _make_room(self) -> None:
+        """
+        Raises:
+            SpoolFullError: If the spool is full and nothing more can be evicted yet
+        """
+        usage = self.disk_usage()
+        if usage >= self.high_watermark or self._full:
+            usage = await self._evict(self.low_watermark)
+        if usage >= self.high_watermark:
+            self._full = True
+        elif usage < self.low_watermark:
+            self._full = False
+        if self._full:
+            raise SpoolFullError(f"Spool disk is {usage:.0%} full, waiting for files to drain")
+
+    async def save_chunk(
+        self, upload_id: str, file_id: str, chunk_index: int, chunk_data: bytes
+    ) -> str:
+        await self._make_room()
+        return await self.local.save_chunk(upload_id, file_id, chunk_index, chunk_data)
+
+    async def save_blob(self, digest: str, data: bytes) -> None:
+        await self._make_room()
+        await self.local.save_blob(digest, data)
+
+    async def reserve_file(
+        self, upload_id: str, file_id: str, total_chunks: int, size_bytes: int | None = None
+    ) -> None:
+        await self._make_room()
+        await self.local.reserve_file(upload_id, file_id, total_chunks, size_bytes)
+
+    async def chunk_exists(self, upload_id: str, file_id: str, chunk_index: int) -> bool:
+        return await self.local.chunk_exists(upload_id, file_id, chunk_index)
+
+    async def discard_chunk(self, upload_id: str, file_id: str, chunk_index: int) -> None:
+        await self.local.discard_chunk(upload_id, file_id, chunk_index)
+
+    async def verify_chunk(
+        self, upload_id: str, file_id: str, chunk_index: int, expected_size: int
+    ) -> bool:
+        return await self.local.verify_chunk(upload_id, file_id, chunk_index, expected_size)
+
+    async def blob_exists(self, digest: str) -> bool:
+        return await self.local.blob_exists(digest)
+
+    async def link_blob(self, digest: str, upload_id: str, file_id: str, chunk_index: int) -> None:
+        await self.local.link_blob(digest, upload_id, file_id, chunk_index)
+
+    async def delete_blob(self, digest: str) -> None:
+        await self.local.delete_blob(digest)
+
+    async def merge_chunks(
+        self,
+        upload_id: str,
+        file_id: str,
+        total_chunks: int,
+        checksums: dict[int, str] | None = None,
+        checksum_algorithm: str = "md5",
+    ) -> Path:
+        final_path = await self.local.merge_chunks(
+            upload_id, file_id, total_chunks, checksums, checksum_algorithm
+        )
+        key = (upload_id, file_id)
+        if key not in self._drains:
+            # Merged again: the bytes may have changed, so the S3 copy is stale
+            self._drained.pop(key, None)
+            task = asyncio.create_task(self._drain(upload_id, file_id, final_path))
+            self._drains[key] = task
+            task.add_done_callback(lambda _: self._drains.pop(key, None))
+        return final_path
+
+    async def _drain(self, upload_id: str, file_id: str, final_path: Path) -> None:
+        async with self._drain_slots:
+            if upload_id in self._cancelled:
+                return
+            try:
+                await asyncio.to_thread(
+                    self.remote.s3.upload_file,
+                    str(final_path),
+                    self.remote.bucket,
+                    f"{upload_id}/{file_id}/final.dcm",
+                )
+            except Exception:
+                # Kept in the spool; it is still read from there
+                logger.exception(
+                    "Spool drain to S3 failed", extra={"upload_id": upload_id, "file_id": file_id}
+                )
+                return
+
+        self.drained_count += 1
+        if upload_id not in self._reading:
+            self._drained[(upload_id, file_id)] = final_path.parent
+        if self.disk_usage() >= self.high_watermark:
+            await self._evict(self.low_watermark)
+
+    async def local_copy(self, upload_id: str, file_id: str, path: Path | str) -> Path | str:
+        # Not evictable from here on: the caller is about to read it
+        self._reading.add(upload_id)
+        self._drained.pop((upload_id, file_id), None)
+        if not Path(path).exists():
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(
+                self.remote.s3.download_file,
+                self.remote.bucket,
+                f"{upload_id}/{file_id}/final.dcm",
+                str(path),
+            )
+        return path
+
+    async def cleanup_upload(self, upload_id: str) -> None:
+        # Drains not started yet are skipped; running ones finish before their objects
+        # are deleted, so nothing is left behind in the bucket
+        self._cancelled.add(upload_id)
+        try:
+            pending = [task for (uid, _), task in self._drains.items() if uid == upload_id]
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            self._cancelled.discard(upload_id)
+        for key in [key for key in self._drained if key[0] == upload_id]:
+            del self._drained[key]
+        self._reading.discard(upload_id)
+
+        await self.local.cleanup_upload(upload_id)
+        await self.remote.cleanup_upload(upload_id)
+
+    async def list_uploads(self) -> set[str]:
+        return await self.local.list_uploads() | await self.remote.list_uploads()
+
+    async def close(self) -> None:
+        """Cancel pending drains. Their files stay in the spool and are read from there."""
+        tasks = list(self._drains.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 
 # Factory-like singleton
 storage_service: BaseStorageService
-if settings.use_s3:
+if settings.use_s3 and settings.s3_local_spool:
+    storage_service = TieredStorageService()
+elif settings.use_s3:
     storage_service = S3StorageService()
+elif settings.local_storage_mode == "preallocated":
+    storage_service = PreallocatedStorageService()
 else:
     storage_service = LocalStorageService()
+
+# Admission control against the disk the chosen backend writes to
+disk_capacity = DiskCapacity(
+    storage_service.disk_path, settings.disk_admission_max_usage, settings.disk_admission_db_path
+)
+disk_capacity.export_metrics()
@@ -1,72 +1,153 @@
 """
-Recurring task for cleaning up orphaned/abandoned uploads.
+Background cleanup of expired and orphaned uploads.
 
-This module provides a scheduled job that runs daily to identify and remove
-incomplete upload sessions that have been inactive for more than 7 days.
-This prevents disk exhaustion from accumulating abandoned partial uploads.
+UploadReaper runs for the lifetime of the app. Every
+``upload_reaper_interval_seconds`` it takes up to ``upload_reaper_batch_size``
+expired sessions off the upload manager's expiry index (earliest first) and
+deletes their storage, carrying on without a pause while a backlog remains.
+Nothing is scanned, and none of it runs inside a request.
+
+The daily orphan sweep (``cleanup_orphaned_uploads``) catches what the
+reaper cannot see: sessions persisted by other processes that expired
+there, upload data in storage that no session owns at all, e.g. left
+behind by a crash between completion and cleanup, disk reservations
+of uploads that no longer exist, and deduplicated chunk blobs whose grace
+period ran out.
 """
 
-from datetime import UTC, datetime, timedelta
+import asyncio
 import logging
+from datetime import UTC, datetime
 
-from app.upload.service import upload_manager
-from app.storage.service import LocalStorageService, S3StorageService
 from app.config import get_settings
+from app.storage.service import BaseStorageService, disk_capacity, storage_service
+from app.upload.service import UploadManager, upload_manager
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-async def cleanup_orphaned_uploads():
+
+class UploadReaper:
+    """Removes expired upload sessions in small batches, off the request path."""
+
+    def __init__(
+        self,
+        storage: BaseStorageService,
+        manager: UploadManager,
+        batch_size: int = 50,
+        interval: float = 30.0,
+    ) -> None:
+        self.storage = storage
+        self.manager = manager
+        self.batch_size = batch_size
+        self.interval = interval
+        self.reaped = 0
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Start the reaper loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the reaper loop; sessions it didn't get to are reaped after restart."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                removed = await self.reap_expired()
+            except Exception as e:
+                logger.error(f"Upload reaper pass failed: {e}")
+                removed = 0
+            if removed < self.batch_size:
+                await asyncio.sleep(self.interval)
+            else:
+                await asyncio.sleep(0)  # More are waiting; let requests run in between
+
+    async def reap_expired(self) -> int:
+        """Remove one batch of expired sessions. Returns how many were removed."""
+        removed = await self.manager.cleanup_expired_sessions(self.storage, self.batch_size)
+        if removed:
+            self.reaped += removed
+            logger.info(f"Reaped {removed} expired upload sessions")
+        return removed
+
+    async def sweep_orphans(self) -> int:
+        """
+        Remove expired sessions persisted by other processes and storage no session owns.
+
+        Returns:
+            Number of uploads cleaned up
+        """
+        cleaned = 0
+        now = datetime.now(UTC)
+        for upload_id in self.manager.persisted_upload_ids():
+            if self.manager.get_session(upload_id) is not None:
+                continue  # Ours: the reaper handles it
+            try:
+                session = self.manager.read_persisted_session(upload_id)
+            except Exception as e:
+                logger.warning(f"Unreadable session file for upload {upload_id}: {e}")
+                continue
+            if session is None or session.expires_at >= now:
+                continue
+            if await self._cleanup(upload_id):
+                cleaned += 1
+
+        for upload_id in await self.storage.list_uploads():
+            if not self.manager.has_session(upload_id) and await self._cleanup(upload_id):
+                cleaned += 1
+
+        # Reservations of uploads that went away without releasing them
+        for upload_id in await asyncio.to_thread(disk_capacity.upload_ids):
+            if not self.manager.has_session(upload_id):
+                await asyncio.to_thread(disk_capacity.release, upload_id)
+
+        # Blobs released before a quiet spell: no later cleanup came by to expire them
+        expired = await self.storage.expire_blobs()
+        if expired:
+            logger.info(f"Deleted {expired} blobs unreferenced past their grace period")
+        return cleaned
+
+    async def _cleanup(self, upload_id: str) -> bool:
+        try:
+            await self.storage.cleanup_upload(upload_id)
+            self.manager.remove_session(upload_id)
+        except Exception as e:
+            logger.error(f"Failed to cleanup upload {upload_id}: {e}")
+            return False
+        logger.info(f"Cleaned up orphaned upload: {upload_id}")
+        return True
+
+
+# Singleton instance
+upload_reaper = UploadReaper(
+    storage_service,
+    upload_manager,
+    batch_size=settings.upload_reaper_batch_size,
+    interval=settings.upload_reaper_interval_seconds,
+)
+
+
+async def cleanup_orphaned_uploads() -> int:
     """
-    Remove incomplete uploads older than 7 days.
-    
-    This scheduled job scans all active sessions and removes those that:
-    1. Are not marked as complete
-    2. Have an expiry date older than 7 days ago (effectively created > 7 days + 1 hour ago)
-    
+    Daily sweep for uploads the reaper can't see (scheduled from main).
+
     Returns:
-        Number of sessions cleaned up
+        Number of uploads cleaned up
     """
     logger.info("Starting orphaned upload cleanup task...")
-    
-    # Calculate cutoff time (7 days ago)
-    # Note: expires_at is created_at + 1 hour, so we check if expires_at < (now - 7 days)
-    cutoff = datetime.now(UTC) - timedelta(days=7)
-    
-    # Get storage service based on config
-    if settings.use_s3:
-        storage_service = S3StorageService()
-    else:
-        storage_service = LocalStorageService()
-        
     try:
-        # Find candidates for cleanup
-        orphaned_ids = []
-        
-        # Access internal sessions dict directly or add a method to manager
-        # Using internal dict for now as this is a maintenance task
-        for upload_id, session in upload_manager._sessions.items():
-            if not session.files.get("complete", False):  # Check if marked complete
-                # Check if expired long ago
-                if session.expires_at < cutoff:
-                    orphaned_ids.append(upload_id)
-        
-        cleanup_count = 0
-        for uid in orphaned_ids:
-            try:
-                # Remove files from storage
-                await storage_service.cleanup_upload(uid)
-                
-                # Remove session from memory/disk persistence
-                upload_manager.remove_session(uid)
-                cleanup_count += 1
-                logger.info(f"Cleaned up orphaned upload: {uid}")
-            except Exception as e:
-                logger.error(f"Failed to cleanup upload {uid}: {e}")
-                
+        cleanup_count = await upload_reaper.sweep_orphans()
         logger.info(f"Cleanup task completed. Removed {cleanup_count} orphaned uploads.")
         return cleanup_count
-        
     except Exception as e:
         logger.error(f"Error during orphaned upload cleanup: {e}")
         return 0
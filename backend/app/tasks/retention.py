@@ -0,0 +1,43 @@
+"""
+Recurring task for archiving and pruning old study_uploads rows.
+
+Duplicate detection only looks back ``duplicate_window_days``, so older rows
+are exported to gzipped JSON Lines archives and removed. On PostgreSQL this
+drops whole monthly partitions and creates the upcoming ones.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+
+from app.config import get_settings
+from app.db.database import engine
+from app.db.partitions import prune_study_uploads
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def prune_study_upload_history() -> int:
+    """
+    Archive and remove study_uploads months past the retention window.
+
+    Returns:
+        Number of rows archived
+    """
+    retention_days = max(settings.study_upload_retention_days, settings.duplicate_window_days)
+    logger.info(f"Starting study_uploads retention task ({retention_days} days)...")
+
+    try:
+        archived = await asyncio.to_thread(
+            prune_study_uploads,
+            engine,
+            retention_days,
+            Path(settings.study_upload_archive_dir),
+            settings.study_upload_partitions_ahead,
+        )
+        logger.info(f"Retention task completed. Archived {archived} study_uploads rows.")
+        return archived
+    except Exception as e:
+        logger.error(f"Error during study_uploads retention: {e}")
+        return 0
@@ -1,36 +1,44 @@
-"""Simple trend chart component for analytics dashboard."""
+"""Trend series and CSV export helpers for the upload statistics dashboard."""
 
 from typing import Any
 
 
-def generate_trend_data(stats: dict[str, Any], period: str = "7d") -> list[dict[str, Any]]:
+def generate_trend_data(
+    daily_counts: dict[str, dict[str, int]], period: str = "7d"
+) -> list[dict[str, Any]]:
     """
     Generate time-series trend data for dashboard charts.
 
     Args:
-        stats: Upload statistics
+        daily_counts: Per-day counts by status, as returned by
+            StatsManager.get_daily_counts
         period: Time period (7d, 30d, 90d)
 
     Returns:
-        List of data points with date and count
+        One data point per day (oldest first) with date, successful count
+        and failed count; days without uploads are zero
     """
-    # Placeholder implementation - in production, query database for historical data
-    # For now, return mock trend data
     import datetime
 
-    end_date = datetime.datetime.now()
-    days = 7 if period == "7d" else 30 if period == "30d" else 90
+    end_date = datetime.datetime.now(datetime.UTC)
+    days = trend_days(period)
 
     trend_data = []
     for i in range(days):
-        date = end_date - datetime.timedelta(days=days - i - 1)
-        # Mock count - in production, this would be queried from database
-        count = (i % 5) + 1  # Simple mock pattern
-        trend_data.append({"date": date.strftime("%Y-%m-%d"), "count": count})
+        date = (end_date - datetime.timedelta(days=days - i - 1)).strftime("%Y-%m-%d")
+        counts = daily_counts.get(date, {})
+        trend_data.append(
+            {"date": date, "count": counts.get("success", 0), "failed": counts.get("failed", 0)}
+        )
 
     return trend_data
 
 
+def trend_days(period: str) -> int:
+    """Number of daily points for a trend period (7d, 30d, otherwise 90d)."""
+    return 7 if period == "7d" else 30 if period == "30d" else 90
+
+
 def export_stats_to_csv(stats: dict[str, Any]) -> str:
     """
     Export statistics to CSV format.
@@ -63,51 +71,3 @@ def export_stats_to_csv(stats: dict[str, Any]) -> str:
         writer.writerow(["Service Level", level, count])
 
     return output.getvalue()
-
-
-class StatsManager:
-    """
-    Simple in-memory stats manager for dashboard analytics.
-    In production, this would aggregate data from the database.
-    """
-
-    def __init__(self) -> None:
-        self._stats: dict[str, Any] = {
-            "total_uploads": 0,
-            "failed_uploads": 0,
-            "successful_uploads": 0,
-            "modality": {},
-            "service_level": {},
-        }
-
-    def record_upload(self, modality: str, service_level: str, status: str = "success") -> None:
-        """Record statistics for a completed upload."""
-        self._stats["total_uploads"] += 1
-
-        if status == "success":
-            self._stats["successful_uploads"] += 1
-        elif status == "failed":
-            self._stats["failed_uploads"] += 1
-
-        if modality:
-            m_key = modality.lower()
-            current = self._stats["modality"].get(m_key, 0)
-            self._stats["modality"][m_key] = current + 1
-
-        if service_level:
-            s_key = service_level.lower()
-            current = self._stats["service_level"].get(s_key, 0)
-            self._stats["service_level"][s_key] = current + 1
-
-    def get_stats(self, period: str = "7d") -> dict[str, Any]:
-        """Get aggregated stats for the specified period."""
-        stats = self._stats.copy()
-        stats["period"] = period
-        import datetime
-
-        stats["last_updated"] = datetime.datetime.now().isoformat()
-        return stats
-
-
-# Singleton instance
-stats_manager = StatsManager()
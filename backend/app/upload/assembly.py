@@ -0,0 +1,151 @@
+"""
+Incremental file assembly.
+
+When the client declares a file's chunk count (in the init manifest or on its
+chunks), the file is merged, checked against the manifest and its DICOM
+header parsed in the background as soon as its last chunk is registered.
+``complete_upload`` then only collects the results, so completion time no
+longer grows with study size. Files without a declared chunk count are
+still assembled when the upload completes.
+"""
+
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+
+from app.config import get_settings
+from app.dicom.service import dicom_service
+from app.exceptions import ChunkUploadError
+from app.storage.service import BaseStorageService, disk_capacity
+from app.upload.service import UploadSession, upload_manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _check_manifest(path: Path | str, size_bytes: int | None, sha256: str | None) -> str | None:
+    """Compare a merged file with its declared size and whole-file hash; returns the hash."""
+    actual_size = Path(path).stat().st_size
+    if size_bytes is not None and actual_size != size_bytes:
+        raise ChunkUploadError(f"Assembled size {actual_size} does not match manifest {size_bytes}")
+    if sha256:
+        with open(path, "rb") as f:
+            actual = hashlib.file_digest(f, "sha256").hexdigest()
+        if actual != sha256:
+            raise ChunkUploadError("Assembled file SHA-256 does not match manifest")
+    return sha256 or None
+
+
+def instance_key(path: Path | str, sha256: str | None = None) -> tuple[str, str] | None:
+    """
+    (SOPInstanceUID, SHA-256 of the file) identifying an instance for the forwarding ledger.
+
+    Pass sha256 when the file was already hashed (e.g. against its manifest).
+    """
+    try:
+        sop_instance_uid = dicom_service.extract_sop_instance_uid(path)
+        if not sha256:
+            with open(path, "rb") as f:
+                sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+    except (OSError, ValueError):
+        return None
+    return (sop_instance_uid, sha256) if sop_instance_uid else None
+
+
+async def assemble_file(
+    storage: BaseStorageService, session: UploadSession, file_id: str
+) -> Path | str:
+    """
+    Merge one file's chunks, check it against the manifest and parse its DICOM header.
+
+    The file's instance key is stored on ``session.files[file_id]["instance_key"]``.
+
+    Raises:
+        ChunkUploadError: If chunks are missing or the file does not match its manifest
+        OSError: On storage errors
+        ValueError: If the file is not valid DICOM
+    """
+    info = session.files[file_id]
+    total_chunks = session.expected_chunks(file_id) or max(info["chunks"]) + 1
+    missing = sorted(set(range(total_chunks)) - info["chunks"])
+    if missing:
+        raise ChunkUploadError(f"Missing chunks {missing[:10]} of {total_chunks}")
+
+    # Chunks were hashed on arrival; re-hashing them here is opt-in
+    checksums = info.get("checksums", {}) if settings.upload_verify_on_merge else None
+    final_path = await storage.merge_chunks(
+        session.upload_id, file_id, total_chunks, checksums, session.checksum_algorithm
+    )
+    if storage.merge_copies:
+        await disk_capacity.consume(session.upload_id, Path(final_path).stat().st_size)
+    manifest = session.manifest.get(file_id, {})
+    sha256 = await asyncio.to_thread(
+        _check_manifest, final_path, manifest.get("size_bytes"), manifest.get("sha256")
+    )
+    await asyncio.to_thread(dicom_service.extract_metadata, final_path)
+    info["instance_key"] = await asyncio.to_thread(instance_key, final_path, sha256)
+    return final_path
+
+
+def assembly_error(upload_id: str, file_id: str, error: Exception) -> str:
+    """Log a failed assembly and return the warning reported to the client."""
+    if isinstance(error, OSError):
+        message = f"Storage error for file {file_id}: {type(error).__name__}: {error!s}"
+    else:
+        message = f"DICOM processing error for file {file_id}: {type(error).__name__}: {error!s}"
+    logger.error(message, exc_info=error, extra={"upload_id": upload_id, "file_id": file_id})
+    return message
+
+
+class FileAssembler:
+    """Runs assemble_file in the background for files whose last chunk has arrived."""
+
+    def __init__(self, workers: int = 4) -> None:
+        self._semaphore = asyncio.Semaphore(workers)
+        self._tasks: dict[tuple[str, str], asyncio.Task[None]] = {}
+
+    def schedule(self, storage: BaseStorageService, session: UploadSession, file_id: str) -> bool:
+        """Start assembling file_id if all its chunks are in. Returns True if started."""
+        key = (session.upload_id, file_id)
+        if key in self._tasks or not session.ready_to_assemble(file_id):
+            return False
+
+        task = asyncio.create_task(self._assemble(storage, session, file_id))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    async def _assemble(
+        self, storage: BaseStorageService, session: UploadSession, file_id: str
+    ) -> None:
+        async with self._semaphore:
+            info = session.files[file_id]
+            try:
+                info["path"] = str(await assemble_file(storage, session, file_id))
+                info["error"] = None
+            except Exception as e:
+                info["path"] = None
+                info["error"] = assembly_error(session.upload_id, file_id, e)
+            info["complete"] = True
+
+        # The upload may have completed or expired meanwhile
+        if upload_manager.get_session(session.upload_id) is session:
+            upload_manager.update_session(session)
+
+    async def wait(self, upload_id: str) -> None:
+        """Wait for every background assembly of an upload to finish."""
+        pending = [task for (uid, _), task in self._tasks.items() if uid == upload_id]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Cancel assemblies still running; their files are assembled again on completion."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+file_assembler = FileAssembler(workers=settings.upload_assembly_workers)
@@ -0,0 +1,340 @@
+"""Chunk storage shared by the single-chunk, batch and pre-flight upload endpoints."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import struct
+from collections.abc import AsyncIterator
+from typing import Any
+from uuid import UUID
+
+from botocore.exceptions import ClientError
+from pydantic import ValidationError as PydanticValidationError
+
+from app.exceptions import ChecksumMismatchError, ChunkUploadError
+from app.models.upload import (
+    ChunkBatchRecord,
+    ChunkBatchResponse,
+    ChunkDigest,
+    ChunkPreflightResponse,
+    ChunkUploadResponse,
+)
+from app.storage.checksum import chunk_checksum
+from app.storage.dedup import dedup_index
+from app.storage.service import BaseStorageService, disk_capacity
+from app.upload.assembly import file_assembler
+from app.upload.service import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Batch framing: every record is a 4-byte big-endian header length, a UTF-8 JSON
+# header ({"file_id", "chunk_index", "size", "checksum"?, "md5"?, "total_chunks"?}) and then
+# `size` bytes of data.
+BATCH_MEDIA_TYPE = "application/x-relaypacs-chunk-batch"
+HEADER_LENGTH = struct.Struct(">I")
+MAX_HEADER_BYTES = 4096
+
+
+async def _store_blob(  # noqa: PLR0913
+    storage: BaseStorageService,
+    session: UploadSession,
+    file_id: str,
+    chunk_index: int,
+    body: bytes,
+    checksum: str,
+) -> bool:
+    """Store a chunk by content, linking bytes any upload already stored. True if linked."""
+    algorithm = session.checksum_algorithm
+    if algorithm == "sha256":
+        digest = checksum
+    else:
+        # Blobs are keyed by SHA-256 whatever the session negotiated
+        digest = await asyncio.to_thread(chunk_checksum, "sha256", body)
+    upload_id = session.upload_id
+    known = await asyncio.to_thread(dedup_index.lookup, digest)
+    deduplicated = known is not None and await storage.blob_exists(digest)
+    if deduplicated:
+        try:
+            await storage.link_blob(digest, upload_id, file_id, chunk_index)
+        except (OSError, ClientError) as e:
+            # The blob's grace period ran out between the lookup and the link
+            logger.info(f"Stored blob {digest} went away, storing the chunk again: {e}")
+            deduplicated = False
+    if not deduplicated:
+        await storage.save_blob(digest, body)
+        await storage.link_blob(digest, upload_id, file_id, chunk_index)
+    await asyncio.to_thread(
+        dedup_index.add_ref,
+        upload_id,
+        file_id,
+        chunk_index,
+        session.user_id,
+        digest,
+        len(body),
+        algorithm,
+        checksum,
+    )
+    return deduplicated
+
+
+async def store_chunk(  # noqa: PLR0913
+    storage: BaseStorageService,
+    session: UploadSession,
+    file_id: str,
+    chunk_index: int,
+    body: bytes,
+    expected_checksum: str | None = None,
+) -> str:
+    """
+    Write one chunk, verify it and register it on the session (without persisting).
+    Starts background assembly when this was the file's last missing chunk.
+
+    The chunk is hashed once here, with the session's checksum algorithm, and
+    the digest recorded for the merge. Returns "skipped" when the chunk was
+    already stored and registered, "exists" when it was on storage but not
+    yet registered, otherwise "received".
+
+    Raises:
+        ChecksumMismatchError: If the data does not match expected_checksum
+        ChunkUploadError: If the written chunk fails size verification
+    """
+    upload_id = session.upload_id
+    chunk_exists = await storage.chunk_exists(upload_id, file_id, chunk_index)
+    if chunk_exists and chunk_index in session.files.get(file_id, {}).get("chunks", set()):
+        return "skipped"
+
+    algorithm = session.checksum_algorithm
+    checksum = chunk_checksum(algorithm, body)
+    if expected_checksum and checksum != expected_checksum.lower():
+        raise ChecksumMismatchError(
+            f"Chunk {chunk_index} {algorithm} checksum mismatch. "
+            f"Expected: {expected_checksum}, Got: {checksum}"
+        )
+
+    deduplicated = False
+    if not chunk_exists:
+        total_chunks = session.expected_chunks(file_id)
+        if total_chunks and file_id not in session.files:
+            await storage.reserve_file(
+                upload_id, file_id, total_chunks, session.manifest[file_id]["size_bytes"]
+            )
+
+        if storage.content_addressed:
+            deduplicated = await _store_blob(storage, session, file_id, chunk_index, body, checksum)
+        else:
+            await storage.save_chunk(upload_id, file_id, chunk_index, body)
+
+        # Verify the write so a partial chunk is never registered as received
+        if not await storage.verify_chunk(upload_id, file_id, chunk_index, len(body)):
+            await storage.discard_chunk(upload_id, file_id, chunk_index)
+            raise ChunkUploadError(
+                f"Chunk {chunk_index} write verification failed. "
+                f"Expected {len(body)} bytes. Please retry upload."
+            )
+        if deduplicated:
+            session.deduplicated_bytes += len(body)
+        elif storage.chunks_on_disk:
+            await disk_capacity.consume(upload_id, len(body))
+
+    session.register_file_chunk(
+        file_id, chunk_index, len(body) if not chunk_exists else 0, checksum
+    )
+    file_assembler.schedule(storage, session, file_id)
+    return "exists" if chunk_exists else "received"
+
+
+async def attach_known_chunks(
+    storage: BaseStorageService, session: UploadSession, chunks: list[ChunkDigest]
+) -> ChunkPreflightResponse:
+    """
+    Register chunks the server already holds from the digests alone.
+
+    Chunks whose SHA-256 matches a blob referenced by one of the same user's
+    uploads are linked into this upload and reported as attached; the client
+    only needs to send the ones reported missing. The caller persists the
+    session afterwards. Storage without a blob store reports every chunk missing.
+    """
+    if not storage.content_addressed:
+        return ChunkPreflightResponse(
+            upload_id=UUID(session.upload_id), attached=[], missing=chunks, attached_bytes=0
+        )
+
+    known = await asyncio.to_thread(
+        dedup_index.lookup_for_user, session.user_id, [chunk.sha256 for chunk in chunks]
+    )
+    attached: list[ChunkDigest] = []
+    missing: list[ChunkDigest] = []
+    attached_bytes = 0
+    for chunk in chunks:
+        registered = session.files.get(chunk.file_id, {}).get("chunks", set())
+        if chunk.chunk_index in registered:
+            attached.append(chunk)
+            continue
+
+        blob = known.get(chunk.sha256)
+        if blob is None or not await storage.blob_exists(chunk.sha256):
+            missing.append(chunk)
+            continue
+
+        size, algorithm, checksum = blob
+        if session.checksum_algorithm == "sha256":
+            algorithm, checksum = "sha256", chunk.sha256
+        upload_id = session.upload_id
+        try:
+            await storage.link_blob(chunk.sha256, upload_id, chunk.file_id, chunk.chunk_index)
+        except (OSError, ClientError):
+            # Deleted since the lookup; the client sends the bytes instead
+            missing.append(chunk)
+            continue
+        await asyncio.to_thread(
+            dedup_index.add_ref,
+            upload_id,
+            chunk.file_id,
+            chunk.chunk_index,
+            session.user_id,
+            chunk.sha256,
+            size,
+            algorithm,
+            checksum,
+        )
+        if not await storage.verify_chunk(upload_id, chunk.file_id, chunk.chunk_index, size):
+            missing.append(chunk)
+            continue
+
+        # Without a digest in the session's algorithm the merge can't re-verify
+        # this chunk, but its content is pinned by the blob's SHA-256
+        recorded = checksum if algorithm == session.checksum_algorithm else None
+        session.register_file_chunk(chunk.file_id, chunk.chunk_index, size, recorded)
+        file_assembler.schedule(storage, session, chunk.file_id)
+        session.deduplicated_bytes += size
+        attached_bytes += size
+        attached.append(chunk)
+
+    return ChunkPreflightResponse(
+        upload_id=UUID(session.upload_id),
+        attached=attached,
+        missing=missing,
+        attached_bytes=attached_bytes,
+    )
+
+
+class _StreamReader:
+    """Exact-size reads over an async byte stream of arbitrary chunk boundaries."""
+
+    def __init__(self, stream: AsyncIterator[bytes]) -> None:
+        self._stream = stream
+        self._buffer = bytearray()
+        self._eof = False
+
+    async def _fill(self, size: int) -> None:
+        while len(self._buffer) < size and not self._eof:
+            try:
+                self._buffer += await anext(self._stream)
+            except StopAsyncIteration:
+                self._eof = True
+
+    async def at_eof(self) -> bool:
+        await self._fill(1)
+        return not self._buffer
+
+    async def read_exactly(self, size: int) -> bytes:
+        await self._fill(size)
+        if len(self._buffer) < size:
+            raise ChunkUploadError(
+                f"Truncated batch: expected {size} bytes, got {len(self._buffer)}"
+            )
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+async def read_chunk_batch(
+    stream: AsyncIterator[bytes], max_chunk_bytes: int, max_records: int
+) -> AsyncIterator[tuple[ChunkBatchRecord, bytes]]:
+    """
+    Parse a length-prefixed batch body record by record.
+
+    Only one record's data is held in memory at a time.
+
+    Raises:
+        ChunkUploadError: If the framing or a record header is invalid
+    """
+    reader = _StreamReader(stream)
+    count = 0
+    while not await reader.at_eof():
+        count += 1
+        if count > max_records:
+            raise ChunkUploadError(f"Batch exceeds {max_records} records")
+
+        (header_length,) = HEADER_LENGTH.unpack(await reader.read_exactly(HEADER_LENGTH.size))
+        if not 0 < header_length <= MAX_HEADER_BYTES:
+            raise ChunkUploadError(f"Record {count}: invalid header length {header_length}")
+
+        try:
+            header: Any = json.loads(await reader.read_exactly(header_length))
+            record = ChunkBatchRecord.model_validate(header)
+        except (json.JSONDecodeError, UnicodeDecodeError, PydanticValidationError) as e:
+            raise ChunkUploadError(f"Record {count}: invalid header ({e})") from e
+
+        if record.size > max_chunk_bytes:
+            raise ChunkUploadError(
+                f"Record {count}: chunk of {record.size} bytes exceeds {max_chunk_bytes}"
+            )
+
+        yield record, await reader.read_exactly(record.size)
+
+
+async def store_chunk_batch(
+    storage: BaseStorageService,
+    session: UploadSession,
+    stream: AsyncIterator[bytes],
+    max_chunk_bytes: int,
+    max_records: int,
+) -> ChunkBatchResponse:
+    """
+    Store every record of a batch body, in order, on the session.
+
+    A record whose data does not match its checksum (or md5) is reported as
+    "checksum_mismatch" and one that fails write verification as "failed";
+    the rest of the batch is still stored. The caller persists the session
+    once afterwards, including when the framing turns out to be invalid.
+
+    Raises:
+        ChunkUploadError: If the framing or a record header is invalid
+    """
+    upload_id = UUID(session.upload_id)
+    results: list[ChunkUploadResponse] = []
+    received_bytes = 0
+    async for record, data in read_chunk_batch(stream, max_chunk_bytes, max_records):
+        if record.total_chunks:
+            session.set_manifest(record.file_id, record.total_chunks)
+        if record.md5 and hashlib.md5(data).hexdigest() != record.md5.lower():
+            status = "checksum_mismatch"
+        else:
+            try:
+                status = await store_chunk(
+                    storage, session, record.file_id, record.chunk_index, data, record.checksum
+                )
+            except ChecksumMismatchError:
+                status = "checksum_mismatch"
+            except ChunkUploadError as e:
+                logger.warning(f"Batch upload {upload_id}: {e}")
+                status = "failed"
+        if status == "received":
+            received_bytes += record.size
+        results.append(
+            ChunkUploadResponse(
+                upload_id=upload_id,
+                file_id=record.file_id,
+                chunk_index=record.chunk_index,
+                received_bytes=record.size,
+                status=status,
+                checksum=(
+                    session.recorded_checksum(record.file_id, record.chunk_index)
+                    if status in ("received", "exists", "skipped")
+                    else None
+                ),
+            )
+        )
+    return ChunkBatchResponse(upload_id=upload_id, received_bytes=received_bytes, chunks=results)
@@ -0,0 +1,291 @@
+"""Duplicate study detection for uploads."""
+
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.service import cache_service
+from app.config import get_settings
+from app.db.database import get_async_session_factory
+from app.db.models import StudyUpload
+from app.models.upload import StudyMetadata
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Redis keys: one bitmap per UTC day, plus a marker set once the filter is loaded
+BLOOM_KEY_PREFIX = "dup_bloom:"
+BLOOM_WARM_KEY = f"{BLOOM_KEY_PREFIX}warm"
+
+
+def study_hash(metadata: StudyMetadata) -> str:
+    """
+    Hash of the study fields known before any file is parsed.
+
+    Patient name, date and modality are free text from the client, so they
+    are normalized first: DICOM ``^`` separators and whitespace collapse to
+    single spaces, case is folded and non-digits are dropped from the date.
+    """
+    name = " ".join(part for part in re.split(r"[\s^]+", metadata.patient_name.upper()) if part)
+    study_date = re.sub(r"\D", "", metadata.study_date)
+    modality = metadata.modality.strip().upper()
+    return hashlib.sha256(f"{name}|{study_date}|{modality}".encode()).hexdigest()
+
+
+def legacy_study_hash(metadata: StudyMetadata) -> str:
+    """
+    study_hash as computed before normalization, over the raw client fields.
+
+    Rows recorded before the change still carry it, and it can't be
+    recomputed from a row, so init also looks it up while
+    ``duplicate_match_legacy_hash`` is on.
+    """
+    fields = f"{metadata.patient_name}|{metadata.study_date}|{metadata.modality}"
+    return hashlib.sha256(fields.encode()).hexdigest()
+
+
+class StudyBloomFilter:
+    """
+    Bloom filter of study hashes, bucketed by upload day.
+
+    One bitmap per UTC day lets entries age out of the duplicate window by
+    dropping whole days. Bitmaps live in Redis when ``use_redis`` is set so
+    every worker sees every upload; otherwise they live in process memory.
+    """
+
+    def __init__(
+        self, capacity_per_day: int, error_rate: float, window_days: int, use_redis: bool
+    ) -> None:
+        self.num_bits = max(
+            math.ceil(-capacity_per_day * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.num_hashes = max(round(self.num_bits / capacity_per_day * math.log(2)), 1)
+        self.window_days = window_days
+        self.use_redis = use_redis
+        self._buckets: dict[date, bytearray] = {}
+
+    def _offsets(self, key: str) -> list[int]:
+        # Keys are SHA-256 hex digests; derive the bit positions by double hashing
+        h1 = int(key[:16], 16)
+        h2 = int(key[16:32], 16) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _days(self, today: date) -> list[date]:
+        return [today - timedelta(days=i) for i in range(self.window_days + 1)]
+
+    @staticmethod
+    def _redis_key(day: date) -> str:
+        return f"{BLOOM_KEY_PREFIX}{day.isoformat()}"
+
+    @property
+    def _redis_ttl(self) -> int:
+        return (self.window_days + 2) * 86400
+
+    async def add_many(self, items: Iterable[tuple[str, date]]) -> None:
+        """Add (study hash, upload day) pairs, one Redis round trip per day."""
+        by_day: dict[date, list[int]] = defaultdict(list)
+        for key, day in items:
+            by_day[day].extend(self._offsets(key))
+
+        for day, offsets in by_day.items():
+            if self.use_redis:
+                await cache_service.set_bits(self._redis_key(day), offsets, expire=self._redis_ttl)
+                continue
+
+            bucket = self._buckets.get(day)
+            if bucket is None:
+                bucket = self._buckets[day] = bytearray((self.num_bits + 7) // 8)
+                self._prune(day)
+            for offset in offsets:
+                bucket[offset >> 3] |= 1 << (offset & 7)
+
+    async def add(self, key: str, day: date) -> None:
+        """Add one study hash uploaded on the given day."""
+        await self.add_many([(key, day)])
+
+    async def might_contain(self, key: str, today: date) -> bool | None:
+        """
+        Check whether a hash may have been added within the window.
+
+        False is definite. Returns None when the shared filter is not loaded
+        (e.g. Redis was flushed), in which case callers must not trust it.
+        """
+        offsets = self._offsets(key)
+        days = self._days(today)
+
+        if self.use_redis:
+            request = {self._redis_key(day): offsets for day in days}
+            request[BLOOM_WARM_KEY] = [0]
+            bits = await cache_service.get_bits(request)
+            if bits is None or not bits.pop(BLOOM_WARM_KEY)[0]:
+                return None
+            return any(all(values) for values in bits.values())
+
+        for day in days:
+            bucket = self._buckets.get(day)
+            if bucket and all(bucket[o >> 3] & (1 << (o & 7)) for o in offsets):
+                return True
+        return False
+
+    async def mark_warm(self) -> None:
+        """Record that the shared filter holds every upload in the window."""
+        if self.use_redis:
+            await cache_service.set_bits(BLOOM_WARM_KEY, [0], expire=self._redis_ttl)
+
+    def _prune(self, today: date) -> None:
+        oldest = today - timedelta(days=self.window_days)
+        for day in [day for day in self._buckets if day < oldest]:
+            del self._buckets[day]
+
+
+class DuplicateDetector:
+    """
+    Duplicate detection for study uploads.
+
+    At init, only client-entered metadata is known, so uploads are matched on
+    ``study_hash``. The Bloom filter answers the common no-match case without
+    touching the database; possible matches are confirmed with a query on the
+    ``(study_hash, created_at)`` index. At completion the real
+    StudyInstanceUID and PatientID are recorded and checked as a second pass.
+
+    Without Redis the filter is process-local and cannot see uploads recorded
+    by other workers. WEB_CONCURRENCY says nothing about how many processes
+    the server really runs, so the shared instance only uses the filter with
+    Redis and queries the database for every upload otherwise.
+    """
+
+    def __init__(self, window_days: int, bloom: StudyBloomFilter, bloom_enabled: bool) -> None:
+        self.window_days = window_days
+        self.bloom = bloom
+        self.bloom_enabled = bloom_enabled
+        self.ready = False
+        self._warm_task: asyncio.Task[None] | None = None
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(UTC) - timedelta(days=self.window_days)
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Load every study hash recorded within the window into the Bloom filter."""
+        result = await db.stream(
+            select(StudyUpload.study_hash, StudyUpload.created_at)
+            .where(StudyUpload.created_at > self._cutoff())
+            .execution_options(yield_per=10000)
+        )
+        count = 0
+        async for partition in result.partitions():
+            await self.bloom.add_many((row.study_hash, row.created_at.date()) for row in partition)
+            count += len(partition)
+
+        await self.bloom.mark_warm()
+        self.ready = True
+        return count
+
+    async def _warm_in_background(self) -> None:
+        try:
+            async with get_async_session_factory()() as db:
+                count = await self.warm(db)
+            logger.info(f"Duplicate detection filter loaded ({count} recent uploads)")
+        except Exception as e:
+            logger.warning(f"Duplicate detection filter not loaded, using database only: {e}")
+
+    def start(self) -> None:
+        """Load the Bloom filter in the background; lookups use the database until then."""
+        if self.bloom_enabled and (self._warm_task is None or self._warm_task.done()):
+            self._warm_task = asyncio.create_task(self._warm_in_background())
+
+    async def stop(self) -> None:
+        """Cancel a pending filter load."""
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _bloom_rules_out(self, key: str) -> bool:
+        if not (self.bloom_enabled and self.ready):
+            return False
+        try:
+            maybe = await self.bloom.might_contain(key, datetime.now(UTC).date())
+        except Exception as e:
+            logger.warning(f"Duplicate detection filter check failed: {e}")
+            return False
+        if maybe is None:
+            # Shared filter lost (e.g. Redis restarted): reload it, trust the database meanwhile
+            self.ready = False
+            self.start()
+            return False
+        return not maybe
+
+    async def find_recent(self, db: AsyncSession, *keys: str) -> StudyUpload | None:
+        """Return an upload with any of these study hashes within the window, if any."""
+        candidates = [key for key in dict.fromkeys(keys) if not await self._bloom_rules_out(key)]
+        if not candidates:
+            return None
+
+        result = await db.execute(
+            select(StudyUpload)
+            .where(StudyUpload.study_hash.in_(candidates), StudyUpload.created_at > self._cutoff())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def record(self, db: AsyncSession, upload: StudyUpload) -> None:
+        """Store a new upload and add it to the Bloom filter."""
+        db.add(upload)
+        await db.commit()
+        if self.bloom_enabled:
+            try:
+                await self.bloom.add(str(upload.study_hash), datetime.now(UTC).date())
+            except Exception as e:
+                # A missing entry would hide a duplicate, so stop trusting the filter
+                logger.warning(f"Duplicate detection filter update failed: {e}")
+                self.ready = False
+                self.start()
+
+    async def find_by_identity(
+        self, db: AsyncSession, upload_id: str, study_instance_uid: str, patient_id: str
+    ) -> StudyUpload | None:
+        """
+        Record the parsed identifiers for an upload and return an earlier
+        upload of the same study within the window, if any.
+        """
+        await db.execute(
+            update(StudyUpload)
+            .where(StudyUpload.upload_id == upload_id)
+            .values(study_instance_uid=study_instance_uid, patient_id=patient_id)
+        )
+        await db.commit()
+
+        result = await db.execute(
+            select(StudyUpload)
+            .where(
+                StudyUpload.study_instance_uid == study_instance_uid,
+                StudyUpload.patient_id == patient_id,
+                StudyUpload.created_at > self._cutoff(),
+                StudyUpload.upload_id != upload_id,
+            )
+            .limit(1)
+        )
+        return result.scalars().first()
+
+
+# Singleton instance
+duplicate_detector = DuplicateDetector(
+    window_days=settings.duplicate_window_days,
+    bloom=StudyBloomFilter(
+        capacity_per_day=settings.duplicate_bloom_daily_capacity,
+        error_rate=settings.duplicate_bloom_error_rate,
+        window_days=settings.duplicate_window_days,
+        use_redis=bool(settings.redis_url),
+    ),
+    bloom_enabled=bool(settings.redis_url),
+)
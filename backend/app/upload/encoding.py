@@ -0,0 +1,138 @@
+"""Content-Encoding support for compressed chunk uploads."""
+
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from app.exceptions import ChunkUploadError, PayloadTooLargeError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+# Largest piece of decoded output produced at a time, so a small compressed
+# body can never expand past the limit before it is checked
+DECODE_PIECE_BYTES = 64 * 1024
+
+IDENTITY = "identity"
+
+# Largest possible zstd frame header (magic number included)
+ZSTD_FRAME_HEADER_MAX = 18
+
+
+def supported_encodings() -> list[str]:
+    """Content-Encodings accepted on chunk uploads, preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+class _BoundedBuffer:
+    """Write target that collects output and fails once it passes max_bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._pieces: list[bytes] = []
+
+    def write(self, data: Any) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise PayloadTooLargeError(f"Decoded body exceeds {self.max_bytes} bytes")
+        self._pieces.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._pieces)
+        self._pieces.clear()
+        return data
+
+
+class ChunkDecoder:
+    """
+    Incremental decoder for one request body.
+
+    Feed wire bytes to ``decode`` as they arrive and call ``finish`` at the
+    end of the body. Output is capped at ``max_bytes`` so a decompression
+    bomb fails early instead of exhausting memory. ``wire_bytes`` and
+    ``decoded_bytes`` count what went in and what came out.
+    """
+
+    def __init__(self, encoding: str, max_bytes: int) -> None:
+        self.encoding = encoding
+        self.wire_bytes = 0
+        self._output = _BoundedBuffer(max_bytes)
+        self._zlib: Any = None
+        self._zstd: Any = None
+        self._zstd_header = b""
+
+        if encoding == "gzip":
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "zstd" and zstandard is not None:
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(
+                self._output, write_size=DECODE_PIECE_BYTES, closefd=False  # type: ignore[arg-type]
+            )
+        elif encoding != IDENTITY:
+            raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    @property
+    def decoded_bytes(self) -> int:
+        return self._output.size
+
+    def decode(self, data: bytes) -> bytes:
+        """Decode the next piece of the body."""
+        self.wire_bytes += len(data)
+        if self._zlib is not None:
+            self._inflate(data)
+        elif self._zstd is not None:
+            missing = ZSTD_FRAME_HEADER_MAX - len(self._zstd_header)
+            if missing > 0:
+                self._zstd_header += data[:missing]
+            try:
+                self._zstd.write(data)
+            except zstandard.ZstdError as e:
+                raise ChunkUploadError(f"Invalid zstd body: {e}") from e
+        else:
+            self._output.write(data)
+        return self._output.drain()
+
+    def _inflate(self, data: bytes) -> None:
+        try:
+            while True:
+                out = self._zlib.decompress(data, DECODE_PIECE_BYTES)
+                self._output.write(out)
+                data = self._zlib.unconsumed_tail
+                if not data and len(out) < DECODE_PIECE_BYTES:
+                    return
+        except zlib.error as e:
+            raise ChunkUploadError(f"Invalid gzip body: {e}") from e
+
+    def finish(self) -> bytes:
+        """
+        Flush remaining output and check the body was complete.
+
+        Raises:
+            ChunkUploadError: If the compressed body was truncated
+        """
+        if self._zlib is not None and not self._zlib.eof:
+            raise ChunkUploadError("Truncated gzip body")
+        if self._zstd is not None:
+            # A frame only records its size when the encoder knew it up front
+            # (always the case for one-shot compression of a chunk)
+            try:
+                expected = zstandard.get_frame_parameters(self._zstd_header).content_size
+            except zstandard.ZstdError as e:
+                raise ChunkUploadError(f"Invalid zstd body: {e}") from e
+            if expected != zstandard.CONTENTSIZE_UNKNOWN and self.decoded_bytes < expected:
+                raise ChunkUploadError("Truncated zstd body")
+        return self._output.drain()
+
+
+async def decode_stream(
+    stream: AsyncIterator[bytes], decoder: ChunkDecoder
+) -> AsyncIterator[bytes]:
+    """Decode a request body stream piece by piece."""
+    async for piece in stream:
+        if out := decoder.decode(piece):
+            yield out
+    if out := decoder.finish():
+        yield out
@@ -0,0 +1,228 @@
+"""Streaming export of row-level upload history as CSV or Parquet."""
+
+import asyncio
+import csv
+import io
+import sqlite3
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import select
+
+from app.db.database import get_async_session_factory
+from app.db.models import StudyUpload
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows fetched from the database (and written as one CSV chunk / Parquet row group)
+EXPORT_BATCH_SIZE = 5000
+
+Batch = list[tuple[Any, ...]]
+
+# Column names per export source. study_uploads.patient_id is left out on purpose:
+# bulk exports should not carry PHI.
+EXPORT_COLUMNS = {
+    "stats": ["id", "modality", "service_level", "status", "timestamp"],
+    "studies": ["upload_id", "study_instance_uid", "user_id", "created_at"],
+}
+
+
+def parquet_available() -> bool:
+    """True when pyarrow is installed."""
+    return pa is not None
+
+
+def _bounds(start: date | None, end: date | None) -> tuple[datetime | None, datetime | None]:
+    """Turn an inclusive date range into [start, end) UTC datetimes."""
+    lower = datetime.combine(start, datetime.min.time(), tzinfo=UTC) if start else None
+    upper = (
+        datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=UTC) if end else None
+    )
+    return lower, upper
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+async def iter_upload_stats(
+    db_path: Path | str, start: date | None = None, end: date | None = None
+) -> AsyncIterator[Batch]:
+    """Yield upload_stats rows in batches, oldest first, without loading them all."""
+    lower, upper = _bounds(start, end)
+    clauses, params = [], []
+    if lower:
+        clauses.append("timestamp >= ?")
+        params.append(lower.strftime("%Y-%m-%d %H:%M:%S"))
+    if upper:
+        clauses.append("timestamp < ?")
+        params.append(upper.strftime("%Y-%m-%d %H:%M:%S"))
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    # Fetches run in worker threads one at a time, so sharing the connection is safe
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        cursor = await asyncio.to_thread(
+            conn.execute,
+            "SELECT id, modality, service_level, status, timestamp FROM upload_stats"
+            f"{where} ORDER BY id",
+            params,
+        )
+        while rows := await asyncio.to_thread(cursor.fetchmany, EXPORT_BATCH_SIZE):
+            yield [
+                (row_id, modality, service_level, status, _utc(datetime.fromisoformat(ts)))
+                for row_id, modality, service_level, status, ts in rows
+            ]
+    finally:
+        conn.close()
+
+
+async def iter_study_uploads(
+    start: date | None = None, end: date | None = None
+) -> AsyncIterator[Batch]:
+    """
+    Yield study_uploads rows in batches, oldest first.
+
+    Uses a streaming result (a server-side cursor on PostgreSQL) on its own
+    session, since the response body is produced after the request handler
+    has returned.
+    """
+    lower, upper = _bounds(start, end)
+    query = select(
+        StudyUpload.upload_id,
+        StudyUpload.study_instance_uid,
+        StudyUpload.user_id,
+        StudyUpload.created_at,
+    ).order_by(StudyUpload.created_at)
+    if lower:
+        query = query.where(StudyUpload.created_at >= lower)
+    if upper:
+        query = query.where(StudyUpload.created_at < upper)
+
+    async with get_async_session_factory()() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield [
+                (
+                    row.upload_id,
+                    row.study_instance_uid,
+                    str(row.user_id) if row.user_id else None,
+                    _utc(row.created_at),
+                )
+                for row in partition
+            ]
+
+
+async def stream_csv(columns: list[str], batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    """Encode batches as CSV, one chunk per batch after the header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(source: str) -> Any:
+    timestamp = pa.timestamp("us", tz="UTC")
+    if source == "stats":
+        return pa.schema(
+            [
+                ("id", pa.int64()),
+                ("modality", pa.string()),
+                ("service_level", pa.string()),
+                ("status", pa.string()),
+                ("timestamp", timestamp),
+            ]
+        )
+    return pa.schema(
+        [
+            ("upload_id", pa.string()),
+            ("study_instance_uid", pa.string()),
+            ("user_id", pa.string()),
+            ("created_at", timestamp),
+        ]
+    )
+
+
+async def stream_parquet(source: str, batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    """Encode batches as a Parquet file, one row group per batch."""
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+    schema = _parquet_schema(source)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            columns = list(zip(*batch, strict=True))
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(columns, schema, strict=True)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_history(
+    source: str,
+    fmt: str,
+    stats_db_path: Path | str,
+    start: date | None = None,
+    end: date | None = None,
+) -> AsyncIterator[bytes]:
+    """Byte stream for one export: source "stats" or "studies", fmt "csv" or "parquet"."""
+    batches = (
+        iter_upload_stats(stats_db_path, start, end)
+        if source == "stats"
+        else iter_study_uploads(start, end)
+    )
+    if fmt == "parquet":
+        return stream_parquet(source, batches)
+    return stream_csv(EXPORT_COLUMNS[source], batches)
@@ -1,17 +1,32 @@
-import hashlib
+import asyncio
 import logging
+from datetime import date
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user, get_upload_token
-from app.db.database import get_db
+from app.cache.service import cache_service
+from app.config import get_settings
+from app.db.database import get_async_db
+from app.db.models import StudyUpload
 from app.dicom.service import dicom_service
+from app.exceptions import (
+    ChecksumMismatchError,
+    ChunkUploadError,
+    DiskWriterBusyError,
+    InsufficientStorageError,
+    PayloadTooLargeError,
+)
 from app.limiter import limiter
 from app.models.upload import (
+    ChunkBatchResponse,
+    ChunkPreflightRequest,
+    ChunkPreflightResponse,
     ChunkUploadResponse,
     UploadCompleteResponse,
     UploadInitRequest,
@@ -19,11 +34,20 @@ from app.models.upload import (
     UploadStatusResponse,
 )
 from app.pacs.service import pacs_service
-from app.storage.service import storage_service
-from app.upload.analytics import export_stats_to_csv, generate_trend_data, stats_manager
-from app.upload.service import upload_manager
+from app.storage.checksum import negotiate_checksum, supported_checksums
+from app.storage.dedup import dedup_index
+from app.storage.service import disk_capacity, storage_service
+from app.upload.analytics import export_stats_to_csv, generate_trend_data, trend_days
+from app.upload.assembly import assemble_file, assembly_error, file_assembler, instance_key
+from app.upload.chunks import attach_known_chunks, store_chunk, store_chunk_batch
+from app.upload.duplicates import duplicate_detector, legacy_study_hash
+from app.upload.duplicates import study_hash as compute_study_hash
+from app.upload.encoding import IDENTITY, ChunkDecoder, decode_stream, supported_encodings
+from app.upload.export import export_history, parquet_available
+from app.upload.service import UploadSession, stats_manager, upload_manager
 
 router = APIRouter()
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
@@ -33,59 +57,19 @@ async def initialize_upload(
     request: Request,
     payload: UploadInitRequest,
     user: dict[str, Any] = Depends(get_current_user),
-    db: Any = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> UploadInitResponse:
     """Initialize a new upload session"""
-    import hashlib
-    from datetime import UTC, datetime, timedelta
-
     from fastapi import status
-    from sqlalchemy.orm import Session
-
-    from app.db.models import StudyUpload
-
-    session_db: Session = db  # Type hint
-
-    # 1. Check for duplicates
-    # Hash StudyInstanceUID + PatientID to find previous uploads
-    # In real world, we'd extract these from DICOM, but here we use metadata provided by user
-    # or rely on frontend providing them. Wait, StudyMetadata doesn't strictly require UIDs in the model shown previously.
-    # Actually, StudyMetadata usually implies we have some ID.
-    # Let's check StudyMetadata model again.
-    # It has patient_name, study_date, etc. but NO UID.
-    # This is a problem. Typically ingestion provides UIDs later.
-    # However, P2-5 explicitly says "Hash StudyInstanceUID + PatientID".
-    # If these are not in init payload, we can't check duplicates at init time.
-    # We might need to rely on combination of Patient Name + Study Date + Modality + Description as a proxy hash?
-    # OR update StudyMetadata to include UIDs (which frontend might not have before parsing?).
-    # Frontend usually parses DICOM tags before init.
-    # Let's assume for now we use the available metadata for the hash proxy
-    # OR we add UIDs to the request if available.
-
-    # Looking at frontend code (single-file-upload.spec.ts), it extracts metadata.
-    # But `StudyMetadata` class in backend `models/upload.py` only lists descriptive fields.
-    # To implement P2-5 correctly, we should ideally add StudyInstanceUID/PatientID to the Init request.
-    # But changing the request schema might break things if frontend doesn't send it.
-
-    # Workaround: Use PatientName + StudyDate + Modality as a "soft" duplicate check.
-    # Or strict check if we assume UIDs are added.
-    # Let's check if I can modify StudyMetadata.
-
-    # Actually, let's implement the logic using available fields for now to fulfill the requirement "Add Duplicate Study Detection"
-    # using what we have, or construct the hash from what we have.
-    # "Hash StudyInstanceUID + PatientID" was the recommendation.
-    # If I can't get UIDs, I will use: PatientName + StudyDate + Modality.
-
-    study_identifiers = f"{payload.study_metadata.patient_name}|{payload.study_metadata.study_date}|{payload.study_metadata.modality}"
-    study_hash = hashlib.sha256(study_identifiers.encode()).hexdigest()
-
-    # Check if uploaded in last 30 days
-    cutoff = datetime.now(UTC) - timedelta(days=30)
-    existing = (
-        session_db.query(StudyUpload)
-        .filter(StudyUpload.study_hash == study_hash, StudyUpload.created_at > cutoff)
-        .first()
-    )
+
+    # 1. Check for duplicates. DICOM UIDs are unknown until the files are parsed,
+    # so init matches on patient name + study date + modality; complete_upload
+    # re-checks on the real StudyInstanceUID/PatientID.
+    study_hash = compute_study_hash(payload.study_metadata)
+    keys = [study_hash]
+    if settings.duplicate_match_legacy_hash:
+        keys.append(legacy_study_hash(payload.study_metadata))
+    existing = await duplicate_detector.find_recent(db, *keys)
 
     if existing and not payload.force_upload:
         # Return 409 Conflict with details
@@ -98,8 +82,13 @@ async def initialize_upload(
             },
         )
 
-    # Proactive cleanup of expired sessions
-    await upload_manager.cleanup_expired_sessions(storage_service)
+    checksum_algorithm = negotiate_checksum(payload.checksum_algorithms)
+    if checksum_algorithm is None:
+        raise HTTPException(
+            status_code=400,
+            detail="No supported checksum algorithm. "
+            f"Supported: {', '.join(supported_checksums())}",
+        )
 
     # Create session
     response = await upload_manager.create_session(
@@ -108,21 +97,38 @@ async def initialize_upload(
         payload.total_files,
         payload.total_size_bytes,
         payload.clinical_history,
+        payload.files,
+        checksum_algorithm,
     )
 
+    # Reserve the disk space the upload will take, or turn it away before it starts
+    try:
+        await asyncio.to_thread(
+            disk_capacity.reserve,
+            str(response.upload_id),
+            storage_service.disk_bytes(payload.total_size_bytes),
+        )
+    except InsufficientStorageError as e:
+        upload_manager.remove_session(str(response.upload_id))
+        logger.warning(f"Upload refused, storage disk too full: {e!s}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Not enough storage space for this upload, please retry later",
+            headers={"Retry-After": str(settings.disk_admission_retry_after)},
+        ) from None
+
     # Record this upload in DB
     try:
         new_upload = StudyUpload(
             upload_id=str(response.upload_id),
-            study_instance_uid="PENDING",  # We don't have it yet
-            patient_id=payload.study_metadata.patient_name,  # Proxy
+            study_instance_uid="PENDING",  # Filled in by complete_upload
+            patient_id=payload.study_metadata.patient_name,  # Proxy until then
             study_hash=study_hash,
             user_id=None,  # We have username "sub" but not UUID here easily without query.
             # User table has UUID. 'user' dict has 'sub' (username).
             # Skip user linkage for now or query it.
         )
-        session_db.add(new_upload)
-        session_db.commit()
+        await duplicate_detector.record(db, new_upload)
     except Exception as e:
         logger.error(f"Failed to record upload stats: {e}")
         # Don't fail the upload just because stat recording failed
@@ -130,18 +136,57 @@ async def initialize_upload(
     return response
 
 
+def _disk_busy() -> HTTPException:
+    """Response for chunk writes shed because the disk write queue is full."""
+    return HTTPException(
+        status_code=503,
+        detail="Storage is busy, please retry this chunk",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _chunk_decoder(
+    request: Request, session: UploadSession, max_bytes: int | None = None
+) -> ChunkDecoder:
+    """
+    Decoder for the request's Content-Encoding, or 415 if it is not supported.
+
+    Output is capped at what is left of the upload size limit, and at
+    max_bytes when the body is a single chunk.
+    """
+    encoding = request.headers.get("content-encoding", "").strip().lower() or IDENTITY
+    if encoding != IDENTITY and encoding not in supported_encodings():
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported Content-Encoding '{encoding}'. "
+            f"Supported: {', '.join(supported_encodings())}",
+        )
+    # Decompression bomb guard: nothing may decode past the upload size limit
+    remaining = settings.max_file_size_mb * 1024 * 1024 - session.uploaded_bytes
+    if max_bytes is not None:
+        remaining = min(remaining, max_bytes)
+    return ChunkDecoder(encoding, max(remaining, 0))
+
+
 @router.put("/{upload_id}/chunk", response_model=ChunkUploadResponse)
 @limiter.limit("2000/minute")
-async def upload_chunk(
+async def upload_chunk(  # noqa: PLR0913
     upload_id: UUID,
     chunk_index: int,
     file_id: str,
     request: Request,
+    total_chunks: int | None = Query(None, gt=0),
     token: dict[str, Any] = Depends(get_upload_token),
+    x_chunk_checksum: str | None = Header(None),
 ) -> ChunkUploadResponse | Response:
     """
     Upload a binary chunk.
-    Expects raw binary body (application/octet-stream).
+    Expects raw binary body (application/octet-stream), optionally sent with
+    Content-Encoding: zstd or gzip. The checksum covers the decoded bytes and
+    uses the algorithm negotiated at init; send it in X-Chunk-Checksum to have
+    the chunk rejected on mismatch, or compare it with the one returned.
+    Passing total_chunks (when the init manifest didn't) lets the file be
+    assembled as soon as its last chunk arrives.
     """
     # Verify token scope matches upload_id
     if token.get("sub") != str(upload_id):
@@ -151,94 +196,133 @@ async def upload_chunk(
     if not session:
         raise HTTPException(status_code=404, detail="Upload session not found")
 
-    # Idempotency check: If chunk exists, skip write but ensure session tracking
-    chunk_exists = await storage_service.chunk_exists(str(upload_id), file_id, chunk_index)
-
-    received_bytes = 0
-    if chunk_exists:
-        # Check if already registered in session
-        if chunk_index in session.files.get(file_id, {}).get("chunks", set()):
-            # Fully idempotent case: physical file exists AND logical record exists
-            return Response(status_code=204)  # No Content
-
-        # Physical file exists but logic doesn't -> Update logic only
-        # We need to know the size though. For now, trust the client or stat the file?
-        # To be safe, if we don't have the body size, we might just register it.
-        # Ideally we'd get size from storage.
-        # For MVP: if physical exists, we assume it's good.
-        # But we need 'received_bytes' for the response.
-        # Let's read request body size anyway to return it?
-        # The protocol for 204 doesn't return body.
-        pass  # Fall through to logic registration, but skip save?
-        # Actually proper 204 doesn't return response model.
-        # But we defined response_model=ChunkUploadResponse.
-        # So maybe return 200 with "skipped" status?
-        # Or change return type.
-
-    body = await request.body()
+    # The body is joined in memory, so it may not decode past one chunk
+    decoder = _chunk_decoder(request, session, settings.chunk_size_mb * 1024 * 1024)
+    try:
+        body = b"".join([piece async for piece in decode_stream(request.stream(), decoder)])
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except ChunkUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     if not body:
         raise HTTPException(status_code=400, detail="Empty body")
 
-    received_bytes = len(body)
+    if total_chunks:
+        session.set_manifest(file_id, total_chunks)
 
-    # Calculate MD5 checksum for integrity validation
-    chunk_checksum = hashlib.md5(body).hexdigest()
+    # Idempotent: a chunk that is already stored is registered but not rewritten
+    try:
+        status = await store_chunk(
+            storage_service, session, file_id, chunk_index, body, x_chunk_checksum
+        )
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except ChunkUploadError as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    except DiskWriterBusyError:
+        raise _disk_busy() from None
+
+    if status == "skipped":
+        return Response(status_code=204)  # No Content
+
+    session.record_transfer(decoder.wire_bytes, decoder.decoded_bytes)
+    upload_manager.update_session(session)  # Persist state
 
-    if not chunk_exists:
-        # Save chunk to storage
-        await storage_service.save_chunk(str(upload_id), file_id, chunk_index, body)
+    return ChunkUploadResponse(
+        upload_id=upload_id,
+        file_id=file_id,
+        chunk_index=chunk_index,
+        received_bytes=len(body),
+        status=status,
+        checksum=session.recorded_checksum(file_id, chunk_index),
+    )
 
-        # CRITICAL: Verify chunk was written correctly
-        # This prevents silent data loss if write fails mid-operation
-        chunk_verified = await storage_service.verify_chunk(
-            str(upload_id), file_id, chunk_index, received_bytes
-        )
 
-        if not chunk_verified:
-            # Chunk write failed or corrupted - delete partial file and fail fast
-            try:
-                # Attempt to delete corrupted chunk
-                chunk_path = (
-                    storage_service.base_path
-                    / str(upload_id)
-                    / str(file_id)
-                    / f"{chunk_index}.part"
-                )
-                if hasattr(storage_service, "base_path") and chunk_path.exists():
-                    chunk_path.unlink()
-            except Exception:
-                pass  # Deletion is best-effort
-
-            raise HTTPException(
-                status_code=500,
-                detail=f"Chunk {chunk_index} write verification failed. Expected {received_bytes} bytes. Please retry upload.",
-            )
+@router.post("/{upload_id}/chunks", response_model=ChunkBatchResponse)
+@limiter.limit("200/minute")
+async def upload_chunk_batch(
+    upload_id: UUID,
+    request: Request,
+    token: dict[str, Any] = Depends(get_upload_token),
+) -> ChunkBatchResponse:
+    """
+    Upload many chunks in one request.
+
+    The body is a sequence of length-prefixed records (see app.upload.chunks),
+    each carrying file_id, chunk_index, size, an optional checksum (or md5) and
+    the chunk data.
+    The whole body may be sent with Content-Encoding: zstd or gzip.
+    Records are written to storage as they arrive and the session is persisted
+    once per batch. Per-record outcomes are returned in request order.
+    """
+    if token.get("sub") != str(upload_id):
+        raise HTTPException(status_code=403, detail="Token mismatch for this upload session")
 
-    # Register chunk with checksum for integrity validation during merge
-    session.register_file_chunk(
-        file_id, chunk_index, received_bytes if not chunk_exists else 0, chunk_checksum
-    )
-    upload_manager.update_session(session)  # Persist state
+    session = upload_manager.get_session(str(upload_id))
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
 
-    if chunk_exists:
-        # Return 200 OK with data, but knowing we skipped write
-        return ChunkUploadResponse(
-            upload_id=upload_id,
-            file_id=file_id,
-            chunk_index=chunk_index,
-            received_bytes=received_bytes,
-            status="exists",
+    decoder = _chunk_decoder(request, session)
+    try:
+        return await store_chunk_batch(
+            storage_service,
+            session,
+            decode_stream(request.stream(), decoder),
+            max_chunk_bytes=settings.chunk_size_mb * 1024 * 1024,
+            max_records=settings.upload_batch_max_chunks,
         )
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except ChunkUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except DiskWriterBusyError:
+        raise _disk_busy() from None
+    finally:
+        # Keep whatever was stored before a framing error
+        session.record_transfer(decoder.wire_bytes, decoder.decoded_bytes)
+        upload_manager.update_session(session)
+
+
+@router.post("/{upload_id}/chunks/preflight", response_model=ChunkPreflightResponse)
+@limiter.limit("200/minute")
+async def preflight_chunks(
+    upload_id: UUID,
+    payload: ChunkPreflightRequest,
+    request: Request,
+    token: dict[str, Any] = Depends(get_upload_token),
+) -> ChunkPreflightResponse:
+    """
+    Check chunk digests before sending data.
 
-    return ChunkUploadResponse(
-        upload_id=upload_id, file_id=file_id, chunk_index=chunk_index, received_bytes=received_bytes
-    )
+    Chunks the server already holds (from this user's uploads) are attached to
+    this upload without transferring them; only the "missing" ones need to be
+    uploaded.
+    """
+    if token.get("sub") != str(upload_id):
+        raise HTTPException(status_code=403, detail="Token mismatch for this upload session")
+
+    session = upload_manager.get_session(str(upload_id))
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    try:
+        result = await attach_known_chunks(storage_service, session, payload.chunks)
+    except DiskWriterBusyError:
+        raise _disk_busy() from None
+    finally:
+        upload_manager.update_session(session)
+    return result
 
 
 @router.post("/{upload_id}/complete", response_model=UploadCompleteResponse)
 @limiter.limit("10/minute")
 async def complete_upload(  # noqa: PLR0912, PLR0915
-    request: Request, upload_id: UUID, token: dict[str, Any] = Depends(get_upload_token)
+    request: Request,
+    upload_id: UUID,
+    token: dict[str, Any] = Depends(get_upload_token),
+    db: AsyncSession = Depends(get_async_db),
 ) -> UploadCompleteResponse:
     """
     Finalize the upload.
@@ -265,49 +349,87 @@ async def complete_upload(  # noqa: PLR0912, PLR0915
     failed_count = 0
     warnings = []
     merged_paths: list[Path | str] = []
+    instance_keys: list[tuple[str, str] | None] = []
 
-    for file_id, file_data in session.files.items():
-        try:
-            # Get total chunks for this file (highest index + 1)
-            total_chunks = max(file_data["chunks"]) + 1
-
-            # Get checksums for validation (if available)
-            checksums = file_data.get("checksums", {})
-
-            # Merge chunks with checksum validation
-            final_path = await storage_service.merge_chunks(
-                str(upload_id), file_id, total_chunks, checksums
-            )
+    # Files with a manifest were assembled in the background as their last chunk landed
+    await file_assembler.wait(str(upload_id))
 
-            # 2. Validate DICOMs (Safe mode by default)
-            dicom_service.extract_metadata(final_path)
+    for file_id, file_data in session.files.items():
+        final_path = file_data.get("path") if file_data.get("complete") else None
+        error = file_data.get("error") if file_data.get("complete") else None
+        if final_path:
+            # A tiered spool may have moved the file to S3 already
+            try:
+                final_path = await storage_service.local_copy(str(upload_id), file_id, final_path)
+            except Exception as e:
+                logger.warning(f"Could not fetch merged file {file_id}: {e!s}")
+        if not file_data.get("complete") or (final_path and not Path(final_path).exists()):
+            # 2. Merge and validate DICOMs (Safe mode by default)
+            try:
+                final_path = await assemble_file(storage_service, session, file_id)
+                error = None
+            except Exception as e:
+                # Storage errors, checksum/manifest mismatches and DICOM processing errors
+                error = assembly_error(str(upload_id), file_id, e)
 
+        if error or not final_path:
+            failed_count += 1
+            warnings.append(error or f"File {file_id} was not assembled")
+        else:
             processed_count += 1
             merged_paths.append(final_path)
-        except OSError as e:
-            # Storage/file system errors
-            failed_count += 1
-            error_msg = f"Storage error for file {file_id}: {type(e).__name__}: {e!s}"
-            warnings.append(error_msg)
-            logger.error(
-                error_msg, exc_info=True, extra={"upload_id": str(upload_id), "file_id": file_id}
-            )
+            # Computed on assembly; files of sessions persisted before that are keyed here
+            if "instance_key" in file_data:
+                instance_keys.append(file_data["instance_key"])
+            else:
+                instance_keys.append(await asyncio.to_thread(instance_key, final_path))
+
+    # Second duplicate pass on the identifiers parsed from the files
+    study_uid = "UNKNOWN"
+    duplicate_of_upload_id = None
+    if merged_paths:
+        try:
+            study_uid, patient_id = dicom_service.extract_study_identifiers(merged_paths[0])
+            if study_uid and patient_id:
+                duplicate = await duplicate_detector.find_by_identity(
+                    db, str(upload_id), study_uid, patient_id
+                )
+                if duplicate:
+                    duplicate_of_upload_id = str(duplicate.upload_id)
+                    warnings.append(
+                        "Duplicate study: same StudyInstanceUID and PatientID uploaded on "
+                        f"{duplicate.created_at.strftime('%Y-%m-%d')}"
+                    )
+            study_uid = study_uid or "UNKNOWN"
         except Exception as e:
-            # DICOM processing errors from extract_metadata
-            failed_count += 1
-            error_msg = f"DICOM processing error for file {file_id}: {type(e).__name__}: {e!s}"
-            warnings.append(error_msg)
-            logger.error(
-                error_msg, exc_info=True, extra={"upload_id": str(upload_id), "file_id": file_id}
+            logger.warning(
+                f"Duplicate identity check failed: {e}", extra={"upload_id": str(upload_id)}
             )
-            # Note: This still catches all exceptions but logs them properly
-            # for debugging. In future, pydicom should raise specific exceptions.
 
-    # 3. Queue for PACS forwarding
+    # 3. Queue for PACS forwarding, skipping instances the PACS already accepted
     pacs_receipt_id = None
-    if processed_count > 0:
+    forwarded = await asyncio.to_thread(
+        dedup_index.already_forwarded, settings.active_pacs, [key for key in instance_keys if key]
+    )
+    pending = [
+        (path, key)
+        for path, key in zip(merged_paths, instance_keys, strict=True)
+        if key not in forwarded
+    ]
+    to_forward = [path for path, _ in pending]
+    if len(to_forward) < len(merged_paths):
+        warnings.append(
+            f"{len(merged_paths) - len(to_forward)} instance(s) already forwarded to PACS; "
+            "not sent again"
+        )
+    if to_forward:
         try:
-            pacs_receipt_id = pacs_service.forward_files(merged_paths)
+            pacs_receipt_id = pacs_service.forward_files(to_forward)
+            await asyncio.to_thread(
+                dedup_index.mark_forwarded,
+                settings.active_pacs,
+                [key for _, key in pending if key],
+            )
         except (ConnectionError, TimeoutError) as e:
             # Network/connection errors to PACS
             error_msg = f"PACS connection failed: {type(e).__name__}: {e!s}"
@@ -323,7 +445,7 @@ async def complete_upload(  # noqa: PLR0912, PLR0915
     status = "success"
     if failed_count > 0:
         status = "partial_success" if processed_count > 0 else "failed"
-    if failed_count == 0 and pacs_receipt_id is None and processed_count > 0:
+    if failed_count == 0 and pacs_receipt_id is None and to_forward:
         # Forwarding failed but files were processed
         status = "partial_success"
 
@@ -343,15 +465,6 @@ async def complete_upload(  # noqa: PLR0912, PLR0915
             from app.models.report import NotificationType, Report, ReportStatus
             from app.notifications.service import notification_service
 
-            # Extract Study Instance UID from first DICOM file
-            study_uid = "UNKNOWN"
-            if merged_paths:
-                try:
-                    metadata = dicom_service.extract_metadata(merged_paths[0])
-                    study_uid = metadata.get("StudyInstanceUID", "UNKNOWN")
-                except Exception:
-                    pass
-
             # Create report record
             report = Report(
                 upload_id=upload_id,
@@ -375,6 +488,24 @@ async def complete_upload(  # noqa: PLR0912, PLR0915
             # Log error but don't fail the upload
             warnings.append(f"Notification creation failed: {e!s}")
 
+    elif merged_paths and not to_forward:
+        # The PACS accepted every instance on an earlier upload, whose report
+        # covers this study: succeed without a new report, but tell the user
+        try:
+            from app.models.report import NotificationType
+            from app.notifications.service import notification_service
+
+            pat_name = session.metadata.patient_name if session.metadata else "Unknown"
+            await notification_service.create_and_broadcast(
+                user_id=user_id,
+                notification_type=NotificationType.UPLOAD_COMPLETE,
+                title="Upload Complete",
+                message=f"Study '{pat_name}' uploaded successfully; already in PACS",
+                upload_id=upload_id,
+            )
+        except Exception as e:
+            warnings.append(f"Notification creation failed: {e!s}")
+
     elif status == "failed":
         # Send failure notification
         try:
@@ -404,26 +535,57 @@ async def complete_upload(  # noqa: PLR0912, PLR0915
         failed_files=failed_count,
         pacs_receipt_id=pacs_receipt_id,
         warnings=warnings,
+        duplicate_of_upload_id=duplicate_of_upload_id,
     )
 
 
-@router.get("/stats")
-async def get_upload_stats(
-    period: str | None = None, user: dict[str, Any] = Depends(get_current_user)
-) -> dict[str, Any]:
-    """Get aggregated upload statistics (cached for 60s)"""
-    from app.cache import cache_service
+async def _read_stats(
+    period: str | None, days: int | None = None
+) -> tuple[dict[str, Any], dict[str, dict[str, int]]]:
+    """
+    Stats for period, plus the daily counts of the last ``days`` days when given.
 
-    cache_key = f"stats:{period or 'all'}"
-    if cached_data := await cache_service.get(cache_key):
-        return cached_data
+    Both are cached under stats: for stats_cache_ttl_seconds (in-process and
+    in Redis), fetched in one MGET and refilled in one pipelined write.
+    """
+    keys = {"summary": f"stats:{period or 'all'}"}
+    if days:
+        keys["daily"] = f"stats:daily:{days}"
+    try:
+        cached = await cache_service.mget(list(keys.values()))
+    except Exception as e:
+        logger.warning(f"Stats cache read failed: {e}")
+        cached = {}
+
+    missed: dict[str, Any] = {}
+    summary = cached.get(keys["summary"])
+    if summary is None:
+        # Flushing buffered events and reading SQLite both block
+        summary = missed[keys["summary"]] = await asyncio.to_thread(stats_manager.get_stats, period)
+    daily: dict[str, dict[str, int]] = {}
+    if days:
+        if keys["daily"] in cached:
+            daily = cached[keys["daily"]]
+        else:
+            daily = missed[keys["daily"]] = await asyncio.to_thread(
+                stats_manager.get_daily_counts, days
+            )
 
-    stats = stats_manager.get_stats(period)
+    if missed:
+        try:
+            await cache_service.mset(missed, expire=settings.stats_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Stats cache write failed: {e}")
+    return summary, daily
 
-    # Cache for 60 seconds
-    await cache_service.set(cache_key, stats, expire=60)
 
-    return stats
+@router.get("/stats")
+async def get_upload_stats(
+    period: str | None = None, user: dict[str, Any] = Depends(get_current_user)
+) -> dict[str, Any]:
+    """Get aggregated upload statistics (cached for a few seconds)"""
+    summary, _ = await _read_stats(period)
+    return summary
 
 
 @router.get("/{upload_id}/status", response_model=UploadStatusResponse)
@@ -449,10 +611,18 @@ async def get_status(
         total_bytes=total_bytes,
         state="uploading",
         chunks_received=total_received_chunks,
-        chunks_total=0,
+        chunks_total=sum(entry["total_chunks"] for entry in session.manifest.values()),
         pacs_status="pending",
+        wire_bytes=session.wire_bytes,
+        compression_ratio=session.compression_ratio,
+        deduplicated_bytes=session.deduplicated_bytes,
         files={
-            fid: {"received_chunks": list(data["chunks"]), "complete": data["complete"]}
+            fid: {
+                "received_chunks": list(data["chunks"]),
+                "total_chunks": session.expected_chunks(fid),
+                "complete": data["complete"],  # Assembled and validated (or failed: see error)
+                "error": data.get("error"),
+            }
             for fid, data in session.files.items()
         },
     )
@@ -468,8 +638,7 @@ async def export_statistics(
 
     Returns CSV file for download with statistics breakdown.
     """
-    # Get stats using existing stats_manager
-    stats_data = stats_manager.get_stats(period)
+    stats_data, _ = await _read_stats(period)
 
     # Convert to CSV
     csv_content = export_stats_to_csv(stats_data)
@@ -493,14 +662,45 @@ async def get_trend_data(
 
     Returns daily upload counts for the specified period.
     """
-    # Get current stats
-    stats_data = stats_manager.get_stats(period)
-
-    # Generate trend data (currently mock, will be replaced with DB queries)
-    trend_data = generate_trend_data(stats_data, period)
+    # Summary and daily series both come from the pre-aggregated rollups
+    stats_data, daily_counts = await _read_stats(period, trend_days(period))
+    trend_data = generate_trend_data(daily_counts, period)
 
     return {
         "period": period,
         "data": trend_data,
         "summary": stats_data,
     }
+
+
+@router.get("/stats/history")
+async def export_upload_history(
+    source: Literal["stats", "studies"] = "stats",
+    format: Literal["csv", "parquet"] = "csv",
+    start: date | None = None,
+    end: date | None = None,
+    user: dict[str, Any] = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream row-level upload history as CSV or Parquet.
+
+    ``source`` selects upload completion events ("stats") or initialized
+    studies ("studies"); ``start``/``end`` are inclusive UTC dates. Rows are
+    read in batches, so memory use does not grow with the date range.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    if source == "stats":
+        # Include events still buffered in this worker
+        stats_manager.flush()
+
+    range_label = f"{start or 'begin'}_{end or 'now'}"
+    filename = f"relaypacs_{source}_{range_label}.{format}"
+    return StreamingResponse(
+        export_history(source, format, stats_manager.db_path, start, end),
+        media_type="text/csv" if format == "csv" else "application/vnd.apache.parquet",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -1,5 +1,9 @@
+import asyncio
+import heapq
 import json
+import logging
 import sqlite3
+import threading
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
@@ -7,10 +11,13 @@ from uuid import uuid4
 
 from app.auth.utils import create_upload_token
 from app.config import get_settings
-from app.models.upload import StudyMetadata, UploadInitResponse
-from app.storage.service import BaseStorageService
+from app.models.upload import FileManifest, StudyMetadata, UploadInitResponse
+from app.storage.checksum import default_checksum, supported_checksums
+from app.storage.service import BaseStorageService, disk_capacity
+from app.upload.encoding import supported_encodings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 class UploadSession:
@@ -30,9 +37,48 @@ class UploadSession:
         self.total_files = total_files
         self.total_size_bytes = total_size_bytes
         self.uploaded_bytes = 0
+        # Request body bytes as sent and after Content-Encoding was removed
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        # Chunk bytes satisfied from blobs already on storage
+        self.deduplicated_bytes = 0
         self.created_at = datetime.now(UTC)
         self.expires_at = self.created_at + timedelta(minutes=settings.upload_token_expire_minutes)
         self.files: dict[str, dict[str, Any]] = {}  # Track chunks per file
+        # Algorithm of every checksum in files[...]["checksums"]
+        self.checksum_algorithm = default_checksum()
+        # file_id -> {"size_bytes", "total_chunks", "sha256"} declared by the client
+        self.manifest: dict[str, dict[str, Any]] = {}
+
+    def set_manifest(
+        self,
+        file_id: str,
+        total_chunks: int,
+        size_bytes: int | None = None,
+        sha256: str | None = None,
+    ) -> None:
+        """Declare a file's shape; the first declaration wins."""
+        self.manifest.setdefault(
+            file_id, {"size_bytes": size_bytes, "total_chunks": total_chunks, "sha256": sha256}
+        )
+
+    def expected_chunks(self, file_id: str) -> int | None:
+        """Chunk count from the manifest, or None when the client didn't declare one."""
+        entry = self.manifest.get(file_id)
+        return entry["total_chunks"] if entry else None
+
+    def ready_to_assemble(self, file_id: str) -> bool:
+        """True once every chunk of a file with a known chunk count has been registered."""
+        total = self.expected_chunks(file_id)
+        info = self.files.get(file_id)
+        return bool(
+            total and info and not info["complete"] and info["chunks"].issuperset(range(total))
+        )
+
+    def recorded_checksum(self, file_id: str, chunk_index: int) -> str | None:
+        """Digest recorded for a chunk at ingest, in checksum_algorithm."""
+        checksum: str | None = self.files.get(file_id, {}).get("checksums", {}).get(chunk_index)
+        return checksum
 
     def register_file_chunk(
         self, file_id: str, chunk_index: int, chunk_size: int, checksum: str | None = None
@@ -53,12 +99,69 @@ class UploadSession:
             if checksum:
                 self.files[file_id]["checksums"][chunk_index] = checksum
 
+    def record_transfer(self, wire_bytes: int, decoded_bytes: int) -> None:
+        """Account for one request body, compressed or not."""
+        self.wire_bytes += wire_bytes
+        self.decoded_bytes += decoded_bytes
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """Decoded bytes per byte on the wire, across all chunk requests so far."""
+        return round(self.decoded_bytes / self.wire_bytes, 2) if self.wire_bytes else None
+
+
+class SessionTable(dict[str, UploadSession]):
+    """
+    Sessions by upload_id, plus a min-heap on expires_at so expired sessions
+    are found without scanning the live ones.
+
+    Heap entries are dropped lazily: an entry whose session was removed or
+    re-indexed with a new expiry is skipped when it reaches the top.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._expiry: list[tuple[datetime, str]] = []
+        self._indexed: dict[str, datetime] = {}
+
+    def __setitem__(self, upload_id: str, session: UploadSession) -> None:
+        super().__setitem__(upload_id, session)
+        self.reindex(upload_id)
+
+    def __delitem__(self, upload_id: str) -> None:
+        super().__delitem__(upload_id)
+        self._indexed.pop(upload_id, None)
+
+    def reindex(self, upload_id: str) -> None:
+        """Index a session's current expires_at (after it changed, or to retry its cleanup)."""
+        session = self.get(upload_id)
+        if session is not None and self._indexed.get(upload_id) != session.expires_at:
+            self._indexed[upload_id] = session.expires_at
+            heapq.heappush(self._expiry, (session.expires_at, upload_id))
+
+    def pop_expired(self, now: datetime, limit: int | None = None) -> list[str]:
+        """Take up to limit upload_ids that expired before now, earliest first, off the index."""
+        expired: list[str] = []
+        while self._expiry and self._expiry[0][0] < now and (limit is None or len(expired) < limit):
+            expires_at, upload_id = heapq.heappop(self._expiry)
+            if self._indexed.get(upload_id) != expires_at:
+                continue  # Stale entry
+            del self._indexed[upload_id]
+            session = self.get(upload_id)
+            if session is None:
+                continue
+            if session.expires_at >= now:
+                self.reindex(upload_id)  # Extended without being re-indexed
+                continue
+            expired.append(upload_id)
+        return expired
+
 
 class UploadManager:
     """Session manager with JSON-based persistence"""
 
     def __init__(self, persistence_dir: Path | str = "data/sessions") -> None:
-        self._sessions: dict[str, UploadSession] = {}
+        self._sessions = SessionTable()
         self.persistence_dir = Path(persistence_dir)
         self.persistence_dir.mkdir(parents=True, exist_ok=True)
         self._load_sessions()
@@ -76,6 +179,10 @@ class UploadManager:
             "total_files": session.total_files,
             "total_size_bytes": session.total_size_bytes,
             "uploaded_bytes": session.uploaded_bytes,
+            "wire_bytes": session.wire_bytes,
+            "decoded_bytes": session.decoded_bytes,
+            "deduplicated_bytes": session.deduplicated_bytes,
+            "checksum_algorithm": session.checksum_algorithm,
             "created_at": session.created_at.isoformat(),
             "expires_at": session.expires_at.isoformat(),
             "files": {
@@ -83,43 +190,65 @@ class UploadManager:
                     "chunks": list(info["chunks"]),
                     "checksums": info.get("checksums", {}),
                     "complete": info["complete"],
+                    "path": info.get("path"),
+                    "error": info.get("error"),
+                    **({"instance_key": info["instance_key"]} if "instance_key" in info else {}),
                 }
                 for fid, info in session.files.items()
             },
+            "manifest": session.manifest,
         }
         with open(self._get_session_path(session.upload_id), "w") as f:
             json.dump(data, f)
+        self._sessions.reindex(session.upload_id)
+
+    @staticmethod
+    def _read_session(session_file: Path) -> UploadSession:
+        """Rebuild a session from its persisted JSON"""
+        with open(session_file) as f:
+            data = json.load(f)
+
+        meta = StudyMetadata(**data["metadata"])
+        session = UploadSession(
+            data["upload_id"],
+            data.get("user_id", "unknown"),
+            data["total_files"],
+            data["total_size_bytes"],
+            meta,
+            data.get("clinical_history"),
+        )
+        session.uploaded_bytes = data["uploaded_bytes"]
+        session.wire_bytes = data.get("wire_bytes", 0)
+        session.decoded_bytes = data.get("decoded_bytes", 0)
+        session.deduplicated_bytes = data.get("deduplicated_bytes", 0)
+        # Sessions saved before checksums were negotiable used MD5
+        session.checksum_algorithm = data.get("checksum_algorithm", "md5")
+        session.created_at = datetime.fromisoformat(data["created_at"])
+        session.expires_at = datetime.fromisoformat(data["expires_at"])
+
+        # Convert list back to set
+        files_data = data.get("files", {})
+        for fid, info in files_data.items():
+            session.files[fid] = {
+                "chunks": set(info["chunks"]),
+                # JSON object keys are strings; chunk indexes are ints
+                "checksums": {int(i): c for i, c in info.get("checksums", {}).items()},
+                "complete": info["complete"],
+                "path": info.get("path"),
+                "error": info.get("error"),
+            }
+            if "instance_key" in info:
+                # JSON has no tuples
+                key = info["instance_key"]
+                session.files[fid]["instance_key"] = tuple(key) if key else None
+        session.manifest = data.get("manifest", {})
+        return session
 
     def _load_sessions(self) -> None:
         """Load all valid sessions from disk"""
         for session_file in self.persistence_dir.glob("*.json"):
             try:
-                with open(session_file) as f:
-                    data = json.load(f)
-
-                # Reconstruct session
-                meta = StudyMetadata(**data["metadata"])
-                session = UploadSession(
-                    data["upload_id"],
-                    data.get("user_id", "unknown"),
-                    data["total_files"],
-                    data["total_size_bytes"],
-                    meta,
-                    data.get("clinical_history"),
-                )
-                session.uploaded_bytes = data["uploaded_bytes"]
-                session.created_at = datetime.fromisoformat(data["created_at"])
-                session.expires_at = datetime.fromisoformat(data["expires_at"])
-
-                # Convert list back to set
-                files_data = data.get("files", {})
-                for fid, info in files_data.items():
-                    session.files[fid] = {
-                        "chunks": set(info["chunks"]),
-                        "checksums": info.get("checksums", {}),
-                        "complete": info["complete"],
-                    }
-
+                session = self._read_session(session_file)
                 # Only add if not expired (or let cleanup handle it)
                 self._sessions[session.upload_id] = session
             except Exception as e:
@@ -132,11 +261,17 @@ class UploadManager:
         total_files: int,
         total_size_bytes: int,
         clinical_history: str | None = None,
+        files: list[FileManifest] | None = None,
+        checksum_algorithm: str | None = None,
     ) -> UploadInitResponse:
         upload_id = uuid4()
         session = UploadSession(
             str(upload_id), user_id, total_files, total_size_bytes, metadata, clinical_history
         )
+        for entry in files or []:
+            session.set_manifest(entry.file_id, entry.total_chunks, entry.size_bytes, entry.sha256)
+        if checksum_algorithm:
+            session.checksum_algorithm = checksum_algorithm
         self._sessions[str(upload_id)] = session
         self._save_session(session)
 
@@ -147,49 +282,127 @@ class UploadManager:
             upload_token=token,
             chunk_size=settings.chunk_size_mb * 1024 * 1024,
             expires_at=session.expires_at,
+            supported_encodings=supported_encodings(),
+            checksum_algorithm=session.checksum_algorithm,
+            supported_checksums=supported_checksums(),
         )
 
-    async def cleanup_expired_sessions(self, storage_service: BaseStorageService) -> int:
-        """Find and remove expired sessions and their files"""
-        now = datetime.now(UTC)
-        expired_ids = [uid for uid, session in self._sessions.items() if session.expires_at < now]
-
-        for uid in expired_ids:
-            # We need to await cleanup if it's async
-            await storage_service.cleanup_upload(uid)
+    async def cleanup_expired_sessions(
+        self, storage_service: BaseStorageService, limit: int | None = None
+    ) -> int:
+        """
+        Remove up to limit expired sessions and their files, earliest expiry first.
+
+        A session whose storage cleanup fails is kept and retried on the next call.
+        Returns the number of sessions removed.
+        """
+        removed = 0
+        for uid in self._sessions.pop_expired(datetime.now(UTC), limit):
+            try:
+                await storage_service.cleanup_upload(uid)
+            except Exception as e:
+                logger.error(f"Failed to clean up expired upload {uid}: {e}")
+                self._sessions.reindex(uid)
+                continue
             del self._sessions[uid]
+            await asyncio.to_thread(disk_capacity.release, uid)
             # Remove persistence file
             path = self._get_session_path(uid)
             if path.exists():
                 path.unlink()
+            removed += 1
+
+        return removed
+
+    def persisted_upload_ids(self) -> list[str]:
+        """Upload IDs with a session file, including sessions other processes created."""
+        return [path.stem for path in self.persistence_dir.glob("*.json")]
+
+    def read_persisted_session(self, upload_id: str) -> UploadSession | None:
+        """A session from its file, whether or not this process has it loaded."""
+        try:
+            return self._read_session(self._get_session_path(upload_id))
+        except FileNotFoundError:
+            return None
 
-        return len(expired_ids)
+    def has_session(self, upload_id: str) -> bool:
+        """Whether a session exists in this process or on disk."""
+        return upload_id in self._sessions or self._get_session_path(upload_id).exists()
 
     def get_session(self, upload_id: str) -> UploadSession | None:
         return self._sessions.get(str(upload_id))
 
     def remove_session(self, upload_id: str) -> None:
+        disk_capacity.release(str(upload_id))
         if str(upload_id) in self._sessions:
             del self._sessions[str(upload_id)]
-            path = self._get_session_path(upload_id)
-            if path.exists():
-                path.unlink()
+        # Also when another process created the session
+        path = self._get_session_path(upload_id)
+        if path.exists():
+            path.unlink()
 
     def update_session(self, session: UploadSession) -> None:
         """Explicitly trigger a save"""
         self._save_session(session)
 
 
-class StatsManager:
-    """Manager for upload statistics using SQLite for concurrency safety"""
+# Stats rollup tables and their bucket format (UTC, matching CURRENT_TIMESTAMP)
+STATS_ROLLUPS = {
+    "upload_stats_hourly": "%Y-%m-%d %H:00:00",
+    "upload_stats_daily": "%Y-%m-%d",
+}
+
 
-    def __init__(self, db_path: Path | str = "data/stats.db") -> None:
+def period_days(period: str | None) -> int | None:
+    """
+    Parse a stats period such as "7d", "2w", "1m" or "6m" into days.
+
+    Months count as 30 days. Returns None for "all" or unrecognised values.
+    """
+    if not period or not period[:-1].isdigit():
+        return None
+    unit_days = {"d": 1, "w": 7, "m": 30}.get(period[-1])
+    return int(period[:-1]) * unit_days if unit_days else None
+
+
+class StatsManager:
+    """
+    Upload statistics recorder backed by SQLite.
+
+    ``record_upload`` only appends to an in-memory buffer; buffered events
+    are written in one transaction when ``flush_size`` is reached, every
+    ``flush_interval`` seconds while the background task runs, on shutdown,
+    and before every read.
+
+    Every event row in ``upload_stats`` is also counted into hourly and daily
+    rollups (by modality, service level and status) by an insert trigger, so
+    the rollups stay correct however many processes write. Reads only touch
+    the rollups and cost O(days) rather than O(uploads). Events buffered by
+    other workers show up within one flush interval.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str = "data/stats.db",
+        flush_interval: float = 5.0,
+        flush_size: int = 500,
+    ) -> None:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._buffer: list[tuple[str, str, str, str]] = []
+        self._buffer_lock = threading.Lock()
+        # Serializes flushes so events are written in the order they were recorded
+        self._flush_lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._wake: asyncio.Event | None = None
         self._init_db()
 
     def _init_db(self) -> None:
         with sqlite3.connect(self.db_path) as conn:
+            # Readers don't block the writer when several workers share the file
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS upload_stats (
@@ -204,81 +417,225 @@ class StatsManager:
             # Metadata table for last updated
             conn.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
 
+            for table, bucket_format in STATS_ROLLUPS.items():
+                conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        bucket TEXT NOT NULL,
+                        modality TEXT NOT NULL,
+                        service_level TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (bucket, modality, service_level, status)
+                    ) WITHOUT ROWID
+                    """
+                )
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_rollup AFTER INSERT ON upload_stats
+                    BEGIN
+                        INSERT INTO {table} (bucket, modality, service_level, status, count)
+                        VALUES (
+                            strftime('{bucket_format}', NEW.timestamp),
+                            coalesce(NEW.modality, ''),
+                            coalesce(NEW.service_level, ''),
+                            coalesce(NEW.status, ''),
+                            1
+                        )
+                        ON CONFLICT (bucket, modality, service_level, status)
+                        DO UPDATE SET count = count + 1;
+                    END
+                    """
+                )
+
+        self._build_rollups()
+
+    def _build_rollups(self) -> None:
+        """Build the rollups from the events once, for databases created before they existed."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            # Take the write lock before checking, so workers starting together build once
+            conn.execute("BEGIN IMMEDIATE")
+            built = conn.execute("SELECT 1 FROM metadata WHERE key = 'rollups_built'").fetchone()
+            if not built:
+                for table, bucket_format in STATS_ROLLUPS.items():
+                    conn.execute(f"DELETE FROM {table}")
+                    conn.execute(
+                        f"""
+                        INSERT INTO {table} (bucket, modality, service_level, status, count)
+                        SELECT strftime('{bucket_format}', timestamp), coalesce(modality, ''),
+                               coalesce(service_level, ''), coalesce(status, ''), COUNT(*)
+                        FROM upload_stats GROUP BY 1, 2, 3, 4
+                        """
+                    )
+                conn.execute(
+                    "INSERT OR IGNORE INTO metadata (key, value) VALUES ('rollups_built', '1')"
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @property
+    def pending(self) -> int:
+        """Events recorded but not yet written."""
+        return len(self._buffer)
+
     def record_upload(self, modality: str, service_level: str, status: str = "success") -> None:
-        modality = modality.lower()
-        service_level = service_level.lower()
-        status = status.lower()
+        """Buffer one upload event; flushes once flush_size events are pending."""
+        event = (
+            modality.lower(),
+            service_level.lower(),
+            status.lower(),
+            # Same format as CURRENT_TIMESTAMP so rollup buckets line up
+            datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        with self._buffer_lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.flush_size
+
+        if full:
+            if self._wake is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def flush(self) -> int:
+        """Write buffered events in one transaction. Returns the number written."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                events, self._buffer = self._buffer, []
+            if not events:
+                return 0
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO upload_stats (modality, service_level, status) VALUES (?, ?, ?)",
-                (modality, service_level, status),
-            )
-            conn.execute(
-                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('last_updated', ?)",
-                (datetime.now(UTC).isoformat(),),
-            )
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    conn.executemany(
+                        "INSERT INTO upload_stats (modality, service_level, status, timestamp) "
+                        "VALUES (?, ?, ?, ?)",
+                        events,
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('last_updated', ?)",
+                        (datetime.now(UTC).isoformat(),),
+                    )
+            except sqlite3.Error:
+                # Keep the events for the next attempt
+                with self._buffer_lock:
+                    self._buffer[:0] = events
+                raise
+            return len(events)
+
+    async def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Failed to flush upload stats: {e}")
 
     def get_stats(self, period: str | None = None) -> dict[str, Any]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-
-            # Period mapping to SQLite interval
-            period_map = {
-                "1w": "-7 days",
-                "2w": "-14 days",
-                "1m": "-30 days",
-                "3m": "-90 days",
-                "6m": "-180 days",
-            }
-
-            time_filter = ""
-            params = []
-            if period and period in period_map:
-                time_filter = " AND timestamp >= datetime('now', ?)"
-                params.append(period_map[period])
-
-            # Aggregate modality counts
-            modalities = conn.execute(
-                "SELECT modality, COUNT(*) as count FROM upload_stats "
-                f"WHERE status = 'success'{time_filter} "
-                "GROUP BY modality",
-                params,
-            ).fetchall()
+        self.flush()
+        days = period_days(period)
+        if days is None:
+            rollup = "SELECT modality, service_level, status, count FROM upload_stats_daily"
+            params: list[str] = []
+        else:
+            # Whole days after the cutoff from the daily rollup, the cutoff's day by the hour
+            cutoff = datetime.now(UTC) - timedelta(days=days)
+            rollup = (
+                "SELECT modality, service_level, status, count FROM upload_stats_daily "
+                "WHERE bucket > ? "
+                "UNION ALL "
+                "SELECT modality, service_level, status, count FROM upload_stats_hourly "
+                "WHERE bucket >= ? AND bucket < ?"
+            )
+            params = [
+                cutoff.strftime("%Y-%m-%d"),
+                cutoff.strftime("%Y-%m-%d %H:00:00"),
+                (cutoff + timedelta(days=1)).strftime("%Y-%m-%d"),
+            ]
 
-            # Aggregate service level counts
-            service_levels = conn.execute(
-                "SELECT service_level, COUNT(*) as count FROM upload_stats "
-                f"WHERE status = 'success'{time_filter} "
-                "GROUP BY service_level",
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT modality, service_level, status, SUM(count) "
+                f"FROM ({rollup}) GROUP BY modality, service_level, status",
                 params,
             ).fetchall()
-
-            # Total counts
-            total_success = conn.execute(
-                f"SELECT COUNT(*) FROM upload_stats WHERE status = 'success'{time_filter}",
-                params,
-            ).fetchone()[0]
-
-            total_failed = conn.execute(
-                f"SELECT COUNT(*) FROM upload_stats WHERE status = 'failed'{time_filter}",
-                params,
-            ).fetchone()[0]
-
             last_updated = conn.execute(
                 "SELECT value FROM metadata WHERE key = 'last_updated'"
             ).fetchone()
 
-            return {
-                "modality": {row["modality"]: row["count"] for row in modalities},
-                "service_level": {row["service_level"]: row["count"] for row in service_levels},
-                "total_uploads": total_success,
-                "failed_uploads": total_failed,
-                "last_updated": last_updated[0] if last_updated else None,
-                "period": period or "all",
-            }
+        modalities: dict[str, int] = {}
+        service_levels: dict[str, int] = {}
+        totals: dict[str, int] = {}
+        for modality, service_level, status, count in rows:
+            totals[status] = totals.get(status, 0) + count
+            if status == "success":
+                modalities[modality] = modalities.get(modality, 0) + count
+                service_levels[service_level] = service_levels.get(service_level, 0) + count
+
+        return {
+            "modality": modalities,
+            "service_level": service_levels,
+            "total_uploads": totals.get("success", 0),
+            "failed_uploads": totals.get("failed", 0),
+            "last_updated": last_updated[0] if last_updated else None,
+            "period": period or "all",
+        }
+
+    def get_daily_counts(self, days: int) -> dict[str, dict[str, int]]:
+        """
+        Per-day upload counts by status for the last ``days`` days (UTC, today included).
+
+        Returns {"YYYY-MM-DD": {status: count}}; days without uploads are omitted.
+        """
+        self.flush()
+        start = (datetime.now(UTC) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT bucket, status, SUM(count) FROM upload_stats_daily "
+                "WHERE bucket >= ? GROUP BY bucket, status",
+                (start,),
+            ).fetchall()
+
+        counts: dict[str, dict[str, int]] = {}
+        for bucket, status, count in rows:
+            counts.setdefault(bucket, {})[status] = count
+        return counts
 
 
 # Singletons
 upload_manager = UploadManager()
-stats_manager = StatsManager("data/stats.db")
+stats_manager = StatsManager(
+    settings.stats_db_path,
+    flush_interval=settings.stats_flush_interval_seconds,
+    flush_size=settings.stats_flush_max_events,
+)
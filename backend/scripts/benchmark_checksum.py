@@ -0,0 +1,52 @@
+"""
+Microbenchmark for chunk integrity checksums.
+
+Hashes a study's worth of chunk-sized buffers with every installed algorithm
+and compares the per-study hashing cost of the previous pipeline (MD5 at
+ingest and again at merge, plus the SHA-256 content address) with the
+current one (session algorithm once, plus SHA-256). Disk I/O is excluded.
+Run from the backend directory:
+
+    SECRET_KEY=... python scripts/benchmark_checksum.py [study_mb]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import get_settings
+from app.storage.checksum import new_hasher, supported_checksums
+
+settings = get_settings()
+
+
+def seconds_per_study(algorithm: str, chunk: bytes, chunks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(chunks):
+        hasher = new_hasher(algorithm)
+        hasher.update(chunk)
+        hasher.hexdigest()
+    return time.perf_counter() - start
+
+
+def bench(study_mb: int = 2048) -> None:
+    chunk = os.urandom(settings.chunk_size_mb * 1024 * 1024)
+    chunks = study_mb // settings.chunk_size_mb
+    timings = {name: seconds_per_study(name, chunk, chunks) for name in supported_checksums()}
+
+    print(f"Chunk checksums ({study_mb} MB study, {len(chunk) // 1024} KB chunks)")
+    for name, elapsed in timings.items():
+        print(f"  {name:<8} {study_mb / elapsed:>8.0f} MB/s  {elapsed:6.2f} s/study")
+
+    legacy = 2 * timings["md5"] + timings["sha256"]
+    print(f"  Previous pipeline (md5 ingest + md5 merge + sha256): {legacy:6.2f} s/study")
+    for name in supported_checksums():
+        current = timings["sha256"] + (timings[name] if name != "sha256" else 0)
+        print(f"  Current with {name:<8} (+ sha256 address):        {current:6.2f} s/study")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2048)
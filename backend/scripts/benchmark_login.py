@@ -0,0 +1,85 @@
+"""
+Benchmark for password verification under a login burst.
+
+Simulates many concurrent logins (as at shift change) while a probe
+coroutine stands in for other requests and measures how late the event
+loop wakes it. Compares calling bcrypt inline in the handler with the
+bounded password hash pool. Run from the backend directory:
+
+    SECRET_KEY=... python scripts/benchmark_login.py
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.auth.password_hasher import PasswordHasher
+from app.auth.utils import hash_password, verify_password
+from app.config import get_settings
+
+
+def p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[98]
+
+
+async def run_burst(
+    verify: Callable[[str, str], Awaitable[bool]], logins: int, hashed: str
+) -> None:
+    login_times: list[float] = []
+    probe_lag: list[float] = []
+    done = asyncio.Event()
+
+    async def login(arrived: float) -> None:
+        # Latency as seen by the client: all logins arrive together
+        await verify("correct horse battery staple", hashed)
+        login_times.append((time.perf_counter() - arrived) * 1000)
+
+    async def probe() -> None:
+        # Stand-in for concurrent requests: how long past its 5ms sleep it wakes up
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            probe_lag.append((time.perf_counter() - start) * 1000 - 5)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login(start) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    print(f"    logins: p50 {statistics.median(login_times):.0f}ms, p99 {p99(login_times):.0f}ms")
+    print(
+        f"    other requests: worst stall {max(probe_lag):.0f}ms "
+        f"over {len(probe_lag)} probes during the burst"
+    )
+    print(f"    throughput: {logins / elapsed:.1f} logins/sec")
+
+
+async def main() -> None:
+    settings = get_settings()
+    hashed = hash_password("correct horse battery staple")
+    logins = 20
+
+    async def inline_verify(password: str, hashed_password: str) -> bool:
+        # Previous behaviour: bcrypt directly inside the async handler
+        return verify_password(password, hashed_password)
+
+    print(f"Login burst: {logins} concurrent logins, bcrypt cost {settings.bcrypt_rounds}")
+    print("  Inline bcrypt:")
+    await run_burst(inline_verify, logins, hashed)
+
+    hasher = PasswordHasher(settings.password_hash_workers, max_pending=logins)
+    print(f"  Worker pool ({settings.password_hash_workers} threads):")
+    await run_burst(hasher.verify, logins, hashed)
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Microbenchmark for notification fan-out.
+
+Measures the cost of broadcasting a notification to a user with many SSE
+connections (devices), and of a report-ready burst as produced by the PACS
+sync loop. Run from the backend directory:
+
+    SECRET_KEY=... python scripts/benchmark_notifications.py
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from sse_starlette.event import ServerSentEvent
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database.reports_db import reports_db
+from app.models.report import Notification, NotificationType, Report, ReportStatus
+from app.notifications.service import notification_service
+from app.reports.pacs_sync import pacs_sync_service
+from app.reports.pdf_cache import pdf_cache
+
+
+def legacy_fanout(notification: Notification, queues: list[asyncio.Queue[Any]]) -> None:
+    """Previous behaviour: build a dict, then json.dumps and frame per connection."""
+    event_data = {
+        "id": str(notification.id),
+        "type": notification.notification_type.value,
+        "title": notification.title,
+        "message": notification.message,
+        "related_upload_id": None,
+        "related_report_id": None,
+        "created_at": notification.created_at.isoformat(),
+    }
+    for queue in queues:
+        queue.put_nowait(event_data)
+    for queue in queues:
+        ServerSentEvent(json.dumps(queue.get_nowait()), event="notification").encode()
+
+
+async def bench_fanout(devices: int, iterations: int = 2000) -> None:
+    user_id = "bench-user"
+    queues: list[asyncio.Queue[Any]] = [asyncio.Queue() for _ in range(devices)]
+    notification = Notification(
+        user_id=user_id,
+        notification_type=NotificationType.REPORT_READY,
+        title="Report Ready",
+        message="Your radiology report for study 1.2.840.113619.2.278... is now available",
+    )
+
+    legacy_times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        legacy_fanout(notification, queues)
+        legacy_times.append((time.perf_counter() - start) * 1_000_000)
+
+    notification_service._connections[user_id] = queues
+    current_times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await notification_service._broadcast_to_user(user_id, notification)
+        for queue in queues:
+            queue.get_nowait()
+        current_times.append((time.perf_counter() - start) * 1_000_000)
+    del notification_service._connections[user_id]
+
+    print(f"Fan-out to {devices} devices ({iterations} iters)")
+    print(f"  Legacy (dict + dumps per connection): {statistics.median(legacy_times):.1f}us")
+    print(f"  Current (encode once, shared frame):  {statistics.median(current_times):.1f}us")
+
+
+def _create_reports(user_id: str, count: int) -> list[Report]:
+    reports = []
+    for i in range(count):
+        report = Report(upload_id=uuid4(), study_instance_uid=f"1.2.826.0.1.{i}", user_id=user_id)
+        reports_db.create_report(report)
+        reports.append(report)
+    return reports
+
+
+async def bench_report_ready_burst(reports: int, devices: int) -> None:
+    user_id = "bench-burst-user"
+    queues: list[asyncio.Queue[Any]] = [asyncio.Queue() for _ in range(devices)]
+    notification_service._connections[user_id] = queues
+
+    # Per-report path: read, update, re-read and notify, each on its own commit
+    per_report = _create_reports(user_id, reports)
+    start = time.perf_counter()
+    for report in per_report:
+        await pacs_sync_service.update_report_status(
+            str(report.id),
+            ReportStatus.READY,
+            {"report_url": f"/api/reports/{report.id}/download"},
+        )
+    sequential = time.perf_counter() - start
+
+    # Batched path used by the sync loop: one transaction for the whole cycle
+    batched_reports = _create_reports(user_id, reports)
+    start = time.perf_counter()
+    await pacs_sync_service.mark_reports_ready(batched_reports)
+    batched = time.perf_counter() - start
+    del notification_service._connections[user_id]
+
+    print(f"Report-ready burst: {reports} reports, {devices} devices")
+    print(f"  Per-report updates: {sequential * 1000:.1f}ms ({reports / sequential:.0f}/sec)")
+    print(f"  Batched cycle:      {batched * 1000:.1f}ms ({reports / batched:.0f}/sec)")
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep benchmark rows out of the real reports database
+        reports_db.db_path = str(Path(tmp) / "bench_reports.db")
+        reports_db._init_schema()
+        # Measure DB writes and fan-out only, not background PDF rendering
+        pdf_cache.max_pending = 0
+
+        for devices in (1, 10, 100):
+            await bench_fanout(devices)
+        print()
+        await bench_report_ready_burst(reports=2000, devices=5)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
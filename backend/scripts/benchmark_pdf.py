@@ -0,0 +1,138 @@
+"""
+Microbenchmark for PDF report rendering.
+
+Compares the previous renderer, which rebuilt styles and static layout on
+every call, with the current generator and its batch API. Run from the
+backend directory:
+
+    SECRET_KEY=... python scripts/benchmark_pdf.py
+"""
+
+import io
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.report import Report, ReportStatus
+from app.reports.pdf_service import pdf_generator
+
+
+def legacy_render(report: Report) -> bytes:
+    """Previous behaviour: build styles, table style and static flowables per call."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=24,
+        textColor=colors.HexColor("#1e40af"),
+        spaceAfter=30,
+    )
+    heading_style = ParagraphStyle(
+        "CustomHeading", parent=styles["Heading2"], fontSize=14, spaceAfter=12
+    )
+    story.append(Paragraph("RAD IOLOGY REPORT", title_style))
+    story.append(Spacer(1, 0.2 * inch))
+
+    metadata = [
+        ["Report ID:", str(report.id)],
+        ["Study Instance UID:", report.study_instance_uid],
+        ["Status:", report.status.value.upper()],
+        ["Created:", report.created_at.strftime("%B %d, %Y %I:%M %p")],
+        ["Updated:", report.updated_at.strftime("%B %d, %Y %I:%M %p")],
+    ]
+    if report.radiologist_name:
+        metadata.append(["Radiologist:", report.radiologist_name])
+    metadata_table = Table(metadata, colWidths=[2 * inch, 4 * inch])
+    metadata_table.setStyle(
+        TableStyle(
+            [
+                ("FONT", (0, 0), (0, -1), "Helvetica-Bold", 10),
+                ("FONT", (1, 0), (1, -1), "Helvetica", 10),
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#374151")),
+                ("TEXTCOLOR", (1, 0), (1, -1), colors.HexColor("#1f2937")),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+            ]
+        )
+    )
+    story.append(metadata_table)
+    story.append(Spacer(1, 0.3 * inch))
+    story.append(Paragraph("FINDINGS", heading_style))
+    for para in (report.report_text or "").split("\n\n"):
+        if para.strip():
+            story.append(Paragraph(para.strip(), styles["Normal"]))
+            story.append(Spacer(1, 0.1 * inch))
+    story.append(Spacer(1, 0.3 * inch))
+
+    footer_style = ParagraphStyle(
+        "Footer", parent=styles["Normal"], fontSize=8, textColor=colors.grey
+    )
+    footer_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+    story.append(Spacer(1, 0.5 * inch))
+    story.append(Paragraph(footer_text, footer_style))
+    story.append(Paragraph("RelayPACS - Secure DICOM Ingestion System", footer_style))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _make_reports(count: int) -> list[Report]:
+    return [
+        Report(
+            id=uuid4(),
+            upload_id=uuid4(),
+            study_instance_uid=f"1.2.840.113619.2.278.3.{i}",
+            status=ReportStatus.READY,
+            radiologist_name="Dr. Alice Smith",
+            report_text="Chest X-Ray shows no abnormalities.\n\nHeart size is normal.",
+            user_id="bench-user",
+        )
+        for i in range(count)
+    ]
+
+
+def bench(count: int = 500) -> None:
+    reports = _make_reports(count)
+    # Warm up font metrics and module-level caches
+    legacy_render(reports[0])
+    pdf_generator.generate_report_pdf(reports[0])
+
+    # The previous renderer also ASCII85-wrapped every compressed stream
+    rl_config.useA85 = 1
+    start = time.perf_counter()
+    for report in reports:
+        legacy_render(report)
+    legacy = time.perf_counter() - start
+    rl_config.useA85 = 0
+
+    start = time.perf_counter()
+    for report in reports:
+        pdf_generator.generate_report_pdf(report)
+    current = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pdf_generator.generate_report_pdfs(reports)
+    batch = time.perf_counter() - start
+
+    print(f"PDF rendering ({count} reports)")
+    print(f"  Legacy (styles rebuilt per call): {count / legacy:.0f} renders/sec")
+    print(f"  Current (prebuilt templates):     {count / current:.0f} renders/sec")
+    print(f"  Batch (generate_report_pdfs):     {count / batch:.0f} renders/sec")
+
+
+if __name__ == "__main__":
+    bench()
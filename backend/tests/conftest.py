@@ -22,7 +22,7 @@ app.storage.service.storage_service = LocalStorageService()
 import app.db.models  # noqa: E402
 from app.db.database import Base, get_db  # noqa: E402
 from app.main import app as fastapi_app  # noqa: E402
-from app.upload.service import upload_manager  # noqa: E402
+from app.upload.service import SessionTable, upload_manager  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 
 # Use absolute path for test database to avoid any confusion
@@ -130,6 +130,15 @@ def clean_storage():
         shutil.rmtree(test_path)
 
 
+@pytest.fixture
+def local_storage(tmp_path):
+    """Return a LocalStorageService instance using a temp directory."""
+    service = LocalStorageService()
+    service.base_path = tmp_path / "storage"
+    service.base_path.mkdir(parents=True, exist_ok=True)
+    return service
+
+
 @pytest.fixture
 def clean_upload_manager():
     """Reset the singleton upload manager and redirect persistence"""
@@ -144,7 +153,7 @@ def clean_upload_manager():
 
     # Patch
     upload_manager.persistence_dir = test_persistence
-    upload_manager._sessions = {}
+    upload_manager._sessions = SessionTable()
     # Re-ensure storage is correct
     upload_manager.storage = app.storage.service.storage_service
 
@@ -213,3 +222,23 @@ def auth_headers(client):
     response = client.post("/auth/login", json={"username": "admin", "password": "adminuser@123"})
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def isolated_dedup_index(tmp_path_factory, monkeypatch):
+    """Give every test an empty blob index and PACS forwarding ledger."""
+    from app.storage.dedup import dedup_index
+
+    monkeypatch.setattr(dedup_index, "db_path", tmp_path_factory.mktemp("dedup") / "dedup.db")
+    dedup_index._init_db()
+
+
+@pytest.fixture(autouse=True)
+def isolated_disk_capacity(tmp_path_factory, monkeypatch):
+    """Give every test an empty disk reservation table."""
+    from app.storage.service import disk_capacity
+
+    db_path = tmp_path_factory.mktemp("capacity") / "capacity.db"
+    monkeypatch.setattr(disk_capacity, "db_path", db_path)
+    monkeypatch.setattr(disk_capacity, "_consumed", {})
+    disk_capacity._init_db()
@@ -10,9 +10,18 @@ from fastapi import HTTPException, status
 @pytest.fixture
 def mock_db_session():
     session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    session.commit = AsyncMock()
     return session
 
 
+@pytest.fixture(autouse=True)
+def bloom_not_ready():
+    """Force the database path; the Bloom filter knows nothing of the mocked rows."""
+    with patch("app.upload.router.duplicate_detector.ready", False):
+        yield
+
+
 @pytest.fixture
 def mock_upload_manager():
     # Patch the reference in router directly
@@ -33,6 +42,7 @@ def mock_settings():
 @pytest.fixture
 def mock_storage_service():
     with patch("app.upload.router.storage_service") as mock:
+        mock.disk_bytes.return_value = 0  # Nothing to reserve against the real disk
         yield mock
 
 
@@ -57,7 +67,7 @@ async def test_duplicate_detection_found(
     existing_study = StudyUpload(
         upload_id="old-upload-id", study_hash="somehash", created_at=datetime.now(UTC)
     )
-    mock_db_session.query.return_value.filter.return_value.first.return_value = existing_study
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = existing_study
 
     # Executing initialize_upload should raise 409
     with pytest.raises(HTTPException) as exc:
@@ -88,7 +98,7 @@ async def test_duplicate_detection_override(
     existing_study = StudyUpload(
         upload_id="old-upload-id", study_hash="somehash", created_at=datetime.now(UTC)
     )
-    mock_db_session.query.return_value.filter.return_value.first.return_value = existing_study
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = existing_study
 
     # Executing should NOT raise exception
     response = await initialize_upload(request, payload, user, db=mock_db_session)
@@ -116,7 +126,7 @@ async def test_duplicate_detection_not_found(
     user = {"sub": "testuser"}
 
     # Mock DB query to return None (no duplicate)
-    mock_db_session.query.return_value.filter.return_value.first.return_value = None
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = None
 
     # Executing should NOT raise exception
     response = await initialize_upload(request, payload, user, db=mock_db_session)
@@ -1,4 +1,5 @@
 import asyncio
+import json
 from uuid import uuid4
 
 import pytest
@@ -114,7 +115,9 @@ async def test_notification_broadcast(sample_user_id):
     await notification_service._broadcast_to_user(sample_user_id, notif)
 
     # Verify queue received the event
-    data = await asyncio.wait_for(queue.get(), timeout=1.0)
+    frame = await asyncio.wait_for(queue.get(), timeout=1.0)
+    assert frame.startswith(b"event: notification\r\n")
+    data = json.loads(frame.decode().split("\r\n")[1].removeprefix("data: "))
     assert data["title"] == "Upload Done"
     assert data["type"] == "upload_complete"
 
@@ -54,7 +54,9 @@ async def test_s3_cleanup(mock_s3_client):
     service = S3StorageService()
     mock_s3 = mock_s3_client.return_value
 
-    mock_s3.list_objects.return_value = {"Contents": [{"Key": "k1"}, {"Key": "k2"}]}
+    mock_s3.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": "k1"}, {"Key": "k2"}]}
+    ]
 
     await service.cleanup_upload("upload1")
 
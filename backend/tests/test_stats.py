@@ -35,6 +35,7 @@ def test_record_upload(temp_db_file):
 def test_stats_persistence(temp_db_file):
     manager = StatsManager(db_path=str(temp_db_file))
     manager.record_upload("MR", "stat")
+    manager.flush()
 
     # Create new manager instance with same file
     manager2 = StatsManager(db_path=str(temp_db_file))
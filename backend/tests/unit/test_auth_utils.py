@@ -7,6 +7,7 @@ from app.auth.utils import (
     create_refresh_token,
     create_upload_token,
     hash_password,
+    password_needs_rehash,
     verify_password,
     verify_token,
 )
@@ -40,6 +41,17 @@ def test_verify_password_timing_attack_resistance():
     assert verify_password("", hashed) is False
 
 
+def test_hash_password_cost_factor():
+    """Test the bcrypt cost factor is configurable and detected for rehashing."""
+    hashed = hash_password("securepassword", rounds=4)
+    assert hashed.split("$")[2] == "04"
+    assert verify_password("securepassword", hashed) is True
+
+    assert password_needs_rehash(hashed, rounds=4) is False
+    assert password_needs_rehash(hashed, rounds=12) is True
+    assert password_needs_rehash("not-a-bcrypt-hash") is True
+
+
 def test_create_access_token():
     """Test access token creation."""
     data = {"sub": "testuser"}
@@ -0,0 +1,126 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.cache.service import CacheService, LocalCache, key_prefix
+
+
+@pytest.fixture
+def cache():
+    """CacheService wired to a mocked Redis client, with "stats:" in the local tier."""
+    service = CacheService()
+    service.local = LocalCache(ttl=60, max_size=100, prefixes=["stats:"])
+    client = MagicMock()
+    client.get = AsyncMock(return_value=None)
+    client.set = AsyncMock()
+    client.mget = AsyncMock()
+    client.delete = AsyncMock()
+    client.unlink = AsyncMock(side_effect=lambda *keys: len(keys))
+    service._redis = client
+    return service
+
+
+def test_key_prefix():
+    """Test metrics group keys by their first segment."""
+    assert key_prefix("stats:all") == "stats:"
+    assert key_prefix("user:alice") == "user:"
+    assert key_prefix("plainkey") == "(none)"
+
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_hot_keys(cache):
+    """Test repeated reads of a hot key skip Redis and return fresh copies."""
+    cache._redis.get.return_value = json.dumps({"total": 1})
+
+    first = await cache.get("stats:all")
+    first["total"] = 99
+    second = await cache.get("stats:all")
+
+    assert second == {"total": 1}
+    assert cache._redis.get.await_count == 1
+    assert cache.metrics.stats()["stats:"]["l1_hits"] == 1
+    assert cache.metrics.stats()["stats:"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_other_keys_always_hit_redis(cache):
+    """Test keys outside the local prefixes are read from Redis every time."""
+    cache._redis.get.return_value = "1"
+
+    await cache.get("user:alice")
+    await cache.get("user:alice")
+
+    assert cache._redis.get.await_count == 2
+    assert len(cache.local) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_local_tier(cache):
+    """Test delete drops the local copy as well as the Redis key."""
+    await cache.set("stats:all", {"total": 1})
+    await cache.delete("stats:all")
+
+    assert await cache.get("stats:all") is None
+    assert cache.metrics.stats()["stats:"]["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_mget_single_round_trip(cache):
+    """Test mget fetches all non-local keys with one MGET."""
+    await cache.set("stats:all", {"total": 1})
+    cache._redis.mget.return_value = ['{"a": 1}', None]
+
+    found = await cache.mget(["stats:all", "user:a", "user:b"])
+
+    assert found == {"stats:all": {"total": 1}, "user:a": {"a": 1}}
+    cache._redis.mget.assert_awaited_once_with(["user:a", "user:b"])
+
+
+@pytest.mark.asyncio
+async def test_mset_pipelines_writes(cache):
+    """Test mset sends every SET in one pipeline execution."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    cache._redis.pipeline.return_value = pipe
+
+    await cache.mset({"user:a": {"a": 1}, "user:b": "x"}, expire=30)
+
+    assert pipe.set.call_count == 2
+    pipe.set.assert_any_call("user:a", '{"a": 1}', ex=30)
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_clear_prefix_scans_and_unlinks_in_batches(cache, monkeypatch):
+    """Test prefix invalidation uses SCAN + batched UNLINK, never KEYS."""
+    monkeypatch.setattr("app.cache.service.UNLINK_BATCH_SIZE", 2)
+
+    async def scan_iter(match, count):
+        for key in ["stats:1", "stats:2", "stats:3"]:
+            yield key
+
+    cache._redis.scan_iter = scan_iter
+    cache._redis.keys = AsyncMock()
+    await cache.set("stats:1", "x")
+
+    removed = await cache.clear_prefix("stats:")
+
+    assert removed == 3
+    assert [call.args for call in cache._redis.unlink.await_args_list] == [
+        ("stats:1", "stats:2"),
+        ("stats:3",),
+    ]
+    cache._redis.keys.assert_not_called()
+    assert len(cache.local) == 0
+
+
+@pytest.mark.asyncio
+async def test_no_redis_is_a_miss():
+    """Test the service degrades to misses without a Redis URL."""
+    service = CacheService()
+    service.redis_url = None
+
+    await service.set("stats:all", {"total": 1})
+    assert await service.get("stats:all") is None
+    assert await service.mget(["stats:all"]) == {}
+    assert await service.clear_prefix("stats:") == 0
@@ -0,0 +1,93 @@
+import hashlib
+import zlib
+from uuid import uuid4
+
+import pytest
+from app.exceptions import ChecksumMismatchError
+from app.models.upload import StudyMetadata
+from app.storage import checksum
+from app.storage.checksum import chunk_checksum, negotiate_checksum, supported_checksums
+from app.upload.chunks import store_chunk
+from app.upload.service import UploadSession
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+def new_session(algorithm: str) -> UploadSession:
+    session = UploadSession(str(uuid4()), "user-1", 1, 100, SAMPLE_METADATA)
+    session.checksum_algorithm = algorithm
+    return session
+
+
+def test_builtin_algorithms_match_reference():
+    """Test the always-available algorithms produce the standard digests."""
+    assert chunk_checksum("md5", b"data") == hashlib.md5(b"data").hexdigest()
+    assert chunk_checksum("sha256", b"data") == hashlib.sha256(b"data").hexdigest()
+    assert chunk_checksum("crc32", b"data") == f"{zlib.crc32(b'data'):08x}"
+
+
+def test_unknown_algorithm_is_rejected():
+    """Test asking for an algorithm that isn't registered raises ValueError."""
+    with pytest.raises(ValueError):
+        chunk_checksum("sha1", b"data")
+
+
+@pytest.mark.parametrize(
+    "client, expected",
+    [
+        ([], "sha256"),  # Configured default
+        (["nope", "md5", "sha256"], "md5"),  # Client's first supported choice
+        (["nope"], None),
+    ],
+)
+def test_negotiate_checksum(client, expected):
+    """Test the session algorithm is the client's first supported preference."""
+    assert negotiate_checksum(client) == expected
+
+
+def test_unavailable_default_falls_back_to_fastest(monkeypatch):
+    """Test a configured algorithm that isn't installed falls back to the first supported."""
+    monkeypatch.setattr(checksum.settings, "upload_checksum_algorithm", "not-installed")
+
+    assert negotiate_checksum([]) == supported_checksums()[0]
+
+
+@pytest.mark.asyncio
+async def test_chunk_hashed_with_session_algorithm(local_storage):
+    """Test the recorded digest uses the session's algorithm."""
+    session = new_session("crc32")
+
+    await store_chunk(local_storage, session, "f1", 0, b"pixel data")
+
+    assert session.recorded_checksum("f1", 0) == f"{zlib.crc32(b'pixel data'):08x}"
+
+
+@pytest.mark.asyncio
+async def test_client_checksum_mismatch_is_rejected(local_storage):
+    """Test a chunk whose data doesn't match the client's checksum is not stored."""
+    session = new_session("md5")
+
+    with pytest.raises(ChecksumMismatchError):
+        await store_chunk(local_storage, session, "f1", 0, b"pixel data", "0" * 32)
+
+    assert session.files == {}
+    assert not await local_storage.chunk_exists(session.upload_id, "f1", 0)
+
+
+@pytest.mark.asyncio
+async def test_merge_verifies_recorded_checksums(local_storage):
+    """Test merging re-hashes chunks it was given checksums for."""
+    session = new_session("crc32")
+    await store_chunk(local_storage, session, "f1", 0, b"first")
+    await store_chunk(local_storage, session, "f1", 1, b"second")
+    checksums = session.files["f1"]["checksums"]
+
+    merged = await local_storage.merge_chunks(session.upload_id, "f1", 2, checksums, "crc32")
+    assert merged.read_bytes() == b"firstsecond"
+
+    # Corrupt a stored chunk behind the session's back
+    part = local_storage.base_path / session.upload_id / "f1" / "1.part"
+    part.unlink()
+    part.write_bytes(b"secont")
+    with pytest.raises(ChecksumMismatchError):
+        await local_storage.merge_chunks(session.upload_id, "f1", 2, checksums, "crc32")
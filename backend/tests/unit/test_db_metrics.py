@@ -0,0 +1,45 @@
+import pytest
+from app.db.database import pool_limits
+from app.db.metrics import DatabaseMetrics, TimedAsyncAdaptedQueuePool, instrument_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Swap in fresh metrics, without Prometheus registration."""
+    import app.db.metrics as metrics_module
+
+    monkeypatch.setattr(metrics_module, "Gauge", None)
+    fresh = DatabaseMetrics()
+    monkeypatch.setattr(metrics_module, "db_metrics", fresh)
+    return fresh
+
+
+def test_pool_limits_split_budget_across_workers():
+    """Test the connection budget is shared by all worker processes."""
+    assert pool_limits(30, 1) == (20, 10)
+    assert pool_limits(30, 3) == (6, 4)
+    # Never below a usable pool, even with more workers than connections
+    assert pool_limits(4, 8) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_engine_metrics(metrics, tmp_path):
+    """Test checkout wait, active connections and query latency are recorded."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}", poolclass=TimedAsyncAdaptedQueuePool
+    )
+    instrument_engine(engine.sync_engine)
+
+    async with engine.connect() as conn:
+        assert metrics.active_connections == 1
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("SELECT 2"))
+
+    stats = metrics.stats()
+    assert stats["active_connections"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["queries"] == 2
+    assert stats["query_avg_ms"] > 0
+    await engine.dispose()
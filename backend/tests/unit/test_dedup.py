@@ -0,0 +1,252 @@
+import hashlib
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from app.models.upload import ChunkDigest, StudyMetadata
+from app.storage.dedup import DedupIndex, dedup_index
+from app.storage.service import S3StorageService
+from app.upload.chunks import attach_known_chunks, store_chunk
+from app.upload.service import UploadSession
+from botocore.exceptions import ClientError
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DedupIndex(tmp_path / "dedup.db", forward_window_days=30, blob_grace_hours=0)
+
+
+def new_session(user_id: str = "clinic-a") -> UploadSession:
+    return UploadSession(str(uuid4()), user_id, 1, 100, SAMPLE_METADATA)
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_blob_released_with_last_reference(index):
+    """Test a blob shared by two uploads survives until both are released."""
+    index.add_ref("u1", "f", 0, "clinic-a", "d" * 64, 10, "md5", "m" * 32)
+    index.add_ref("u2", "f", 0, "clinic-a", "d" * 64, 10, "md5", "m" * 32)
+
+    assert index.release_upload("u1") == []
+    assert index.lookup("d" * 64) == (10, "md5", "m" * 32)
+    assert index.release_upload("u2") == ["d" * 64]
+    assert index.lookup("d" * 64) is None
+
+
+def test_unreferenced_blob_kept_for_grace_period(tmp_path):
+    """Test a released blob stays deduplicable until its grace period runs out."""
+    index = DedupIndex(tmp_path / "dedup.db", blob_grace_hours=1)
+    index.add_ref("u1", "f", 0, "clinic-a", "d" * 64, 10, "md5", "m" * 32)
+
+    assert index.release_upload("u1") == []
+    assert index.lookup("d" * 64) == (10, "md5", "m" * 32)
+
+    index.add_ref("u2", "f", 0, "clinic-a", "d" * 64, 10, "md5", "m" * 32)  # Resent
+    assert index.release_upload("u2") == []
+    with index._connect() as conn:
+        released = (datetime.now(UTC) - timedelta(hours=2)).isoformat()
+        conn.execute("UPDATE blobs SET released_at = ?", (released,))
+
+    assert index.expire_blobs() == ["d" * 64]
+    assert index.lookup("d" * 64) is None
+
+
+def test_re_pointing_a_chunk_moves_its_reference(index):
+    """Test re-registering a chunk with other data drops the old blob reference."""
+    index.add_ref("u1", "f", 0, "clinic-a", "a" * 64, 1, "md5", "m" * 32)
+    index.add_ref("u1", "f", 0, "clinic-a", "b" * 64, 1, "md5", "m" * 32)
+
+    assert sorted(index.release_upload("u1")) == ["a" * 64, "b" * 64]
+
+
+def test_lookup_is_scoped_to_user(index):
+    """Test pre-flight lookups only see blobs referenced by the same user."""
+    index.add_ref("u1", "f", 0, "clinic-a", "d" * 64, 10, "md5", "m" * 32)
+
+    assert index.lookup_for_user("clinic-a", ["d" * 64, "e" * 64]) == {
+        "d" * 64: (10, "md5", "m" * 32)
+    }
+    assert index.lookup_for_user("clinic-b", ["d" * 64]) == {}
+
+
+def test_forwarding_ledger(index):
+    """Test forwarded instances are remembered per PACS."""
+    index.mark_forwarded("orthanc", [("1.2.3", "d" * 64)])
+
+    assert index.already_forwarded("orthanc", [("1.2.3", "d" * 64), ("1.2.4", "d" * 64)]) == {
+        ("1.2.3", "d" * 64)
+    }
+    assert index.already_forwarded("dcm4chee", [("1.2.3", "d" * 64)]) == set()
+
+
+@pytest.mark.asyncio
+async def test_identical_chunks_are_stored_once(local_storage):
+    """Test a chunk re-sent under another session is linked to the stored blob."""
+    first, second = new_session(), new_session()
+
+    assert await store_chunk(local_storage, first, "f1", 0, b"pixel data") == "received"
+    assert await store_chunk(local_storage, second, "f9", 3, b"pixel data") == "received"
+
+    blob = local_storage.base_path / "blobs" / sha256(b"pixel data")[:2] / sha256(b"pixel data")
+    assert blob.stat().st_nlink == 3  # The blob plus one link per upload
+    assert first.deduplicated_bytes == 0
+    assert second.deduplicated_bytes == len(b"pixel data")
+    assert second.recorded_checksum("f9", 3) == sha256(b"pixel data")
+
+
+@pytest.mark.asyncio
+async def test_cleanup_deletes_only_unreferenced_blobs(local_storage, monkeypatch):
+    """Test cleanup_upload keeps blobs another upload still references."""
+    monkeypatch.setattr(dedup_index, "blob_grace_hours", 0)
+    first, second = new_session(), new_session()
+    await store_chunk(local_storage, first, "f1", 0, b"shared")
+    await store_chunk(local_storage, second, "f1", 0, b"shared")
+    await store_chunk(local_storage, first, "f1", 1, b"only-first")
+    blobs = local_storage.base_path / "blobs"
+
+    await local_storage.cleanup_upload(first.upload_id)
+
+    assert (blobs / sha256(b"shared")[:2] / sha256(b"shared")).exists()
+    assert not (blobs / sha256(b"only-first")[:2] / sha256(b"only-first")).exists()
+    merged = await local_storage.merge_chunks(second.upload_id, "f1", 1)
+    assert merged.read_bytes() == b"shared"
+
+    await local_storage.cleanup_upload(second.upload_id)
+    assert not (blobs / sha256(b"shared")[:2] / sha256(b"shared")).exists()
+
+
+@pytest.mark.asyncio
+async def test_chunk_resent_after_completion_is_deduplicated(local_storage):
+    """Test a chunk of a cleaned-up upload is still linked within the grace period."""
+    first = new_session()
+    await store_chunk(local_storage, first, "f1", 0, b"resent study")
+    await local_storage.cleanup_upload(first.upload_id)
+
+    second = new_session()
+    await store_chunk(local_storage, second, "f1", 0, b"resent study")
+
+    assert second.deduplicated_bytes == len(b"resent study")
+
+
+@pytest.mark.asyncio
+async def test_blob_deleted_after_lookup_is_stored_again(local_storage, monkeypatch):
+    """Test a blob that disappears before it is linked is written again from the chunk."""
+    await store_chunk(local_storage, new_session(), "f1", 0, b"expiring")
+    digest = sha256(b"expiring")
+    (local_storage.base_path / "blobs" / digest[:2] / digest).unlink()
+    monkeypatch.setattr(local_storage, "blob_exists", AsyncMock(return_value=True))
+    second = new_session()
+
+    assert await store_chunk(local_storage, second, "f1", 0, b"expiring") == "received"
+
+    assert second.deduplicated_bytes == 0
+    part = local_storage.base_path / second.upload_id / "f1" / "0.part"
+    assert part.read_bytes() == b"expiring"
+
+
+@pytest.mark.asyncio
+async def test_s3_chunks_skip_the_blob_store():
+    """Test S3 puts a chunk under its upload key once, with no blob object or copy."""
+    with patch("boto3.client") as mock_client:
+        storage = S3StorageService()
+    s3 = mock_client.return_value
+    s3.head_object.side_effect = [
+        ClientError({"Error": {"Code": "404"}}, "head_object"),
+        {"ContentLength": len(b"pixel data")},
+    ]
+    session = new_session()
+
+    assert await store_chunk(storage, session, "f1", 0, b"pixel data") == "received"
+
+    s3.put_object.assert_called_once_with(
+        Bucket=storage.bucket, Key=f"{session.upload_id}/f1/chunks/0.part", Body=b"pixel data"
+    )
+    s3.copy_object.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_preflight_attaches_known_chunks(local_storage):
+    """Test pre-flight registers chunks the user already sent and lists the rest."""
+    earlier = new_session()
+    await store_chunk(local_storage, earlier, "f1", 0, b"already here")
+    retry = new_session()
+
+    result = await attach_known_chunks(
+        local_storage,
+        retry,
+        [
+            ChunkDigest(file_id="f1", chunk_index=0, sha256=sha256(b"already here")),
+            ChunkDigest(file_id="f1", chunk_index=1, sha256=sha256(b"not yet sent")),
+        ],
+    )
+
+    assert [c.chunk_index for c in result.attached] == [0]
+    assert [c.chunk_index for c in result.missing] == [1]
+    assert result.attached_bytes == len(b"already here")
+    assert retry.files["f1"]["chunks"] == {0}
+    assert retry.recorded_checksum("f1", 0) == sha256(b"already here")
+    part = local_storage.base_path / retry.upload_id / "f1" / "0.part"
+    assert part.read_bytes() == b"already here"
+
+
+@pytest.mark.asyncio
+async def test_preflight_ignores_other_users_blobs(local_storage):
+    """Test another user's data is never attached from its digest alone."""
+    await store_chunk(local_storage, new_session("clinic-a"), "f1", 0, b"private")
+    other = new_session("clinic-b")
+
+    result = await attach_known_chunks(
+        local_storage, other, [ChunkDigest(file_id="f1", chunk_index=0, sha256=sha256(b"private"))]
+    )
+
+    assert result.attached == []
+    assert other.files == {}
+
+
+def test_complete_with_every_instance_forwarded(client, monkeypatch, tmp_path, dummy_dicom_data):
+    """Test a study the PACS already holds completes without a resend or a new report."""
+    from app.auth.utils import create_upload_token
+    from app.config import get_settings
+    from app.database.reports_db import reports_db
+    from app.notifications.service import notification_service
+    from app.upload import router as upload_router
+    from app.upload.service import upload_manager
+
+    final_path = tmp_path / "final.dcm"
+    final_path.write_bytes(dummy_dicom_data)
+    key = (str(uuid4()), sha256(dummy_dicom_data))
+    dedup_index.mark_forwarded(get_settings().active_pacs, [key])
+    session = new_session()
+    session.files["f1"] = {
+        "chunks": {0},
+        "checksums": {},
+        "complete": True,
+        "path": str(final_path),
+        "error": None,
+        "instance_key": key,
+    }
+    monkeypatch.setitem(upload_manager._sessions, session.upload_id, session)
+    forward_files = MagicMock()
+    monkeypatch.setattr(upload_router.pacs_service, "forward_files", forward_files)
+    notify = AsyncMock()
+    monkeypatch.setattr(notification_service, "create_and_broadcast", notify)
+
+    response = client.post(
+        f"/upload/{session.upload_id}/complete",
+        headers={"Authorization": f"Bearer {create_upload_token(session.upload_id, 'clinic-a')}"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["pacs_receipt_id"] is None
+    assert "1 instance(s) already forwarded to PACS; not sent again" in body["warnings"]
+    forward_files.assert_not_called()
+    notify.assert_awaited_once()
+    assert "already in PACS" in notify.await_args.kwargs["message"]
+    assert reports_db.get_report_by_upload_id(UUID(session.upload_id)) is None
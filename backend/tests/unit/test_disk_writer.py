@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from app.exceptions import DiskWriterBusyError
+from app.storage.disk_writer import DiskWriter, device_of
+
+
+@pytest.fixture
+def writer():
+    """Return a small disk writer pool."""
+    pool = DiskWriter(workers=1, max_pending=2)
+    yield pool
+    pool.shutdown()
+
+
+def write_file(path, data):
+    path.write_bytes(data)
+    return len(data)
+
+
+def wait_then_write(path, release):
+    release.wait()
+    path.write_bytes(b"late")
+
+
+@pytest.mark.asyncio
+async def test_write_runs_on_pool_and_is_timed_per_device(writer, tmp_path):
+    """Test writes return their result and are recorded against the path's device."""
+    path = tmp_path / "chunk"
+
+    assert await writer.run(write_file, path, b"data") == 4
+
+    assert path.read_bytes() == b"data"
+    stats = writer.stats()
+    assert stats["completed"] == 1
+    assert stats["devices"][device_of(path)]["writes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_saturated(writer, tmp_path):
+    """Test chunk writes beyond max_pending are shed, while unshed writes still queue."""
+    release = threading.Event()
+    blocked = [
+        asyncio.ensure_future(writer.run(wait_then_write, tmp_path / f"b{i}", release))
+        for i in range(2)
+    ]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(DiskWriterBusyError):
+        await writer.run(write_file, tmp_path / "c", b"x")
+    merge = asyncio.ensure_future(writer.run(write_file, tmp_path / "m", b"x", shed=False))
+    assert writer.rejected == 1
+
+    release.set()
+    await asyncio.gather(*blocked, merge)
+    assert (tmp_path / "m").exists()
+
+
+@pytest.mark.parametrize(
+    "policy, chunk_syncs, file_syncs",
+    [("none", 0, 0), ("chunk", 1, 1), ("file", 0, 1)],
+)
+def test_fsync_policy(monkeypatch, tmp_path, policy, chunk_syncs, file_syncs):
+    """Test which writes are fsynced under each policy."""
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    pool = DiskWriter(workers=1, max_pending=1, fsync_policy=policy)
+
+    with open(tmp_path / "f", "wb") as f:
+        pool.chunk_written(f)
+        assert len(synced) == chunk_syncs
+        pool.file_written(f)
+        assert len(synced) == chunk_syncs + file_syncs
+    pool.shutdown()
@@ -0,0 +1,188 @@
+import hashlib
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.db.models import StudyUpload
+from app.models.upload import StudyMetadata
+from app.upload.duplicates import (
+    BLOOM_WARM_KEY,
+    DuplicateDetector,
+    StudyBloomFilter,
+    duplicate_detector,
+    legacy_study_hash,
+    study_hash,
+)
+
+
+def make_key(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def make_detector() -> DuplicateDetector:
+    bloom = StudyBloomFilter(
+        capacity_per_day=1000, error_rate=0.01, window_days=30, use_redis=False
+    )
+    return DuplicateDetector(window_days=30, bloom=bloom, bloom_enabled=True)
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    db.commit = AsyncMock()
+    return db
+
+
+def test_study_hash_normalizes_metadata():
+    """Test formatting differences in client metadata hash the same."""
+    a = StudyMetadata(patient_name="Doe^John", study_date="2023-01-01", modality="ct")
+    b = StudyMetadata(patient_name=" doe  john ", study_date="20230101", modality="CT")
+    c = StudyMetadata(patient_name="Doe^Jane", study_date="2023-01-01", modality="CT")
+
+    assert study_hash(a) == study_hash(b)
+    assert study_hash(a) != study_hash(c)
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_membership():
+    """Test added keys are found and the false positive rate stays near target."""
+    bloom = StudyBloomFilter(
+        capacity_per_day=1000, error_rate=0.01, window_days=30, use_redis=False
+    )
+    today = date(2024, 6, 1)
+    keys = [make_key(f"study-{i}") for i in range(1000)]
+    await bloom.add_many((key, today) for key in keys)
+
+    assert all([await bloom.might_contain(key, today) for key in keys])
+    false_positives = sum(
+        [await bloom.might_contain(make_key(f"other-{i}"), today) for i in range(2000)]
+    )
+    assert false_positives < 60
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_window():
+    """Test entries age out once their day leaves the window."""
+    bloom = StudyBloomFilter(capacity_per_day=100, error_rate=0.01, window_days=30, use_redis=False)
+    key = make_key("study")
+    added = date(2024, 6, 1)
+    await bloom.add(key, added)
+
+    assert await bloom.might_contain(key, added + timedelta(days=30))
+    assert not await bloom.might_contain(key, added + timedelta(days=31))
+
+    # Old buckets are dropped when a new day's bucket is created
+    await bloom.add(make_key("later"), added + timedelta(days=31))
+    assert added not in bloom._buckets
+
+
+@pytest.mark.asyncio
+async def test_redis_bloom_untrusted_without_warm_marker():
+    """Test a shared filter missing its warm marker (e.g. after a flush) is not trusted."""
+    bloom = StudyBloomFilter(capacity_per_day=100, error_rate=0.01, window_days=2, use_redis=True)
+    with patch("app.upload.duplicates.cache_service") as mock_cache:
+        mock_cache.get_bits = AsyncMock(
+            side_effect=lambda request: {key: [0] * len(offs) for key, offs in request.items()}
+        )
+        assert await bloom.might_contain(make_key("study"), date(2024, 6, 1)) is None
+
+        def warm(request):
+            return {
+                key: [1 if key == BLOOM_WARM_KEY else 0] * len(offs)
+                for key, offs in request.items()
+            }
+
+        mock_cache.get_bits = AsyncMock(side_effect=warm)
+        assert await bloom.might_contain(make_key("study"), date(2024, 6, 1)) is False
+
+
+@pytest.mark.asyncio
+async def test_find_recent_skips_database_when_filter_rules_out(mock_db):
+    """Test the no-duplicate case does not query the database once warm."""
+    detector = make_detector()
+    detector.ready = True
+
+    assert await detector.find_recent(mock_db, make_key("new")) is None
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_find_recent_queries_database_until_warm(mock_db):
+    """Test lookups fall back to the database before the filter is loaded."""
+    detector = make_detector()
+    existing = StudyUpload(upload_id="old", study_hash=make_key("s"), created_at=datetime.now(UTC))
+    mock_db.execute.return_value.scalars.return_value.first.return_value = existing
+
+    assert await detector.find_recent(mock_db, make_key("s")) is existing
+    mock_db.execute.assert_called_once()
+
+
+def test_legacy_study_hash_matches_rows_recorded_before_normalization():
+    """Test the legacy hash is the one computed from the raw fields before normalizing."""
+    metadata = StudyMetadata(patient_name="Doe^John", study_date="2023-01-01", modality="ct")
+
+    assert legacy_study_hash(metadata) == make_key("Doe^John|2023-01-01|ct")
+    assert legacy_study_hash(metadata) != study_hash(metadata)
+
+
+@pytest.mark.asyncio
+async def test_find_recent_checks_every_key(mock_db):
+    """Test a legacy hash in the filter still reaches the database with the new one."""
+    detector = make_detector()
+    detector.ready = True
+    legacy = make_key("Doe^John|2023-01-01|ct")
+    await detector.bloom.add(legacy, datetime.now(UTC).date())
+    upload = StudyUpload(upload_id="old", study_hash=legacy, created_at=datetime.now(UTC))
+    mock_db.execute.return_value.scalars.return_value.first.return_value = upload
+
+    assert await detector.find_recent(mock_db, make_key("normalized"), legacy) is upload
+    query = mock_db.execute.call_args.args[0]
+    assert query.compile().params["study_hash_1"] == [legacy]
+
+
+@pytest.mark.asyncio
+async def test_recorded_upload_is_confirmed_by_database(mock_db):
+    """Test a recorded hash passes the filter and is confirmed by the database."""
+    detector = make_detector()
+    detector.ready = True
+    key = make_key("study")
+    upload = StudyUpload(upload_id="u1", study_hash=key, created_at=datetime.now(UTC))
+
+    await detector.record(mock_db, upload)
+    mock_db.add.assert_called_once_with(upload)
+    mock_db.execute.return_value.scalars.return_value.first.return_value = upload
+
+    assert await detector.find_recent(mock_db, key) is upload
+    mock_db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_bloom_disabled_always_queries_database(mock_db):
+    """Test a disabled filter (no Redis) never short-circuits."""
+    bloom = StudyBloomFilter(capacity_per_day=100, error_rate=0.01, window_days=30, use_redis=False)
+    detector = DuplicateDetector(window_days=30, bloom=bloom, bloom_enabled=False)
+    detector.ready = True
+    mock_db.execute.return_value.scalars.return_value.first.return_value = None
+
+    assert await detector.find_recent(mock_db, make_key("new")) is None
+    mock_db.execute.assert_called_once()
+
+
+def test_shared_detector_only_filters_through_redis():
+    """Test the app's detector never trusts a process-local filter, whatever WEB_CONCURRENCY says."""
+    assert duplicate_detector.bloom_enabled == duplicate_detector.bloom.use_redis
+
+
+@pytest.mark.asyncio
+async def test_find_by_identity_records_identifiers(mock_db):
+    """Test completion stores the parsed identifiers and returns an earlier upload."""
+    detector = make_detector()
+    earlier = StudyUpload(upload_id="old", study_hash="h", created_at=datetime.now(UTC))
+    mock_db.execute.return_value.scalars.return_value.first.return_value = earlier
+
+    found = await detector.find_by_identity(mock_db, "new", "1.2.3", "PID1")
+
+    assert found is earlier
+    assert mock_db.execute.call_count == 2
+    mock_db.commit.assert_awaited_once()
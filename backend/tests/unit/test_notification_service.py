@@ -1,10 +1,12 @@
 import asyncio
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 import pytest
-from app.models.report import NotificationType
-from app.notifications.service import NotificationService
+from app.models.report import NotificationListResponse, NotificationType
+from app.notifications.router import router
+from app.notifications.service import EncodedJSONResponse, NotificationService, encode_json
 
 
 @pytest.fixture
@@ -12,6 +14,13 @@ def service():
     return NotificationService()
 
 
+def _frame_payload(frame: bytes) -> dict:
+    """Decode the JSON payload of a pre-encoded SSE notification frame."""
+    lines = frame.decode("utf-8").split("\r\n")
+    assert lines[0] == "event: notification"
+    return json.loads(lines[1].removeprefix("data: "))
+
+
 @pytest.mark.asyncio
 async def test_create_and_broadcast(service):
     """Test notification creation and broadcast."""
@@ -34,7 +43,7 @@ async def test_create_and_broadcast(service):
         assert notif.title == "Ready"
 
         # Check if broadcast reached the queue
-        broadcasted = await queue.get()
+        broadcasted = _frame_payload(await queue.get())
         assert broadcasted["title"] == "Ready"
         assert broadcasted["type"] == NotificationType.REPORT_READY.value
 
@@ -61,6 +70,67 @@ async def test_broadcast_to_user_multiple_connections(service):
     assert q1.qsize() == 1
     assert q2.qsize() == 1
 
+    # Every connection shares the same pre-encoded frame
+    frame1 = q1.get_nowait()
+    frame2 = q2.get_nowait()
+    assert frame1 is frame2
+    assert frame1.endswith(b"\r\n\r\n")
+    assert _frame_payload(frame1)["title"] == "T"
+
+
+@pytest.mark.asyncio
+async def test_create_and_broadcast_many(service):
+    """Test bulk notifications are stored in one call and fanned out per user."""
+    from app.models.report import Notification
+
+    q1 = asyncio.Queue()
+    q2 = asyncio.Queue()
+    service._connections["user1"] = [q1]
+    service._connections["user2"] = [q2]
+
+    notifs = [
+        Notification(
+            user_id=user_id,
+            notification_type=NotificationType.REPORT_READY,
+            title=f"Ready {i}",
+            message="M",
+        )
+        for i, user_id in enumerate(["user1", "user1", "user2", "user3"])
+    ]
+
+    with patch("app.notifications.service.reports_db") as mock_db:
+        await service.create_and_broadcast_many(notifs)
+        mock_db.create_notifications.assert_called_once_with(notifs)
+        assert not mock_db.create_notification.called
+
+    assert q1.qsize() == 2
+    assert q2.qsize() == 1
+    assert _frame_payload(q2.get_nowait())["title"] == "Ready 2"
+
+
+def test_list_route_documents_schema_without_validating():
+    """Test the list route renders with encode_json and only documents its model."""
+    route = next(r for r in router.routes if r.path == "/")
+
+    assert route.response_model is None
+    assert route.response_class is EncodedJSONResponse
+    assert route.responses[200]["model"] is NotificationListResponse
+    assert EncodedJSONResponse({"total": 1}).body == encode_json({"total": 1})
+
+
+def test_encode_json_without_orjson():
+    """Test the stdlib fallback produces the same JSON as orjson."""
+    from datetime import datetime
+
+    data = {"id": uuid4(), "created_at": datetime(2026, 1, 13, 8, 30), "type": "report_ready"}
+    expected = encode_json(data)
+
+    with patch("app.notifications.service.orjson", None):
+        fallback = encode_json(data)
+
+    assert json.loads(fallback) == json.loads(expected)
+    assert json.loads(fallback)["created_at"] == "2026-01-13T08:30:00"
+
 
 @pytest.mark.asyncio
 async def test_cleanup_stale_connections(service):
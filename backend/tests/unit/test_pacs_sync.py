@@ -0,0 +1,111 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from app.database.reports_db import ReportsDatabase
+from app.models.report import NotificationType, Report, ReportStatus
+from app.reports.pacs_sync import PACSReportSyncService
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Return a fresh ReportsDatabase with temp file."""
+    return ReportsDatabase(db_path=str(tmp_path / "reports.db"))
+
+
+@pytest.fixture
+def service():
+    return PACSReportSyncService()
+
+
+def _create_reports(db, count, status=ReportStatus.ASSIGNED):
+    reports = []
+    for i in range(count):
+        report = Report(
+            upload_id=uuid4(), study_instance_uid=f"1.2.3.{i}", user_id="user1", status=status
+        )
+        db.create_report(report)
+        reports.append(report)
+    return reports
+
+
+@pytest.mark.asyncio
+async def test_mark_reports_ready_batches_writes(db, service):
+    """Test a burst of ready reports is written and broadcast in one batch."""
+    reports = _create_reports(db, 5)
+
+    with (
+        patch("app.reports.pacs_sync.reports_db", db),
+        patch("app.reports.pacs_sync.notification_service") as mock_notifications,
+        patch("app.reports.pacs_sync.pdf_cache") as mock_pdf_cache,
+    ):
+        mock_notifications.broadcast_many = AsyncMock()
+        count = await service.mark_reports_ready(reports)
+
+    assert count == 5
+    # Every report that turned READY is queued for pre-rendering, with its new updated_at
+    prerendered = [c.args[0] for c in mock_pdf_cache.schedule_prerender.call_args_list]
+    assert {r.id for r in prerendered} == {r.id for r in reports}
+    assert all(r.status == ReportStatus.READY for r in prerendered)
+    for report in reports:
+        updated = db.get_report_by_id(report.id)
+        assert updated.status == ReportStatus.READY
+        assert updated.report_url == f"/api/reports/{report.id}/download"
+
+    notifications = mock_notifications.broadcast_many.call_args.args[0]
+    assert len(notifications) == 5
+    assert all(n.notification_type == NotificationType.REPORT_READY for n in notifications)
+    assert db.get_unread_count("user1") == 5
+
+
+@pytest.mark.asyncio
+async def test_mark_reports_ready_skips_ready(db, service):
+    """Test reports already READY are not updated or notified again."""
+    reports = _create_reports(db, 2, status=ReportStatus.READY)
+
+    with patch("app.reports.pacs_sync.reports_db", db):
+        assert await service.mark_reports_ready(reports) == 0
+
+    assert db.get_unread_count("user1") == 0
+
+
+@pytest.mark.asyncio
+async def test_sync_cycle_only_marks_reports_found_in_pacs(db, service):
+    """Test the sync cycle checks PACS per study and batches the ready ones."""
+    reports = _create_reports(db, 4)
+    found = {reports[0].study_instance_uid, reports[2].study_instance_uid}
+
+    mock_pacs = MagicMock()
+    mock_pacs.check_for_report.side_effect = lambda uid: uid in found
+
+    with (
+        patch("app.reports.pacs_sync.reports_db", db),
+        patch("app.pacs.service.pacs_service", mock_pacs),
+        patch.object(service, "mark_reports_ready", AsyncMock()) as mock_mark,
+    ):
+        await service._sync_all_pending_reports()
+
+    assert mock_pacs.check_for_report.call_count == 4
+    marked = mock_mark.call_args.args[0]
+    assert {r.study_instance_uid for r in marked} == found
+
+
+@pytest.mark.asyncio
+async def test_update_report_status_prerenders_ready_pdf(db, service):
+    """Test a single transition to READY schedules a PDF pre-render."""
+    report = _create_reports(db, 1)[0]
+
+    with (
+        patch("app.reports.pacs_sync.reports_db", db),
+        patch("app.reports.pacs_sync.notification_service") as mock_notifications,
+        patch("app.reports.pacs_sync.pdf_cache") as mock_pdf_cache,
+    ):
+        mock_notifications.create_and_broadcast = AsyncMock()
+        await service.update_report_status(str(report.id), ReportStatus.PENDING)
+        assert not mock_pdf_cache.schedule_prerender.called
+
+        await service.update_report_status(str(report.id), ReportStatus.READY)
+
+    scheduled = mock_pdf_cache.schedule_prerender.call_args.args[0]
+    assert scheduled.id == report.id
+    assert scheduled.status == ReportStatus.READY
@@ -0,0 +1,103 @@
+import gzip
+import json
+import uuid
+from datetime import UTC, date, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from app.db.database import Base
+from app.db.models import StudyUpload
+from app.db.partitions import add_months, ensure_partitions, prune_study_uploads
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[StudyUpload.__table__])
+    yield engine
+    engine.dispose()
+
+
+def add_upload(engine, created_at: datetime) -> None:
+    with Session(engine) as session:
+        session.add(
+            StudyUpload(
+                id=uuid.uuid4(),
+                upload_id=str(uuid.uuid4()),
+                study_instance_uid="1.2.3",
+                patient_id="PID",
+                study_hash="h" * 64,
+                created_at=created_at,
+            )
+        )
+        session.commit()
+
+
+def test_add_months_crosses_years():
+    """Test month arithmetic wraps across year boundaries."""
+    assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+
+def test_prune_archives_whole_expired_months(engine, tmp_path):
+    """Test months past retention are archived and deleted; newer rows stay."""
+    add_upload(engine, datetime(2024, 1, 10, tzinfo=UTC))
+    add_upload(engine, datetime(2024, 1, 20, tzinfo=UTC))
+    add_upload(engine, datetime(2024, 3, 5, tzinfo=UTC))
+    add_upload(engine, datetime(2024, 4, 2, tzinfo=UTC))  # Month of the cutoff: kept
+    add_upload(engine, datetime(2024, 6, 1, tzinfo=UTC))
+
+    # Cutoff is 2024-04-11, so January through March are expired
+    archived = prune_study_uploads(
+        engine, retention_days=60, archive_dir=tmp_path, now=datetime(2024, 6, 10, tzinfo=UTC)
+    )
+
+    assert archived == 3
+    with gzip.open(tmp_path / "study_uploads_2024_01.jsonl.gz", "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 2
+    assert rows[0]["created_at"].startswith("2024-01-10")
+    assert (tmp_path / "study_uploads_2024_02.jsonl.gz").exists()
+    assert not list(tmp_path.glob("*.partial"))
+
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(StudyUpload)) == 2
+
+
+def test_prune_without_expired_rows_is_noop(engine, tmp_path):
+    """Test nothing is archived when all rows are inside retention."""
+    add_upload(engine, datetime(2024, 6, 1, tzinfo=UTC))
+
+    archived = prune_study_uploads(
+        engine, retention_days=60, archive_dir=tmp_path, now=datetime(2024, 6, 10, tzinfo=UTC)
+    )
+
+    assert archived == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_ensure_partitions_creates_missing_months():
+    """Test the DEFAULT and upcoming monthly partitions are created with UTC bounds."""
+    conn = MagicMock()
+    with patch("app.db.partitions._partition_names", return_value=["study_uploads_2024_06"]):
+        created = ensure_partitions(conn, date(2024, 6, 15), months_ahead=2)
+
+    assert created == ["study_uploads_default", "study_uploads_2024_07", "study_uploads_2024_08"]
+    statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+    assert "PARTITION OF study_uploads DEFAULT" in statements[0]
+    assert "DELETE FROM study_uploads_default" in statements[2]
+    assert "ATTACH PARTITION study_uploads_2024_07" in statements[3]
+    assert "FROM ('2024-07-01T00:00:00+00:00') TO ('2024-08-01T00:00:00+00:00')" in statements[3]
+
+
+def test_ensure_partitions_keeps_existing_default():
+    """Test the DEFAULT partition is not recreated and is skipped as a month."""
+    conn = MagicMock()
+    names = ["study_uploads_default", "study_uploads_2024_06"]
+    with patch("app.db.partitions._partition_names", return_value=names):
+        created = ensure_partitions(conn, date(2024, 6, 15), months_ahead=0)
+
+    assert created == []
+    conn.execute.assert_not_called()
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+from app.auth.password_hasher import PasswordHasher
+from app.auth.utils import hash_password
+from app.exceptions import PasswordHasherBusyError
+
+
+@pytest.fixture
+def hasher():
+    """Return a small password hasher pool."""
+    pool = PasswordHasher(workers=1, max_pending=2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(hasher):
+    """Test hashing and verification run in the pool."""
+    hashed = await hasher.hash("securepassword")
+
+    assert await hasher.verify("securepassword", hashed) is True
+    assert await hasher.verify("wrongpassword", hashed) is False
+    assert hasher.stats()["completed"] == 3
+    assert hasher.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_event_loop_not_blocked(hasher):
+    """Test other coroutines keep running while a hash is computed."""
+    hashed = hash_password("securepassword", rounds=10)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(ticker())
+    await hasher.verify("securepassword", hashed)
+    task.cancel()
+
+    assert ticks > 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_saturated(hasher):
+    """Test work beyond max_pending is shed instead of queued."""
+    release = threading.Event()
+    blocked = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    assert hasher.stats()["running"] == 1
+    assert hasher.queue_depth == 1
+    with pytest.raises(PasswordHasherBusyError):
+        await hasher.hash("securepassword")
+    assert hasher.rejected == 1
+
+    release.set()
+    await asyncio.gather(*blocked)
+    assert hasher.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_slot(hasher):
+    """Test cancelling a queued call frees its slot."""
+    release = threading.Event()
+    running = asyncio.ensure_future(hasher._submit(release.wait))
+    queued = asyncio.ensure_future(hasher._submit(release.wait))
+    await asyncio.sleep(0.05)
+
+    queued.cancel()
+    await asyncio.sleep(0.01)
+    assert hasher.in_flight == 1
+
+    release.set()
+    await running
+    assert hasher.in_flight == 0
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from app.models.report import Report, ReportStatus
+from app.reports.pdf_cache import PDFReportCache, etag_matches, report_version
+from app.reports.router import download_report
+from starlette.requests import Request
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Threads instead of processes so tests can patch the generator
+    cache = PDFReportCache(
+        tmp_path / "pdf_cache", max_bytes=1000, max_pending=2, executor=ThreadPoolExecutor(2)
+    )
+    yield cache
+    cache.shutdown()
+
+
+@pytest.fixture
+def sample_report():
+    return Report(
+        upload_id=uuid4(),
+        study_instance_uid="1.2.3",
+        status=ReportStatus.READY,
+        user_id="user-123",
+    )
+
+
+def test_report_version_changes_with_updated_at(sample_report):
+    """Test the cache key changes whenever the report is updated."""
+    version = report_version(sample_report)
+    assert report_version(sample_report) == version
+
+    sample_report.updated_at += timedelta(seconds=1)
+    assert report_version(sample_report) != version
+
+
+def test_etag_matches():
+    """Test If-None-Match parsing."""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_put_and_get(cache, sample_report):
+    """Test storing and retrieving a rendered PDF."""
+    assert cache.get(sample_report) is None
+
+    path = cache.put(sample_report, b"%PDF-1")
+    assert cache.get(sample_report) == path
+    assert path.read_bytes() == b"%PDF-1"
+
+
+def test_new_version_replaces_old(cache, sample_report):
+    """Test updating a report invalidates its previous PDF."""
+    old_path = cache.put(sample_report, b"%PDF-old")
+
+    sample_report.updated_at += timedelta(minutes=5)
+    new_path = cache.put(sample_report, b"%PDF-new")
+
+    assert not old_path.exists()
+    assert new_path.exists()
+    assert cache.total_bytes == len(b"%PDF-new")
+
+
+def test_lru_eviction_by_size(cache):
+    """Test least recently used PDFs are evicted once over the size bound."""
+    reports = [Report(upload_id=uuid4(), study_instance_uid="S", user_id="u") for _ in range(3)]
+
+    first = cache.put(reports[0], b"a" * 400)
+    second = cache.put(reports[1], b"b" * 400)
+    now = time.time()
+    os.utime(first, (now - 20, now - 20))
+    os.utime(second, (now - 10, now - 10))
+    # Touch the first so the second becomes least recently used
+    assert cache.get(reports[0]) is not None
+    cache.put(reports[2], b"c" * 400)
+
+    assert cache.get(reports[1]) is None
+    assert cache.get(reports[0]) is not None
+    assert cache.get(reports[2]) is not None
+    assert cache.total_bytes == 800
+
+
+def test_construction_does_no_io(tmp_path):
+    """Test the directory and process pool are only created when first needed."""
+    cache = PDFReportCache(tmp_path / "pdf_cache", max_bytes=1000)
+
+    assert not (tmp_path / "pdf_cache").exists()
+    assert cache._executor is None
+    cache.shutdown()
+
+
+def test_workers_share_size_bound(tmp_path):
+    """Test workers sharing the directory evict against its total size, not their own."""
+    worker_a = PDFReportCache(tmp_path / "pdf_cache", max_bytes=1000)
+    worker_b = PDFReportCache(tmp_path / "pdf_cache", max_bytes=1000)
+    reports = [Report(upload_id=uuid4(), study_instance_uid="S", user_id="u") for _ in range(4)]
+
+    for i, report in enumerate(reports):
+        (worker_a if i % 2 else worker_b).put(report, b"x" * 400)
+
+    assert worker_a.total_bytes == worker_b.total_bytes == 800
+    # Each worker serves files the other one rendered
+    assert worker_a.get(reports[2]) is not None
+    assert worker_b.get(reports[3]) is not None
+
+
+def test_stale_temp_files_removed(cache, sample_report):
+    """Test temp files abandoned by a crashed worker are cleaned up on eviction."""
+    cache.cache_dir.mkdir()
+    stale = cache.cache_dir / "dead.pdf.123.tmp"
+    fresh = cache.cache_dir / "busy.pdf.456.tmp"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+
+    cache.put(sample_report, b"%PDF-1")
+
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+@pytest.mark.asyncio
+async def test_render_in_process_pool(tmp_path, sample_report):
+    """Test the default process pool renders a real PDF."""
+    cache = PDFReportCache(tmp_path / "pdf_cache", max_bytes=10_000_000, workers=1)
+    try:
+        path = await cache.get_or_render(sample_report)
+        assert path.read_bytes().startswith(b"%PDF-")
+    finally:
+        cache.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_schedule_prerender(cache, sample_report):
+    """Test pre-rendering fills the cache in the background."""
+    with patch("app.reports.pdf_cache.pdf_generator") as mock_generator:
+        mock_generator.generate_report_pdf.return_value = b"%PDF-prerendered"
+
+        assert cache.schedule_prerender(sample_report) is True
+        await asyncio.gather(*cache._prerender_tasks)
+
+        assert cache.get(sample_report).read_bytes() == b"%PDF-prerendered"
+        # Already cached: nothing more to schedule
+        assert cache.schedule_prerender(sample_report) is False
+
+
+@pytest.mark.asyncio
+async def test_schedule_prerender_is_bounded(cache):
+    """Test pre-renders beyond max_pending are deferred to lazy rendering."""
+    reports = [Report(upload_id=uuid4(), study_instance_uid="S", user_id="u") for _ in range(3)]
+
+    with patch("app.reports.pdf_cache.pdf_generator") as mock_generator:
+        mock_generator.generate_report_pdf.return_value = b"%PDF"
+
+        scheduled = [cache.schedule_prerender(r) for r in reports]
+        assert scheduled == [True, True, False]
+        await asyncio.gather(*cache._prerender_tasks)
+
+
+@pytest.mark.asyncio
+async def test_get_or_render_renders_once(cache, sample_report):
+    """Test concurrent misses share one render and later calls hit the cache."""
+    with patch("app.reports.pdf_cache.pdf_generator") as mock_generator:
+        mock_generator.generate_report_pdf.return_value = b"%PDF-rendered"
+
+        paths = await asyncio.gather(*(cache.get_or_render(sample_report) for _ in range(5)))
+        assert len(set(paths)) == 1
+        await cache.get_or_render(sample_report)
+
+        assert mock_generator.generate_report_pdf.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_open_pdf_survives_eviction(cache, sample_report):
+    """Test an opened PDF stays readable after eviction, and a pruned file is re-rendered."""
+    with patch("app.reports.pdf_cache.pdf_generator") as mock_generator:
+        mock_generator.generate_report_pdf.return_value = b"%PDF-rendered"
+
+        with await cache.open_pdf(sample_report) as f:
+            cache.put(Report(upload_id=uuid4(), study_instance_uid="S", user_id="u"), b"x" * 999)
+            assert cache.get(sample_report) is None  # Evicted while being served
+            assert f.read() == b"%PDF-rendered"
+
+        # Pruned by another worker between lookup and open: rendered again
+        path = cache.put(sample_report, b"%PDF-old")
+        real_get_or_render = cache.get_or_render
+        calls = []
+
+        async def pruned_then_real(report):
+            calls.append(report)
+            if len(calls) == 1:
+                path.unlink()
+                return path
+            return await real_get_or_render(report)
+
+        with patch.object(cache, "get_or_render", pruned_then_real):
+            with await cache.open_pdf(sample_report) as f:
+                assert f.read() == b"%PDF-rendered"
+        assert len(calls) == 2
+
+
+def _request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+@pytest.mark.asyncio
+async def test_download_returns_etag_and_304(cache, sample_report):
+    """Test downloads carry an ETag and revalidation returns 304."""
+    user = {"sub": sample_report.user_id}
+
+    with (
+        patch("app.reports.router.reports_db") as mock_db,
+        patch("app.reports.router.pdf_cache", cache),
+        patch("app.reports.pdf_cache.pdf_generator") as mock_generator,
+    ):
+        mock_db.get_report_by_id.return_value = sample_report
+        mock_generator.generate_report_pdf.return_value = b"%PDF-rendered"
+
+        response = await download_report(sample_report.id, _request(), user)
+        etag = response.headers["etag"]
+        assert response.status_code == 200
+        assert etag == f'"{report_version(sample_report)}"'
+        assert "report_" in response.headers["content-disposition"]
+
+        cached = await download_report(sample_report.id, _request({"If-None-Match": etag}), user)
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+        # An updated report no longer matches the old ETag
+        sample_report.updated_at = datetime.utcnow() + timedelta(minutes=1)
+        fresh = await download_report(sample_report.id, _request({"If-None-Match": etag}), user)
+        assert fresh.status_code == 200
+        assert mock_generator.generate_report_pdf.call_count == 2
@@ -1,9 +1,11 @@
+from datetime import datetime
 from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
 from app.models.report import Report, ReportStatus
 from app.reports.pdf_service import pdf_generator
+from reportlab import rl_config
 
 
 @pytest.fixture
@@ -79,3 +81,70 @@ def test_generate_pdf_without_findings(sample_report):
     assert len(pdf_bytes) > 0
     # Search in PDF bytes is unreliable due to encoding, but we can verify it's a valid PDF
     assert pdf_bytes.startswith(b"%PDF-")
+
+
+def test_generator_reuses_styles(sample_report):
+    """Test styles are built once and shared across renders."""
+    title_style = pdf_generator.title_style
+    table_style = pdf_generator.metadata_table_style
+
+    pdf_generator.generate_report_pdf(sample_report)
+    pdf_generator.generate_report_pdf(sample_report)
+
+    assert pdf_generator.title_style is title_style
+    assert pdf_generator.metadata_table_style is table_style
+
+
+def test_repeated_renders_are_identical(sample_report):
+    """Test shared styles do not leak state between renders."""
+    generated_at = datetime(2024, 1, 1, 12, 0)
+
+    pdf1 = pdf_generator.generate_report_pdf(sample_report, generated_at)
+    pdf2 = pdf_generator.generate_report_pdf(sample_report, generated_at)
+
+    # ReportLab embeds a creation date and document ID; compare page content size
+    assert abs(len(pdf1) - len(pdf2)) < 64
+
+
+def test_page_streams_skip_ascii85_without_global_config(sample_report):
+    """Test page streams are binary Flate without changing ReportLab's process-wide config."""
+    pdf_bytes = pdf_generator.generate_report_pdf(sample_report)
+
+    assert b"/FlateDecode" in pdf_bytes
+    assert b"/ASCII85Decode" not in pdf_bytes
+    assert rl_config.useA85 == 1
+
+
+def test_generate_report_pdfs(sample_report):
+    """Test batch rendering returns one PDF per report, in order."""
+    short = sample_report.model_copy(update={"id": uuid4(), "report_text": "Short."})
+    long = sample_report.model_copy(update={"id": uuid4(), "report_text": "Long.\n" * 200})
+
+    pdfs = pdf_generator.generate_report_pdfs([short, long])
+
+    assert len(pdfs) == 2
+    assert all(pdf.startswith(b"%PDF-") for pdf in pdfs)
+    assert len(pdfs[1]) > len(pdfs[0])
+
+
+@patch("app.reports.pdf_service.reports_db")
+def test_save_report_pdfs(mock_reports_db, sample_report, tmp_path):
+    """Test saving many PDFs into a directory in one call."""
+    other = sample_report.model_copy(update={"id": uuid4()})
+    mock_reports_db.get_reports_by_ids.return_value = [sample_report, other]
+
+    paths = pdf_generator.save_report_pdfs([sample_report.id, other.id], output_dir=tmp_path)
+
+    assert paths == [tmp_path / f"{sample_report.id}.pdf", tmp_path / f"{other.id}.pdf"]
+    assert all(path.stat().st_size > 0 for path in paths)
+
+
+@patch("app.reports.pdf_service.reports_db")
+def test_save_report_pdfs_missing(mock_reports_db, sample_report, tmp_path):
+    """Test batch save fails before writing anything if a report is missing."""
+    mock_reports_db.get_reports_by_ids.return_value = [sample_report]
+
+    with pytest.raises(ValueError, match="Reports not found"):
+        pdf_generator.save_report_pdfs([sample_report.id, uuid4()], output_dir=tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
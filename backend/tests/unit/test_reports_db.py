@@ -2,7 +2,13 @@ from uuid import uuid4
 
 import pytest
 from app.database.reports_db import ReportsDatabase
-from app.models.report import Notification, NotificationType, Report, ReportStatus
+from app.models.report import (
+    Notification,
+    NotificationType,
+    Report,
+    ReportStatus,
+    ReportStatusUpdate,
+)
 
 
 @pytest.fixture
@@ -185,3 +191,108 @@ def test_report_audit_trail(db):
 
     updated = db.update_report_status(report.id, ReportStatus.READY)
     assert updated.updated_at > old_updated_at
+
+
+def test_get_reports_by_status(db):
+    """Test fetching reports across several statuses in one query."""
+    db.create_report(
+        Report(
+            upload_id=uuid4(), study_instance_uid="S1", user_id="u1", status=ReportStatus.ASSIGNED
+        )
+    )
+    db.create_report(
+        Report(
+            upload_id=uuid4(), study_instance_uid="S2", user_id="u2", status=ReportStatus.PENDING
+        )
+    )
+    db.create_report(
+        Report(upload_id=uuid4(), study_instance_uid="S3", user_id="u1", status=ReportStatus.READY)
+    )
+
+    pending = db.get_reports_by_status([ReportStatus.ASSIGNED, ReportStatus.PENDING])
+    assert {r.study_instance_uid for r in pending} == {"S1", "S2"}
+    assert db.get_reports_by_status([]) == []
+
+
+def test_bulk_update_report_status(db):
+    """Test bulk updates and notification inserts share one transaction."""
+    reports = [
+        Report(upload_id=uuid4(), study_instance_uid=f"S{i}", user_id="user1", report_text="old")
+        for i in range(3)
+    ]
+    for report in reports:
+        db.create_report(report)
+
+    updates = [
+        ReportStatusUpdate(report_id=r.id, status=ReportStatus.READY, report_url=f"/r/{r.id}")
+        for r in reports
+    ]
+    notifications = [
+        Notification(
+            user_id="user1",
+            notification_type=NotificationType.REPORT_READY,
+            title="Report Ready",
+            message=f"Report {r.study_instance_uid} ready",
+            related_report_id=r.id,
+        )
+        for r in reports
+    ]
+
+    count = db.bulk_update_report_status(updates, notifications)
+    assert count == 3
+
+    for report in reports:
+        updated = db.get_report_by_id(report.id)
+        assert updated.status == ReportStatus.READY
+        assert updated.report_url == f"/r/{report.id}"
+        # Fields not provided keep their current value
+        assert updated.report_text == "old"
+
+    assert db.get_unread_count("user1") == 3
+
+
+def test_bulk_update_rolls_back_on_error(db):
+    """Test a failing notification insert leaves reports untouched."""
+    report = Report(upload_id=uuid4(), study_instance_uid="S1", user_id="user1")
+    db.create_report(report)
+
+    notif = Notification(
+        user_id="user1", notification_type=NotificationType.REPORT_READY, title="T", message="M"
+    )
+    db.create_notification(notif)
+
+    import sqlite3
+
+    with pytest.raises(sqlite3.IntegrityError):
+        # Re-inserting an existing notification id violates the primary key
+        db.bulk_update_report_status(
+            [ReportStatusUpdate(report_id=report.id, status=ReportStatus.READY)], [notif]
+        )
+
+    assert db.get_report_by_id(report.id).status == ReportStatus.ASSIGNED
+
+
+def test_get_reports_by_ids(db):
+    """Test fetching many reports by ID in one call."""
+    reports = [Report(upload_id=uuid4(), study_instance_uid=f"S{i}", user_id="u") for i in range(3)]
+    for report in reports:
+        db.create_report(report)
+
+    found = db.get_reports_by_ids([reports[0].id, reports[2].id, uuid4()])
+    assert {r.id for r in found} == {reports[0].id, reports[2].id}
+
+
+def test_create_notifications(db):
+    """Test inserting many notifications at once."""
+    notifs = [
+        Notification(
+            user_id="user1",
+            notification_type=NotificationType.UPLOAD_COMPLETE,
+            title=f"T{i}",
+            message="M",
+        )
+        for i in range(5)
+    ]
+    db.create_notifications(notifs)
+
+    assert db.get_unread_count("user1") == 5
@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+import pytest
+from app.exceptions import InsufficientStorageError
+from app.storage import capacity
+from app.storage.capacity import DiskCapacity
+from app.storage.service import (
+    LocalStorageService,
+    PreallocatedStorageService,
+    S3StorageService,
+)
+
+Usage = namedtuple("Usage", "total used free")
+
+
+@pytest.fixture
+def disk(monkeypatch):
+    """Pretend the storage disk is 1000 bytes with 500 used; returns the mutable usage."""
+    state = {"used": 500}
+    monkeypatch.setattr(
+        capacity,
+        "disk_usage",
+        lambda path: Usage(1000, state["used"], 1000 - state["used"]),
+    )
+    return state
+
+
+def test_reservations_count_against_free_space(disk, tmp_path):
+    """Test a session is refused once used plus reserved space would pass max_usage."""
+    pool = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    pool.reserve("u1", 300)
+
+    with pytest.raises(InsufficientStorageError):
+        pool.reserve("u2", 200)
+    assert pool.rejected == 1
+
+    pool.release("u1")
+    pool.reserve("u2", 200)
+    assert pool.stats()["reserved"] == 200
+
+
+@pytest.mark.asyncio
+async def test_written_bytes_shrink_the_reservation(disk, tmp_path):
+    """Test bytes that reached the disk are not counted twice (reserved and used)."""
+    pool = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    pool.reserve("u1", 300)
+
+    disk["used"] += 250
+    await pool.consume("u1", 200)
+    await pool.consume("u1", 50)
+    await pool.consume("unknown", 10)
+
+    assert pool.reserved_bytes == 50
+    pool.reserve("u2", 100)
+    with pytest.raises(InsufficientStorageError):
+        pool.reserve("u3", 1)
+
+
+@pytest.mark.asyncio
+async def test_consumed_bytes_are_flushed_in_batches(disk, tmp_path, monkeypatch):
+    """Test per-chunk consumption is tallied in memory and written to the table periodically."""
+    worker_a = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    worker_b = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    worker_a.reserve("u1", 300)
+
+    monkeypatch.setattr(capacity, "CONSUME_FLUSH_SECONDS", 3600)
+    await worker_a.consume("u1", 100)
+    assert worker_b.reserved_bytes == 300  # Not written yet
+
+    monkeypatch.setattr(capacity, "CONSUME_FLUSH_SECONDS", 0)
+    await worker_a.consume("u1", 100)
+    assert worker_b.reserved_bytes == 100
+
+
+def test_reservations_are_shared_between_workers(disk, tmp_path):
+    """Test a worker sees the space another worker's uploads reserved on the same disk."""
+    worker_a = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    worker_b = DiskCapacity(tmp_path, max_usage=0.9, db_path=tmp_path / "capacity.db")
+    worker_a.reserve("u1", 300)
+
+    with pytest.raises(InsufficientStorageError):
+        worker_b.reserve("u2", 200)
+
+    worker_a.release("u1")
+    worker_b.reserve("u2", 200)
+    assert worker_a.upload_ids() == ["u2"]
+
+
+def test_missing_path_measures_nearest_parent(tmp_path):
+    """Test a storage directory that doesn't exist yet is measured on its parent's disk."""
+    usage = capacity.disk_usage(tmp_path / "temp_merge" / "not-yet")
+
+    assert usage.total > 0
+
+
+@pytest.mark.parametrize(
+    "service_class, footprint",
+    [
+        (LocalStorageService, 2),  # Chunk files plus the merged copy
+        (PreallocatedStorageService, 1),  # Chunks are written into the final file
+        (S3StorageService, 1),  # Only the merged copy is local
+    ],
+)
+def test_disk_bytes_per_backend(monkeypatch, service_class, footprint):
+    """Test each backend reserves the local disk space its uploads actually take."""
+    monkeypatch.setattr("boto3.client", lambda *args, **kwargs: None)
+
+    assert service_class().disk_bytes(100) == 100 * footprint
@@ -2,16 +2,6 @@ import asyncio
 from pathlib import Path
 
 import pytest
-from app.storage.service import LocalStorageService
-
-
-@pytest.fixture
-def local_storage(tmp_path):
-    """Return a LocalStorageService instance using a temp directory."""
-    service = LocalStorageService()
-    service.base_path = tmp_path / "storage"
-    service.base_path.mkdir(parents=True, exist_ok=True)
-    return service
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,100 @@
+import hashlib
+from uuid import uuid4
+
+import pytest
+from app.exceptions import ChecksumMismatchError, ChunkUploadError, PayloadTooLargeError
+from app.models.upload import ChunkDigest, StudyMetadata
+from app.storage.service import PreallocatedStorageService
+from app.upload.chunks import attach_known_chunks, store_chunk
+from app.upload.service import UploadSession
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Return a PreallocatedStorageService with 4-byte chunks in a temp directory."""
+    service = PreallocatedStorageService()
+    service.base_path = tmp_path / "storage"
+    service.base_path.mkdir(parents=True, exist_ok=True)
+    service.chunk_size = 4
+    return service
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_written_in_place(storage):
+    """Test out-of-order chunks land at their offsets in a single file."""
+    await storage.save_chunk("u1", "f1", 2, b"ij")
+    await storage.save_chunk("u1", "f1", 0, b"abcd")
+    await storage.save_chunk("u1", "f1", 1, b"efgh")
+
+    final_path = await storage.merge_chunks("u1", "f1", 3)
+
+    assert final_path.read_bytes() == b"abcdefghij"
+    assert sorted(p.name for p in final_path.parent.iterdir()) == ["chunks.idx", "final_file"]
+
+
+@pytest.mark.asyncio
+async def test_reserved_space_is_trimmed_on_merge(storage):
+    """Test a file preallocated for whole chunks ends at its last chunk's data."""
+    await storage.reserve_file("u1", "f1", total_chunks=2)
+    await storage.save_chunk("u1", "f1", 1, b"z")
+    assert not await storage.chunk_exists("u1", "f1", 0)
+
+    await storage.save_chunk("u1", "f1", 0, b"abcd")
+    assert await storage.verify_chunk("u1", "f1", 1, 1)
+
+    final_path = await storage.merge_chunks("u1", "f1", 2)
+    assert final_path.read_bytes() == b"abcdz"
+
+
+@pytest.mark.asyncio
+async def test_merge_rejects_missing_and_short_chunks(storage):
+    """Test gaps and short non-final chunks are caught by the index."""
+    await storage.save_chunk("u1", "f1", 1, b"efgh")
+    with pytest.raises(FileNotFoundError):
+        await storage.merge_chunks("u1", "f1", 2)
+
+    await storage.save_chunk("u1", "f1", 0, b"ab")
+    with pytest.raises(ChunkUploadError):
+        await storage.merge_chunks("u1", "f1", 2)
+
+
+@pytest.mark.asyncio
+async def test_oversized_chunk_is_rejected(storage):
+    """Test a chunk larger than the chunk size can't overwrite its neighbour."""
+    with pytest.raises(PayloadTooLargeError):
+        await storage.save_chunk("u1", "f1", 0, b"abcde")
+
+
+@pytest.mark.asyncio
+async def test_merge_verifies_checksums_in_place(storage):
+    """Test verify-on-merge re-hashes each chunk's range of the file."""
+    await storage.save_chunk("u1", "f1", 0, b"abcd")
+    await storage.save_chunk("u1", "f1", 1, b"ef")
+    checksums = {0: hashlib.md5(b"abcd").hexdigest(), 1: hashlib.md5(b"ef").hexdigest()}
+    await storage.merge_chunks("u1", "f1", 2, checksums, "md5")
+
+    checksums[1] = hashlib.md5(b"eg").hexdigest()
+    with pytest.raises(ChecksumMismatchError):
+        await storage.merge_chunks("u1", "f1", 2, checksums, "md5")
+
+
+@pytest.mark.asyncio
+async def test_store_chunk_bypasses_blob_store(storage):
+    """Test uploads write straight to the file and pre-flight attaches nothing."""
+    session = UploadSession(str(uuid4()), "user-1", 1, 100, SAMPLE_METADATA)
+
+    assert await store_chunk(storage, session, "f1", 0, b"abcd") == "received"
+    assert not (storage.base_path / "blobs").exists()
+
+    result = await attach_known_chunks(
+        storage,
+        session,
+        [ChunkDigest(file_id="f1", chunk_index=1, sha256=hashlib.sha256(b"ef").hexdigest())],
+    )
+    assert result.attached == []
+    assert len(result.missing) == 1
+
+    await storage.cleanup_upload(session.upload_id)
+    assert not (storage.base_path / session.upload_id).exists()
@@ -78,7 +78,9 @@ async def test_cleanup_s3_batch_delete(mock_s3_client):
     service = S3StorageService()
     mock_s3 = mock_s3_client.return_value
 
-    mock_s3.list_objects.return_value = {"Contents": [{"Key": "k1"}, {"Key": "k2"}]}
+    mock_s3.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": "k1"}, {"Key": "k2"}]}
+    ]
 
     await service.cleanup_upload("u1")
 
@@ -88,6 +90,23 @@ async def test_cleanup_s3_batch_delete(mock_s3_client):
     assert objs[0]["Key"] == "k1"
 
 
+@pytest.mark.asyncio
+async def test_cleanup_s3_paginates_large_uploads(mock_s3_client):
+    """Test every listed page is deleted, in requests of at most 1000 keys."""
+    service = S3StorageService()
+    mock_s3 = mock_s3_client.return_value
+    mock_s3.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": f"u1/f1/chunks/{i}.part"} for i in range(start, start + 1000)]}
+        for start in (0, 1000)
+    ] + [{"Contents": [{"Key": "u1/f1/final.dcm"}]}]
+
+    assert await service.delete_prefix("u1/") == 2001
+
+    batches = [c[1]["Delete"]["Objects"] for c in mock_s3.delete_objects.call_args_list]
+    assert sorted(len(batch) for batch in batches) == [1, 1000, 1000]
+    mock_s3.get_paginator.assert_called_with("list_objects_v2")
+
+
 @pytest.mark.asyncio
 async def test_presigned_url_generation(mock_s3_client):
     """Test pre-signed URL generation for direct uploads (if implemented)."""
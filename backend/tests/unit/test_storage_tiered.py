@@ -0,0 +1,116 @@
+import asyncio
+import shutil
+from unittest.mock import MagicMock
+
+import pytest
+from app.exceptions import DiskWriterBusyError, SpoolFullError
+from app.storage.service import LocalStorageService, TieredStorageService
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Return a stand-in S3 service whose upload/download copy files under tmp_path."""
+    bucket = tmp_path / "bucket"
+    service = MagicMock()
+    service.bucket = "bucket"
+
+    def upload_file(path, _bucket, key):
+        (bucket / key).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, bucket / key)
+
+    def download_file(_bucket, key, path):
+        shutil.copyfile(bucket / key, path)
+
+    service.s3.upload_file.side_effect = upload_file
+    service.s3.download_file.side_effect = download_file
+
+    async def cleanup_upload(upload_id):
+        shutil.rmtree(bucket / upload_id, ignore_errors=True)
+
+    service.cleanup_upload.side_effect = cleanup_upload
+    return service
+
+
+@pytest.fixture
+def storage(tmp_path, remote):
+    """Return a TieredStorageService spooling to a temp directory."""
+    local = LocalStorageService()
+    local.base_path = tmp_path / "spool"
+    local.base_path.mkdir()
+    service = TieredStorageService(local=local, remote=remote)
+    service.high_watermark, service.low_watermark = 0.9, 0.8
+    return service
+
+
+async def spool_file(storage, upload_id, file_id, data):
+    await storage.save_chunk(upload_id, file_id, 0, data)
+    final_path = await storage.merge_chunks(upload_id, file_id, 1)
+    await asyncio.gather(*storage._drains.values())
+    return final_path
+
+
+@pytest.mark.asyncio
+async def test_merged_file_is_drained_and_kept_as_cache(storage, tmp_path):
+    """Test a merged file is copied to S3 and still read from the spool."""
+    final_path = await spool_file(storage, "u1", "f1", b"dicom")
+
+    assert (tmp_path / "bucket" / "u1" / "f1" / "final.dcm").read_bytes() == b"dicom"
+    assert await storage.local_copy("u1", "f1", final_path) == final_path
+    storage.remote.s3.download_file.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_high_watermark_evicts_drained_files(storage, monkeypatch):
+    """Test drained files are evicted under disk pressure and fetched back on read."""
+    final_path = await spool_file(storage, "u1", "f1", b"dicom")
+    monkeypatch.setattr(storage, "disk_usage", lambda: 0.95 if final_path.exists() else 0.5)
+
+    await storage.save_chunk("u2", "f1", 0, b"next")
+
+    assert not final_path.exists()
+    assert storage.evicted_count == 1
+    assert await storage.local_copy("u1", "f1", final_path) == final_path
+    assert final_path.read_bytes() == b"dicom"
+
+
+@pytest.mark.asyncio
+async def test_full_spool_refuses_chunks_until_below_low_watermark(storage, monkeypatch):
+    """Test chunk writes are refused (as a busy disk) while nothing can be evicted."""
+    usage = [0.95]
+    monkeypatch.setattr(storage, "disk_usage", lambda: usage[0])
+
+    with pytest.raises(SpoolFullError):
+        await storage.save_chunk("u1", "f1", 0, b"data")
+
+    usage[0] = 0.85  # Under the high watermark, but not yet under the low one
+    with pytest.raises(DiskWriterBusyError):
+        await storage.save_chunk("u1", "f1", 0, b"data")
+
+    usage[0] = 0.5
+    await storage.save_chunk("u1", "f1", 0, b"data")
+    assert await storage.chunk_exists("u1", "f1", 0)
+
+
+@pytest.mark.asyncio
+async def test_files_being_read_are_not_evicted(storage, monkeypatch):
+    """Test a file handed out by local_copy stays until its upload is cleaned up."""
+    final_path = await spool_file(storage, "u1", "f1", b"dicom")
+    await storage.local_copy("u1", "f1", final_path)
+    monkeypatch.setattr(storage, "disk_usage", lambda: 0.95)
+
+    with pytest.raises(SpoolFullError):
+        await storage.save_chunk("u2", "f1", 0, b"next")
+    assert final_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_removes_both_tiers(storage, tmp_path):
+    """Test cleanup waits for the upload's drains and clears spool and bucket."""
+    await storage.save_chunk("u1", "f1", 0, b"dicom")
+    await storage.merge_chunks("u1", "f1", 1)
+
+    await storage.cleanup_upload("u1")
+
+    assert not (storage.local.base_path / "u1").exists()
+    assert not (tmp_path / "bucket" / "u1").exists()
+    assert storage._drains == {}
@@ -0,0 +1,194 @@
+import time
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.auth.dependencies import get_current_user, get_upload_token
+from app.auth.logout import is_token_revoked
+from app.auth.token_cache import (
+    REVOKED_TOKEN_PREFIX,
+    RevocationList,
+    VerifiedTokenCache,
+    authenticate_token,
+    revocation_list,
+    revoke_token,
+    token_cache,
+    token_hash,
+)
+from app.auth.utils import create_access_token, create_upload_token, verify_token
+from fastapi import HTTPException
+
+
+@pytest.fixture(autouse=True)
+def clean_singletons():
+    """Reset the shared token cache and revocation list around each test."""
+    token_cache.clear()
+    revocation_list._revoked.clear()
+    revocation_list._local.clear()
+    yield
+    token_cache.clear()
+    revocation_list._revoked.clear()
+    revocation_list._local.clear()
+
+
+def test_cache_hit_skips_verification():
+    """Test a cached token is not re-verified."""
+    token = create_access_token({"sub": "alice"})
+
+    with patch("app.auth.token_cache.verify_token", wraps=verify_token) as mock_verify:
+        first = authenticate_token(token)
+        second = authenticate_token(token)
+
+    assert first["sub"] == second["sub"] == "alice"
+    assert mock_verify.call_count == 1
+
+
+def test_cache_returns_copies():
+    """Test callers cannot mutate the cached payload."""
+    token = create_access_token({"sub": "alice"})
+    authenticate_token(token)["sub"] = "mallory"
+
+    assert authenticate_token(token)["sub"] == "alice"
+
+
+def test_cache_entry_expires_at_exp():
+    """Test entries are dropped once the token's exp has passed."""
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("k", {"sub": "alice", "exp": time.time() - 1})
+
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_cache_skips_tokens_without_exp():
+    """Test tokens without an exp claim are never cached."""
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("k", {"sub": "alice"})
+
+    assert cache.get("k") is None
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the cache stays within max_size, evicting LRU entries."""
+    cache = VerifiedTokenCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_invalid_token_not_cached():
+    """Test invalid tokens are rejected and not cached."""
+    assert authenticate_token("not-a-jwt") is None
+    assert len(token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_rejected():
+    """Test a revoked token is rejected even when already cached."""
+    token = create_access_token({"sub": "alice"})
+    assert authenticate_token(token) is not None
+
+    with patch("app.auth.token_cache.cache_service") as mock_cache:
+        mock_cache.set = AsyncMock()
+        await revoke_token(token)
+
+    assert authenticate_token(token) is None
+    key, _ = mock_cache.set.call_args.args
+    assert key == f"{REVOKED_TOKEN_PREFIX}{token_hash(token)}"
+    # Redis entry lives until the token would have expired anyway
+    assert 0 < mock_cache.set.call_args.kwargs["expire"] <= 15 * 60
+
+
+@pytest.mark.asyncio
+async def test_sync_loads_revocations_from_redis():
+    """Test revocations made by other workers arrive via sync."""
+    revocations = RevocationList(sync_interval=60)
+    with patch("app.auth.token_cache.cache_service") as mock_cache:
+        mock_cache.scan_keys = AsyncMock(return_value=[f"{REVOKED_TOKEN_PREFIX}abc"])
+        await revocations.sync()
+
+    assert revocations.is_revoked("abc")
+    assert not revocations.is_revoked("def")
+
+
+@pytest.mark.asyncio
+async def test_sync_keeps_local_revocations():
+    """Test local revocations survive a sync that does not see them."""
+    revocations = RevocationList(sync_interval=60)
+    revocations.add("local", time.time() + 60)
+    revocations.add("expired", time.time() - 1)
+
+    with patch("app.auth.token_cache.cache_service") as mock_cache:
+        mock_cache.scan_keys = AsyncMock(return_value=[])
+        await revocations.sync()
+
+    assert revocations.is_revoked("local")
+    assert not revocations.is_revoked("expired")
+
+
+@pytest.mark.asyncio
+async def test_sync_failure_keeps_previous_list():
+    """Test a Redis error during sync leaves the current list in place."""
+    revocations = RevocationList(sync_interval=60)
+    with patch("app.auth.token_cache.cache_service") as mock_cache:
+        mock_cache.scan_keys = AsyncMock(return_value=[f"{REVOKED_TOKEN_PREFIX}abc"])
+        await revocations.sync()
+        mock_cache.scan_keys = AsyncMock(side_effect=ConnectionError("down"))
+        await revocations.sync()
+
+    assert revocations.is_revoked("abc")
+
+
+@pytest.mark.asyncio
+async def test_sync_without_redis_keeps_previous_list():
+    """Test an unavailable cache is not mistaken for an empty revocation list."""
+    revocations = RevocationList(sync_interval=60)
+    with patch("app.auth.token_cache.cache_service") as mock_cache:
+        mock_cache.scan_keys = AsyncMock(return_value=[f"{REVOKED_TOKEN_PREFIX}abc"])
+        await revocations.sync()
+        mock_cache.scan_keys = AsyncMock(return_value=None)
+        await revocations.sync()
+
+    assert revocations.is_revoked("abc")
+
+
+@pytest.mark.asyncio
+async def test_is_token_revoked_checks_local_list():
+    """Test is_token_revoked answers from the local list without Redis."""
+    token = create_access_token({"sub": "alice"})
+    revocation_list.add(token_hash(token), time.time() + 60)
+
+    with patch("app.auth.logout.cache_service") as mock_cache:
+        mock_cache.get = AsyncMock()
+        assert await is_token_revoked(token) is True
+        mock_cache.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_revoked():
+    """Test the access token dependency enforces revocation."""
+    token = create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+    assert (await get_current_user(token=token, token_query=None))["sub"] == "alice"
+
+    revocation_list.add(token_hash(token), time.time() + 60)
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token=token, token_query=None)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_upload_token_requires_upload_type():
+    """Test the upload dependency accepts upload tokens only."""
+    upload_token = create_upload_token("upload-1", "user-1")
+    assert (await get_upload_token(token=upload_token))["sub"] == "upload-1"
+
+    with pytest.raises(HTTPException):
+        await get_upload_token(token=create_access_token({"sub": "alice"}))
+    with pytest.raises(HTTPException):
+        await get_upload_token(token=None)
@@ -1,10 +1,19 @@
+import asyncio
 import csv
 import io
+import sqlite3
+import threading
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from app.cache.service import CacheService
+from app.config import get_settings
 from app.upload.analytics import export_stats_to_csv, generate_trend_data
 from app.upload.service import StatsManager
 
+settings = get_settings()
+
 
 @pytest.fixture
 def stats_manager(tmp_path):
@@ -100,8 +109,7 @@ def test_export_stats_to_csv_headers():
 
 def test_generate_trend_data():
     """Test trend data generation for charts."""
-    stats = {}  # Mock stats, function uses mock data anyway
-    trend = generate_trend_data(stats, period="7d")
+    trend = generate_trend_data({}, period="7d")
 
     assert isinstance(trend, list)
     assert len(trend) == 7
@@ -111,9 +119,91 @@ def test_generate_trend_data():
 
 def test_generate_trend_data_daily_buckets():
     """Test trend data bucketed by day."""
-    stats = {}
-    trend = generate_trend_data(stats, period="30d")
+    trend = generate_trend_data({}, period="30d")
     assert len(trend) == 30
+    assert all(point["count"] == 0 for point in trend)
+
+
+def test_trend_data_from_rollups(stats_manager):
+    """Test the trend series reports real per-day counts."""
+    stats_manager.record_upload("CT", "STAT")
+    stats_manager.record_upload("CT", "STAT")
+    stats_manager.record_upload("MR", "STAT", "failed")
+
+    trend = generate_trend_data(stats_manager.get_daily_counts(7), period="7d")
+
+    assert trend[-1]["date"] == datetime.now(UTC).strftime("%Y-%m-%d")
+    assert trend[-1]["count"] == 2
+    assert trend[-1]["failed"] == 1
+    assert sum(point["count"] for point in trend[:-1]) == 0
+
+
+def test_period_uses_hourly_rollup_at_cutoff(stats_manager):
+    """Test the cutoff day is filtered by hour, later days by the daily rollup."""
+    now = datetime.now(UTC)
+    with sqlite3.connect(stats_manager.db_path) as conn:
+        for hours_ago in (7 * 24 + 2, 7 * 24 - 2, 24):
+            conn.execute(
+                "INSERT INTO upload_stats (modality, service_level, status, timestamp) "
+                "VALUES ('ct', 'stat', 'success', ?)",
+                ((now - timedelta(hours=hours_ago)).strftime("%Y-%m-%d %H:%M:%S"),),
+            )
+
+    assert stats_manager.get_stats(period="1w")["total_uploads"] == 2
+    assert stats_manager.get_stats()["total_uploads"] == 3
+
+
+def test_rollups_built_for_existing_events(tmp_path):
+    """Test a database from before the rollups existed is backfilled once."""
+    db_path = tmp_path / "stats.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE upload_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, modality TEXT, "
+            "service_level TEXT, status TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        conn.execute(
+            "INSERT INTO upload_stats (modality, service_level, status) VALUES ('ct', 'stat', 'success')"
+        )
+
+    manager = StatsManager(db_path)
+    manager.record_upload("CT", "STAT")
+    assert manager.get_stats()["modality"]["ct"] == 2
+
+    # Reopening must not rebuild (and double count) the rollups
+    assert StatsManager(db_path).get_stats()["modality"]["ct"] == 2
+
+
+def test_rollups_built_once_by_concurrent_workers(tmp_path):
+    """Test workers opening an old database at the same time build the rollups once."""
+    db_path = tmp_path / "stats.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE upload_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, modality TEXT, "
+            "service_level TEXT, status TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        conn.executemany(
+            "INSERT INTO upload_stats (modality, service_level, status) VALUES (?, ?, ?)",
+            [("ct", "stat", "success")] * 100,
+        )
+
+    errors = []
+    start = threading.Barrier(8)
+
+    def open_manager():
+        start.wait()
+        try:
+            StatsManager(db_path)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=open_manager) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert StatsManager(db_path).get_stats()["modality"]["ct"] == 100
 
 
 def test_stats_persistence(tmp_path):
@@ -121,6 +211,7 @@ def test_stats_persistence(tmp_path):
     db_path = tmp_path / "stats.db"
     mgr1 = StatsManager(db_path)
     mgr1.record_upload("CT", "STAT")
+    mgr1.flush()
 
     mgr2 = StatsManager(db_path)
     stats = mgr2.get_stats()
@@ -135,3 +226,118 @@ def test_stats_aggregation_performance(stats_manager):
     stats_manager.get_stats()
     duration = time.time() - start
     assert duration < 1.0  # Should be very fast
+
+
+def count_events(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM upload_stats").fetchone()[0]
+
+
+def test_record_upload_is_buffered(stats_manager):
+    """Test events are held in memory until flushed."""
+    stats_manager.record_upload("CT", "STAT")
+
+    assert stats_manager.pending == 1
+    assert count_events(stats_manager.db_path) == 0
+    assert stats_manager.flush() == 1
+    assert count_events(stats_manager.db_path) == 1
+
+
+def test_flush_at_size_threshold(tmp_path):
+    """Test reaching flush_size writes the batch without a background task."""
+    manager = StatsManager(tmp_path / "stats.db", flush_size=3)
+    for _ in range(3):
+        manager.record_upload("CT", "STAT")
+
+    assert manager.pending == 0
+    assert count_events(manager.db_path) == 3
+
+
+def test_failed_flush_keeps_events(stats_manager):
+    """Test events survive a failed write and go out with the next flush."""
+    stats_manager.record_upload("CT", "STAT")
+    with patch(
+        "app.upload.service.sqlite3.connect", side_effect=sqlite3.OperationalError("locked")
+    ):
+        with pytest.raises(sqlite3.OperationalError):
+            stats_manager.flush()
+
+    assert stats_manager.pending == 1
+    assert stats_manager.get_stats()["total_uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_buffer(tmp_path):
+    """Test shutdown writes events recorded since the last flush."""
+    manager = StatsManager(tmp_path / "stats.db", flush_interval=60)
+    await manager.start()
+    manager.record_upload("CT", "STAT")
+    await manager.stop()
+
+    assert count_events(manager.db_path) == 1
+
+
+@pytest.mark.asyncio
+async def test_background_flush_on_threshold(tmp_path):
+    """Test a full buffer wakes the flush task instead of writing inline."""
+    manager = StatsManager(tmp_path / "stats.db", flush_interval=60, flush_size=2)
+    await manager.start()
+    try:
+        manager.record_upload("CT", "STAT")
+        manager.record_upload("CT", "STAT")
+        assert manager.pending == 2
+        for _ in range(100):
+            if count_events(manager.db_path) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert count_events(manager.db_path) == 2
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoints_read_off_the_event_loop(monkeypatch):
+    """Test the stats routes flush and query SQLite in a worker thread."""
+    from app.upload import router as upload_router
+
+    threads = []
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return {}
+
+    monkeypatch.setattr(upload_router.stats_manager, "get_stats", record_thread)
+    monkeypatch.setattr(upload_router.stats_manager, "get_daily_counts", record_thread)
+    monkeypatch.setattr(upload_router, "cache_service", CacheService())
+    upload_router.cache_service.redis_url = None
+
+    await upload_router.get_upload_stats(period=None, user={})
+    await upload_router.get_trend_data(period="7d", user={})
+
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoints_share_cached_reads(monkeypatch):
+    """Test the trend route fetches both stats keys in one MGET and refills them in one mset."""
+    from app.upload import router as upload_router
+
+    cache = MagicMock()
+    cache.mget = AsyncMock(return_value={"stats:7d": {"total_uploads": 3}})
+    cache.mset = AsyncMock()
+    monkeypatch.setattr(upload_router, "cache_service", cache)
+    get_stats = MagicMock()
+    monkeypatch.setattr(upload_router.stats_manager, "get_stats", get_stats)
+    monkeypatch.setattr(
+        upload_router.stats_manager, "get_daily_counts", lambda days: {"2024-01-01": {}}
+    )
+
+    result = await upload_router.get_trend_data(period="7d", user={})
+
+    assert result["summary"] == {"total_uploads": 3}
+    get_stats.assert_not_called()
+    cache.mget.assert_awaited_once_with(["stats:7d", "stats:daily:7"])
+    cache.mset.assert_awaited_once_with(
+        {"stats:daily:7": {"2024-01-01": {}}}, expire=settings.stats_cache_ttl_seconds
+    )
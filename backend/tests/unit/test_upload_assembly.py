@@ -0,0 +1,114 @@
+import hashlib
+from uuid import uuid4
+
+import pytest
+from app.exceptions import ChunkUploadError
+from app.models.upload import StudyMetadata, UploadInitRequest
+from app.upload.assembly import assemble_file, file_assembler
+from app.upload.chunks import store_chunk
+from app.upload.service import UploadSession
+from pydantic import ValidationError
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+@pytest.fixture
+def session():
+    return UploadSession(str(uuid4()), "user-1", 1, 100, SAMPLE_METADATA)
+
+
+def halves(data: bytes) -> tuple[bytes, bytes]:
+    return data[: len(data) // 2], data[len(data) // 2 :]
+
+
+def test_ready_to_assemble_needs_manifest_and_every_chunk(session):
+    """Test a file is only ready once its declared chunks have all arrived."""
+    session.register_file_chunk("f1", 1, 10)
+    assert not session.ready_to_assemble("f1")
+
+    session.set_manifest("f1", total_chunks=2)
+    assert not session.ready_to_assemble("f1")
+
+    session.register_file_chunk("f1", 0, 10)
+    assert session.ready_to_assemble("f1")
+
+
+def test_first_manifest_declaration_wins(session):
+    """Test a later total_chunks can't override the init manifest."""
+    session.set_manifest("f1", total_chunks=3, size_bytes=30)
+    session.set_manifest("f1", total_chunks=1)
+
+    assert session.expected_chunks("f1") == 3
+    assert session.manifest["f1"]["size_bytes"] == 30
+
+
+def test_init_rejects_duplicate_manifest_entries():
+    """Test the init manifest can't list the same file twice."""
+    with pytest.raises(ValidationError):
+        UploadInitRequest(
+            total_files=2,
+            total_size=100,
+            metadata=SAMPLE_METADATA,
+            files=[{"file_id": "f1", "total_chunks": 1}, {"file_id": "f1", "total_chunks": 2}],
+        )
+
+
+@pytest.mark.asyncio
+async def test_last_chunk_triggers_background_assembly(local_storage, session, dummy_dicom_data):
+    """Test the file is merged and parsed as soon as its last chunk is stored."""
+    first, second = halves(dummy_dicom_data)
+    session.set_manifest(
+        "f1",
+        total_chunks=2,
+        size_bytes=len(dummy_dicom_data),
+        sha256=hashlib.sha256(dummy_dicom_data).hexdigest(),
+    )
+
+    await store_chunk(local_storage, session, "f1", 1, second)
+    assert not session.files["f1"]["complete"]
+    await store_chunk(local_storage, session, "f1", 0, first)
+    await file_assembler.wait(session.upload_id)
+
+    info = session.files["f1"]
+    assert info["complete"]
+    assert info["error"] is None
+    assert open(info["path"], "rb").read() == dummy_dicom_data
+    sop_instance_uid, digest = info["instance_key"]
+    assert sop_instance_uid
+    assert digest == hashlib.sha256(dummy_dicom_data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_manifest_mismatch_is_reported(local_storage, session, dummy_dicom_data):
+    """Test a merged file that doesn't match its declared size carries an error."""
+    session.set_manifest("f1", total_chunks=1, size_bytes=len(dummy_dicom_data) + 1)
+
+    await store_chunk(local_storage, session, "f1", 0, dummy_dicom_data)
+    await file_assembler.wait(session.upload_id)
+
+    info = session.files["f1"]
+    assert info["complete"]
+    assert info["path"] is None
+    assert "does not match manifest" in info["error"]
+
+
+@pytest.mark.asyncio
+async def test_assemble_without_manifest_requires_contiguous_chunks(local_storage, session):
+    """Test inline assembly of an undeclared file fails on a gap in its chunks."""
+    await store_chunk(local_storage, session, "f1", 0, b"a")
+    await store_chunk(local_storage, session, "f1", 2, b"c")
+
+    with pytest.raises(ChunkUploadError, match="Missing chunks"):
+        await assemble_file(local_storage, session, "f1")
+
+
+@pytest.mark.asyncio
+async def test_assemble_without_manifest_hashes_for_instance_key(
+    local_storage, session, dummy_dicom_data
+):
+    """Test a file with no declared hash still gets its SHA-256 in the instance key."""
+    await store_chunk(local_storage, session, "f1", 0, dummy_dicom_data)
+
+    await assemble_file(local_storage, session, "f1")
+
+    assert session.files["f1"]["instance_key"][1] == hashlib.sha256(dummy_dicom_data).hexdigest()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+from uuid import uuid4
+
+import pytest
+from app.exceptions import ChunkUploadError
+from app.models.upload import StudyMetadata
+from app.upload.chunks import HEADER_LENGTH, read_chunk_batch, store_chunk_batch
+from app.upload.service import UploadSession
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+@pytest.fixture
+def session():
+    return UploadSession(str(uuid4()), "user-1", 2, 100, SAMPLE_METADATA)
+
+
+def record(file_id: str, chunk_index: int, data: bytes, md5: str | None = None) -> bytes:
+    header = {"file_id": file_id, "chunk_index": chunk_index, "size": len(data)}
+    if md5:
+        header["md5"] = md5
+    encoded = json.dumps(header).encode()
+    return HEADER_LENGTH.pack(len(encoded)) + encoded + data
+
+
+async def stream_of(body: bytes, piece: int = 7):
+    """Yield body in small pieces so records straddle read boundaries."""
+    for offset in range(0, len(body), piece):
+        yield body[offset : offset + piece]
+
+
+@pytest.mark.asyncio
+async def test_read_batch_across_arbitrary_boundaries():
+    """Test records are reassembled regardless of how the body is split."""
+    body = record("a", 0, b"hello") + record("b", 3, b"x" * 20)
+
+    records = [r async for r in read_chunk_batch(stream_of(body), 1024, 10)]
+
+    assert [(r.file_id, r.chunk_index, data) for r, data in records] == [
+        ("a", 0, b"hello"),
+        ("b", 3, b"x" * 20),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "body, max_records",
+    [
+        (record("a", 0, b"hello")[:-2], 10),  # Truncated data
+        (HEADER_LENGTH.pack(4) + b"nope", 10),  # Header is not JSON
+        (record("a", 0, b"x" * 2048), 10),  # Chunk larger than allowed
+        (record("a", 0, b"x") + record("a", 1, b"y"), 1),  # Too many records
+    ],
+)
+async def test_read_batch_rejects_bad_framing(body, max_records):
+    """Test malformed batches raise ChunkUploadError."""
+    with pytest.raises(ChunkUploadError):
+        _ = [r async for r in read_chunk_batch(stream_of(body), 1024, max_records)]
+
+
+@pytest.mark.asyncio
+async def test_store_batch_writes_and_registers_chunks(local_storage, session):
+    """Test every record is written to storage and registered on the session."""
+    body = record("f1", 0, b"abc") + record("f1", 1, b"defg") + record("f2", 0, b"z")
+
+    result = await store_chunk_batch(local_storage, session, stream_of(body), 1024, 10)
+
+    assert [c.status for c in result.chunks] == ["received"] * 3
+    assert result.received_bytes == 8
+    assert session.files["f1"]["chunks"] == {0, 1}
+    assert session.recorded_checksum("f1", 1) == hashlib.sha256(b"defg").hexdigest()
+    part = local_storage.base_path / session.upload_id / "f1" / "1.part"
+    assert part.read_bytes() == b"defg"
+
+
+@pytest.mark.asyncio
+async def test_store_batch_is_idempotent(local_storage, session):
+    """Test resending a batch skips chunks that are already stored."""
+    body = record("f1", 0, b"abc")
+    await store_chunk_batch(local_storage, session, stream_of(body), 1024, 10)
+
+    result = await store_chunk_batch(local_storage, session, stream_of(body), 1024, 10)
+
+    assert result.chunks[0].status == "skipped"
+    assert result.received_bytes == 0
+    assert session.uploaded_bytes == 3
+
+
+@pytest.mark.asyncio
+async def test_store_batch_rejects_checksum_mismatch(local_storage, session):
+    """Test a record with a wrong md5 is not stored but the rest of the batch is."""
+    body = record("f1", 0, b"abc", md5="0" * 32) + record(
+        "f1", 1, b"def", md5=hashlib.md5(b"def").hexdigest()
+    )
+
+    result = await store_chunk_batch(local_storage, session, stream_of(body), 1024, 10)
+
+    assert [c.status for c in result.chunks] == ["checksum_mismatch", "received"]
+    assert session.files["f1"]["chunks"] == {1}
+    assert not (local_storage.base_path / session.upload_id / "f1" / "0.part").exists()
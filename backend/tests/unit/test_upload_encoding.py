@@ -0,0 +1,138 @@
+import gzip
+import zlib
+from uuid import uuid4
+
+import pytest
+from app.exceptions import ChunkUploadError, PayloadTooLargeError
+from app.models.upload import StudyMetadata
+from app.upload.encoding import ChunkDecoder, decode_stream, supported_encodings
+from app.upload.service import UploadManager, UploadSession
+
+PAYLOAD = b"DICM" + bytes(range(256)) * 400
+SAMPLE_METADATA = StudyMetadata(patient_name="Test", study_date="2023-01-01", modality="CT")
+
+
+async def stream_of(body: bytes, piece: int = 1000):
+    for offset in range(0, len(body), piece):
+        yield body[offset : offset + piece]
+
+
+async def decode(body: bytes, encoding: str, max_bytes: int = 10**7) -> tuple[bytes, ChunkDecoder]:
+    decoder = ChunkDecoder(encoding, max_bytes)
+    data = b"".join([piece async for piece in decode_stream(stream_of(body), decoder)])
+    return data, decoder
+
+
+@pytest.mark.asyncio
+async def test_gzip_round_trip():
+    """Test gzip bodies are decoded and both sides of the transfer are counted."""
+    wire = gzip.compress(PAYLOAD)
+
+    data, decoder = await decode(wire, "gzip")
+
+    assert data == PAYLOAD
+    assert decoder.wire_bytes == len(wire)
+    assert decoder.decoded_bytes == len(PAYLOAD)
+
+
+@pytest.mark.asyncio
+async def test_zstd_round_trip():
+    """Test zstd bodies are decoded when zstandard is installed."""
+    zstandard = pytest.importorskip("zstandard")
+    assert "zstd" in supported_encodings()
+
+    data, _ = await decode(zstandard.ZstdCompressor().compress(PAYLOAD), "zstd")
+
+    assert data == PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_identity_passes_through():
+    """Test uncompressed bodies are returned as sent."""
+    data, decoder = await decode(PAYLOAD, "identity")
+
+    assert data == PAYLOAD
+    assert decoder.wire_bytes == decoder.decoded_bytes
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_decompression_bomb_is_stopped(encoding):
+    """Test a small body that expands past the limit fails without decoding it all."""
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        bomb = zstandard.ZstdCompressor().compress(bytes(50 * 1024 * 1024))
+    else:
+        bomb = gzip.compress(bytes(50 * 1024 * 1024))
+    assert len(bomb) < 100 * 1024
+
+    decoder = ChunkDecoder(encoding, max_bytes=1024 * 1024)
+    with pytest.raises(PayloadTooLargeError):
+        decoder.decode(bomb)
+    assert decoder.decoded_bytes <= 1024 * 1024 + 64 * 1024
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+async def test_truncated_body_is_rejected(encoding):
+    """Test a compressed body cut short is an error, not a short chunk."""
+    if encoding == "zstd":
+        wire = pytest.importorskip("zstandard").ZstdCompressor().compress(PAYLOAD)
+    else:
+        wire = gzip.compress(PAYLOAD)
+
+    with pytest.raises(ChunkUploadError):
+        await decode(wire[: len(wire) // 2], encoding)
+
+
+@pytest.mark.asyncio
+async def test_corrupt_gzip_is_rejected():
+    """Test bodies that are not valid gzip raise ChunkUploadError."""
+    with pytest.raises(ChunkUploadError):
+        await decode(zlib.compress(PAYLOAD), "gzip")
+
+
+@pytest.mark.asyncio
+async def test_session_reports_compression_ratio(tmp_path):
+    """Test the per-upload ratio is persisted with the session."""
+    manager = UploadManager(persistence_dir=tmp_path)
+    response = await manager.create_session(
+        "user-1",
+        StudyMetadata(patient_name="Test", study_date="2023-01-01", modality="CT"),
+        1,
+        1000,
+    )
+    session = manager.get_session(str(response.upload_id))
+    assert session.compression_ratio is None
+    assert response.supported_encodings
+
+    session.record_transfer(wire_bytes=250, decoded_bytes=1000)
+    manager.update_session(session)
+
+    reloaded = UploadManager(persistence_dir=tmp_path).get_session(session.upload_id)
+    assert reloaded.compression_ratio == 4.0
+
+
+def test_chunk_endpoint_stops_decompression_bomb(client, monkeypatch):
+    """Test a small gzip body can't decode past one chunk through PUT /chunk."""
+    from app.auth.utils import create_upload_token
+    from app.upload import router as upload_router
+    from app.upload.service import upload_manager
+
+    monkeypatch.setattr(upload_router.settings, "chunk_size_mb", 1)
+    session = UploadSession(str(uuid4()), "user-1", 1, 100, SAMPLE_METADATA)
+    monkeypatch.setitem(upload_manager._sessions, session.upload_id, session)
+    bomb = gzip.compress(b"\0" * (8 * 1024 * 1024))  # 8 KiB on the wire
+
+    response = client.put(
+        f"/upload/{session.upload_id}/chunk",
+        params={"chunk_index": 0, "file_id": "f1"},
+        content=bomb,
+        headers={
+            "Authorization": f"Bearer {create_upload_token(session.upload_id, 'user-1')}",
+            "Content-Encoding": "gzip",
+        },
+    )
+
+    assert response.status_code == 413
+    assert session.files == {}
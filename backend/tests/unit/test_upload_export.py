@@ -0,0 +1,135 @@
+import csv
+import io
+import sqlite3
+import uuid
+from datetime import UTC, date, datetime
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from app.db.database import Base
+from app.db.models import StudyUpload
+from app.upload.export import (
+    EXPORT_COLUMNS,
+    export_history,
+    iter_study_uploads,
+    iter_upload_stats,
+    stream_csv,
+)
+from app.upload.service import StatsManager
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+@pytest.fixture
+def stats_db(tmp_path):
+    """Stats database with one event per day from 2024-01-01 to 2024-01-05."""
+    manager = StatsManager(tmp_path / "stats.db")
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.executemany(
+            "INSERT INTO upload_stats (modality, service_level, status, timestamp) "
+            "VALUES ('ct', 'stat', 'success', ?)",
+            [(f"2024-01-0{day} 12:00:00",) for day in range(1, 6)],
+        )
+    return manager.db_path
+
+
+@pytest_asyncio.fixture
+async def study_session_factory(tmp_path):
+    """Async session factory over a temporary study_uploads table."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'studies.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[StudyUpload.__table__])
+        )
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        for day in (1, 2, 3):
+            db.add(
+                StudyUpload(
+                    id=uuid.uuid4(),
+                    upload_id=f"upload-{day}",
+                    study_instance_uid=f"1.2.{day}",
+                    patient_id="PID",
+                    study_hash="h" * 64,
+                    created_at=datetime(2024, 1, day, 9, tzinfo=UTC),
+                )
+            )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+async def collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_upload_stats_date_range_is_inclusive(stats_db):
+    """Test start/end select whole UTC days, both ends included."""
+    batches = [b async for b in iter_upload_stats(stats_db, date(2024, 1, 2), date(2024, 1, 4))]
+    rows = [row for batch in batches for row in batch]
+
+    assert [row[4].day for row in rows] == [2, 3, 4]
+    assert rows[0][4].tzinfo is UTC
+
+
+@pytest.mark.asyncio
+async def test_upload_stats_read_in_batches(stats_db):
+    """Test rows are fetched batch by batch rather than all at once."""
+    with patch("app.upload.export.EXPORT_BATCH_SIZE", 2):
+        batches = [b async for b in iter_upload_stats(stats_db)]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_csv_stream(stats_db):
+    """Test the CSV stream has a header and one line per event."""
+    body = await collect(
+        stream_csv(EXPORT_COLUMNS["stats"], iter_upload_stats(stats_db, end=date(2024, 1, 2)))
+    )
+    rows = list(csv.reader(io.StringIO(body.decode())))
+
+    assert rows[0] == EXPORT_COLUMNS["stats"]
+    assert len(rows) == 3
+    assert rows[1][4] == "2024-01-01T12:00:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_study_uploads_export_omits_patient_id(study_session_factory):
+    """Test study history streams in order and leaves out patient identifiers."""
+    with patch("app.upload.export.get_async_session_factory", return_value=study_session_factory):
+        body = await collect(export_history("studies", "csv", "unused", start=date(2024, 1, 2)))
+
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows[0] == ["upload_id", "study_instance_uid", "user_id", "created_at"]
+    assert [row[0] for row in rows[1:]] == ["upload-2", "upload-3"]
+    assert "PID" not in body.decode()
+
+
+@pytest.mark.asyncio
+async def test_study_uploads_read_in_batches(study_session_factory):
+    """Test study rows come in batches, oldest first, with the end day included."""
+    with (
+        patch("app.upload.export.get_async_session_factory", return_value=study_session_factory),
+        patch("app.upload.export.EXPORT_BATCH_SIZE", 1),
+    ):
+        batches = [b async for b in iter_study_uploads(end=date(2024, 1, 2))]
+
+    assert [[row[0] for row in batch] for batch in batches] == [["upload-1"], ["upload-2"]]
+    assert batches[0][0][3] == datetime(2024, 1, 1, 9, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_parquet_stream_round_trip(stats_db):
+    """Test the Parquet stream is a readable file with one row group per batch."""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    with patch("app.upload.export.EXPORT_BATCH_SIZE", 2):
+        body = await collect(export_history("stats", "parquet", stats_db))
+
+    parquet_file = pq.ParquetFile(io.BytesIO(body))
+    table = parquet_file.read()
+    assert parquet_file.num_row_groups == 3
+    assert table.num_rows == 5
+    assert table.column("modality").to_pylist() == ["ct"] * 5
@@ -216,6 +216,23 @@ async def test_session_recovery_after_crash(manager, tmp_path):
     assert restored.user_id == "u1"
 
 
+@pytest.mark.asyncio
+async def test_instance_key_survives_restart(manager):
+    """Test the instance key computed on assembly is restored with the session."""
+    response = await manager.create_session("u1", SAMPLE_METADATA, 1, 100)
+    uid = str(response.upload_id)
+    session = manager.get_session(uid)
+    session.register_file_chunk("f1", 0, 1024)
+    session.register_file_chunk("f2", 0, 1024)
+    session.files["f1"]["instance_key"] = ("1.2.3", "d" * 64)
+    manager.update_session(session)
+
+    restored = UploadManager(persistence_dir=manager.persistence_dir).get_session(uid)
+
+    assert restored.files["f1"]["instance_key"] == ("1.2.3", "d" * 64)
+    assert "instance_key" not in restored.files["f2"]
+
+
 @pytest.mark.asyncio
 async def test_concurrent_session_access(manager):
     """Test basic concurrent create operations."""
@@ -0,0 +1,113 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.upload import StudyMetadata
+from app.storage.capacity import DiskCapacity
+from app.tasks import cleanup
+from app.tasks.cleanup import UploadReaper
+from app.upload.service import SessionTable, UploadManager, UploadSession
+
+SAMPLE_METADATA = StudyMetadata(patient_name="Test Patient", study_date="2023-01-01", modality="CT")
+
+
+def expiring_session(upload_id: str, minutes: int) -> UploadSession:
+    session = UploadSession(upload_id, "user-1", 1, 100, SAMPLE_METADATA)
+    session.expires_at = datetime.now(UTC) + timedelta(minutes=minutes)
+    return session
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Return a fresh UploadManager instance with temp persistence dir."""
+    return UploadManager(persistence_dir=tmp_path / "sessions")
+
+
+def test_expiry_index_returns_earliest_first():
+    """Test expired sessions come off the index in expiry order, a limited batch at a time."""
+    table = SessionTable()
+    for upload_id, minutes in [("late", -1), ("live", 10), ("early", -30), ("mid", -5)]:
+        table[upload_id] = expiring_session(upload_id, minutes)
+
+    now = datetime.now(UTC)
+    assert table.pop_expired(now, limit=2) == ["early", "mid"]
+    assert table.pop_expired(now) == ["late"]
+    assert table.pop_expired(now) == []
+
+
+def test_expiry_index_follows_changes():
+    """Test removed and extended sessions are skipped, and re-indexed ones are found again."""
+    table = SessionTable()
+    table["gone"] = expiring_session("gone", -10)
+    table["extended"] = expiring_session("extended", -5)
+    table["retry"] = expiring_session("retry", -1)
+    del table["gone"]
+    table["extended"].expires_at = datetime.now(UTC) + timedelta(minutes=10)
+
+    assert table.pop_expired(datetime.now(UTC)) == ["retry"]
+    table.reindex("retry")
+    assert table.pop_expired(datetime.now(UTC)) == ["retry"]
+
+
+@pytest.mark.asyncio
+async def test_reaper_removes_one_batch_per_pass(manager):
+    """Test each pass reaps at most batch_size sessions and a failed cleanup is retried."""
+    for i in range(3):
+        response = await manager.create_session(f"u{i}", SAMPLE_METADATA, 1, 100)
+        session = manager.get_session(str(response.upload_id))
+        session.expires_at = datetime.now(UTC) - timedelta(minutes=10 - i)
+        manager.update_session(session)
+    storage = MagicMock()
+    storage.cleanup_upload = AsyncMock(side_effect=[OSError("busy"), None, None, None])
+    reaper = UploadReaper(storage, manager, batch_size=2)
+
+    assert await reaper.reap_expired() == 1  # The first cleanup failed
+    assert await reaper.reap_expired() == 2
+    assert await reaper.reap_expired() == 0
+    assert manager._sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_storage_without_session(manager, local_storage):
+    """Test the sweep deletes upload data that no session, here or on disk, owns."""
+    response = await manager.create_session("u1", SAMPLE_METADATA, 1, 100)
+    owned = str(response.upload_id)
+    await local_storage.save_chunk(owned, "f1", 0, b"data")
+    await local_storage.save_chunk("orphan", "f1", 0, b"data")
+
+    reaper = UploadReaper(local_storage, manager)
+    assert await reaper.sweep_orphans() == 1
+
+    assert await local_storage.list_uploads() == {owned}
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_expired_sessions_of_other_processes(manager, local_storage):
+    """Test expired session files this process never loaded are cleaned up too."""
+    other = UploadManager(persistence_dir=manager.persistence_dir)
+    response = await other.create_session("u1", SAMPLE_METADATA, 1, 100)
+    session = other.get_session(str(response.upload_id))
+    session.expires_at = datetime.now(UTC) - timedelta(minutes=1)
+    other.update_session(session)
+
+    reaper = UploadReaper(local_storage, manager)
+    assert await reaper.sweep_orphans() == 1
+
+    assert manager.persisted_upload_ids() == []
+
+
+@pytest.mark.asyncio
+async def test_sweep_releases_reservations_without_session(
+    manager, local_storage, tmp_path, monkeypatch
+):
+    """Test disk reserved for an upload whose session is gone is given back."""
+    pool = DiskCapacity(local_storage.base_path, max_usage=1.0, db_path=tmp_path / "capacity.db")
+    monkeypatch.setattr(cleanup, "disk_capacity", pool)
+    response = await manager.create_session("u1", SAMPLE_METADATA, 1, 100)
+    owned = str(response.upload_id)
+    pool.reserve(owned, 100)
+    pool.reserve("crashed", 100)
+
+    await UploadReaper(local_storage, manager).sweep_orphans()
+
+    assert pool.upload_ids() == [owned]
@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from app.auth.user_cache import UserCache
+from app.db.database import Base, async_database_url
+from app.db.models import User
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    """Return an async session on a fresh SQLite database with one user."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        session.add(User(username="alice", email="alice@example.com", hashed_password="h"))
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_caches_record(db):
+    """Test a second lookup is served without querying the database."""
+    cache = UserCache(ttl=60, max_size=10)
+
+    first = await cache.get(db, "alice")
+    with patch.object(db, "execute", AsyncMock()) as mock_execute:
+        second = await cache.get(db, "alice")
+        mock_execute.assert_not_called()
+
+    assert first.email == second.email == "alice@example.com"
+
+
+@pytest.mark.asyncio
+async def test_missing_user_not_cached(db):
+    """Test unknown usernames return None and are not cached."""
+    cache = UserCache(ttl=60, max_size=10)
+
+    assert await cache.get(db, "nobody") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_after_update(db):
+    """Test invalidation makes the next lookup see committed changes."""
+    cache = UserCache(ttl=60, max_size=10)
+    assert (await cache.get(db, "alice")).totp_enabled is False
+
+    await db.execute(update(User).where(User.username == "alice").values(totp_enabled=True))
+    await db.commit()
+    assert (await cache.get(db, "alice")).totp_enabled is False
+
+    cache.invalidate("alice")
+    assert (await cache.get(db, "alice")).totp_enabled is True
+
+
+@pytest.mark.asyncio
+async def test_entries_expire(db):
+    """Test records are reloaded once the TTL has passed."""
+    cache = UserCache(ttl=0, max_size=10)
+    await cache.get(db, "alice")
+
+    assert cache._get_local("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_credentials_stay_in_process(db):
+    """Test records, which hold the password hash, are never written to the shared cache."""
+    cache = UserCache(ttl=60, max_size=10)
+
+    with patch("app.cache.service.cache_service.set", AsyncMock()) as mock_set:
+        assert (await cache.get(db, "alice")).hashed_password == "h"
+        mock_set.assert_not_called()
+
+
+def test_async_database_url():
+    """Test sync URLs map to their async drivers."""
+    assert async_database_url("sqlite:///./relaypacs.db") == "sqlite+aiosqlite:///./relaypacs.db"
+    assert async_database_url("postgresql://u:p@db/relay") == "postgresql+asyncpg://u:p@db/relay"
+    assert async_database_url("postgres://u:p@db/relay") == "postgresql+asyncpg://u:p@db/relay"